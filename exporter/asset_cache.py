@@ -0,0 +1,206 @@
+import argparse
+import base64
+import hashlib
+import os
+import re
+from pathlib import Path
+from urllib.parse import urljoin
+
+# Librerías del reporte con versión fija en el nombre y su hash esperado en formato
+# SRI ("sha256-<base64>" o "sha384-...", el mismo que publican los CDN). El hash vive
+# aquí, no en el cache: un archivo (en cache o recién bajado) que no coincide se rechaza.
+# Una entrada sin hash no se acepta nunca (se enlaza al CDN); `asset_cache.py --pin --write`
+# baja todo y llena los que faltan en este archivo (revisar el diff antes de commitear).
+ASSETS = [
+    ("bootstrap-5.3.0.min.css", "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css",
+     "sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM"),
+    ("dataTables.bootstrap5-1.13.4.min.css", "https://cdn.datatables.net/1.13.4/css/dataTables.bootstrap5.min.css", None),
+    ("jquery-ui-1.13.2.css", "https://code.jquery.com/ui/1.13.2/themes/base/jquery-ui.css", None),
+    ("yadcf-0.9.4.min.css", "https://cdn.jsdelivr.net/npm/yadcf@0.9.4/jquery.dataTables.yadcf.min.css", None),
+    ("jquery-3.6.0.min.js", "https://code.jquery.com/jquery-3.6.0.min.js",
+     "sha256-/xUj+3OJU5yExlq6GSYGSHk7tPXikynS7ogEvDej/m4="),
+    ("jquery-ui-1.13.2.min.js", "https://code.jquery.com/ui/1.13.2/jquery-ui.min.js",
+     "sha256-lSjKY0/srUM9BE3dPm+c4fBo1dky2v27Gdjm2uoZaL0="),
+    ("jquery.dataTables-1.13.4.min.js", "https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js", None),
+    ("dataTables.bootstrap5-1.13.4.min.js", "https://cdn.datatables.net/1.13.4/js/dataTables.bootstrap5.min.js", None),
+    ("yadcf-0.9.4.min.js", "https://cdn.jsdelivr.net/npm/yadcf@0.9.4/jquery.dataTables.yadcf.min.js", None),
+]
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "asset_cache"
+
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?!data:|https?:|/)([^'")]+)\1\s*\)""")
+
+# Cloudflare Pages lee _headers del directorio desplegado
+LONG_CACHE_HEADERS = "/assets/*\n  Cache-Control: public, max-age=31536000, immutable\n"
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("REPORT_ASSET_CACHE", str(DEFAULT_CACHE_DIR)))
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sri(data: bytes, algo: str = "sha256") -> str:
+    return f"{algo}-" + base64.b64encode(hashlib.new(algo, data).digest()).decode("ascii")
+
+
+def _matches(data: bytes, expected: str) -> bool:
+    # Se compara con el mismo algoritmo del hash fijado (sha256/sha384/sha512)
+    return sri(data, expected.split("-", 1)[0]) == expected
+
+
+def _download(url: str) -> bytes:
+    import requests  # solo cuando falta algo en cache
+
+    resp = requests.get(url, timeout=10)
+    resp.raise_for_status()
+    return resp.content
+
+
+def load_assets(offline: bool = False, directory: Path | None = None) -> list[tuple]:
+    """
+    Devuelve [(nombre, url, bytes | None)] en el orden de ASSETS.
+
+    Cada archivo en cache se verifica contra el hash fijado en ASSETS; lo que
+    falta (o no cuadra) se baja una vez y solo se guarda si coincide con ese
+    hash. Una entrada sin hash fijado sale como None (el reporte la enlaza al
+    CDN). Con offline=True no hay red; lo que falte sale como None.
+    """
+    directory = directory or cache_dir()
+    unpinned = [name for name, _, expected in ASSETS if not expected]
+    if unpinned:
+        print(f"⚠️ [ASSETS] Sin hash fijado en ASSETS (se enlazan al CDN): {', '.join(unpinned)}. "
+              "Llenarlos con `python exporter/asset_cache.py --pin --write`.")
+    out = []
+    for name, url, expected in ASSETS:
+        if not expected:
+            out.append((name, url, None))
+            continue
+        path = directory / name
+        data = None
+        if path.exists():
+            data = path.read_bytes()
+            if not _matches(data, expected):
+                print(f"⚠️ [ASSETS] {name} en cache no coincide con su hash; se descarta.")
+                data = None
+        if data is None and not offline:
+            try:
+                fetched = _download(url)
+            except Exception as e:
+                print(f"⚠️ [ASSETS] No se pudo descargar {name}: {type(e).__name__}: {e}")
+            else:
+                if not _matches(fetched, expected):
+                    digest = sri(fetched, expected.split("-", 1)[0])
+                    print(f"❌ [ASSETS] {name}: el CDN devolvió otro contenido ({digest} != {expected}).")
+                else:
+                    directory.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_name(path.name + ".tmp")
+                    tmp.write_bytes(fetched)
+                    os.replace(tmp, path)
+                    data = fetched
+        out.append((name, url, data))
+    return out
+
+
+def _external_name(name: str, data: bytes) -> str:
+    # Nombre con hash de contenido: se puede cachear "para siempre" en el navegador
+    stem, ext = name.rsplit(".", 1)
+    return f"{stem}.{_sha256(data)[:10]}.{ext}"
+
+
+def external_paths(assets: list[tuple], dist_dir: Path) -> list[Path]:
+    """Archivos que mode="external" deja en dist_dir/assets/ (los assets que no están en cache van al CDN)."""
+    return [Path(dist_dir) / "assets" / _external_name(name, data) for name, _, data in assets if data is not None]
+
+
+def render_tags(assets: list[tuple], kind: str, mode: str = "inline", dist_dir: Path | None = None) -> str:
+    """
+    Tags <style>/<link> (kind="css") o <script> (kind="js") para el reporte.
+
+    mode="inline" mete el contenido en la página; mode="external" copia cada
+    archivo a dist_dir/assets/ con hash en el nombre y lo enlaza. Un asset que
+    no está en cache se enlaza al CDN para que el reporte no quede roto.
+    """
+    tags = []
+    for name, url, data in assets:
+        if not name.endswith("." + kind):
+            continue
+        src = url
+        if data is not None and kind == "css":
+            # url(images/...) relativos (íconos de jquery-ui) apuntan al CDN original
+            data = _CSS_URL_RE.sub(lambda m: f'url("{urljoin(url, m.group(2))}")', data.decode("utf-8")).encode("utf-8")
+        if data is not None and mode == "inline":
+            text = data.decode("utf-8")
+            if kind == "css":
+                text = text.replace("</style", "<\\/style")
+                tags.append(f"<style>/* {name} */\n{text}\n</style>")
+            else:
+                text = text.replace("</script", "<\\/script")
+                tags.append(f"<script>/* {name} */\n{text}\n</script>")
+            continue
+        if data is not None and mode == "external":
+            target = Path(dist_dir) / "assets" / _external_name(name, data)
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+            src = f"assets/{target.name}"
+        if kind == "css":
+            tags.append(f'<link rel="stylesheet" href="{src}">')
+        else:
+            tags.append(f'<script src="{src}"></script>')
+    return "\n        ".join(tags)
+
+
+def pin_assets(write: bool = False) -> int:
+    """
+    Baja cada asset e imprime su SRI (con el algoritmo ya fijado, o sha256).
+    Con write=True llena en este archivo las entradas sin hash; las que ya tienen
+    uno distinto solo se reportan. Devuelve cuántas no coinciden con lo fijado.
+    """
+    source_path = Path(__file__)
+    source = source_path.read_text(encoding="utf-8")
+    mismatches = 0
+    for name, url, expected in ASSETS:
+        digest = sri(_download(url), expected.split("-", 1)[0] if expected else "sha256")
+        if expected and digest != expected:
+            mismatches += 1
+            print(f"❌ {name}: {digest}  (ASSETS: {expected})")
+            continue
+        print(f"{'✅' if expected else '📌'} {name}: {digest}")
+        if write and not expected:
+            entry = re.compile(rf'(\("{re.escape(name)}",\s*"{re.escape(url)}",\s*)None(\))')
+            source = entry.sub(lambda m: f'{m.group(1)}"{digest}"{m.group(2)}', source, count=1)
+    if write:
+        source_path.write_text(source, encoding="utf-8")
+        print(f"ASSETS actualizado en {source_path}")
+    return mismatches
+
+
+def write_long_cache_headers(dist_dir: Path):
+    """_headers de Cloudflare Pages para assets/; no se toca si ya existe uno."""
+    path = Path(dist_dir) / "_headers"
+    if not path.exists():
+        path.write_text(LONG_CACHE_HEADERS, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate and verify the local asset cache for the HTML report.")
+    parser.add_argument("--offline", action="store_true", help="Only verify what is already cached.")
+    parser.add_argument("--pin", action="store_true",
+                        help="Download every asset and print its SRI hash (review before pinning).")
+    parser.add_argument("--write", action="store_true",
+                        help="With --pin, fill the missing hashes in ASSETS in this file.")
+    args = parser.parse_args()
+    if args.pin:
+        raise SystemExit(1 if pin_assets(write=args.write) else 0)
+    missing = 0
+    for name, url, data in load_assets(offline=args.offline):
+        if data is None:
+            missing += 1
+            print(f"❌ {name} (missing) <- {url}")
+        else:
+            print(f"✅ {name} ({len(data)} bytes)")
+    print(f"Cache: {cache_dir()}")
+    raise SystemExit(1 if missing else 0)
@@ -1,60 +1,49 @@
 import sqlite3
-import pandas as pd
 import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
 from pathlib import Path
 from datetime import datetime
-import requests
 
-# URLs de las librerías para inyectar (Inline) y evitar bloqueos de ORB/CORS
-YADCF_JS_URL = "https://cdn.jsdelivr.net/npm/yadcf@0.9.4/jquery.dataTables.yadcf.js"
-YADCF_CSS_URL = "https://cdn.jsdelivr.net/npm/yadcf@0.9.4/jquery.dataTables.yadcf.css"
+# Las librerías (jQuery, DataTables, Bootstrap, YADCF...) salen del cache local verificado
+from asset_cache import external_paths, load_assets, render_tags, write_long_cache_headers
 
-def generate_html(db_path, output_path):
-    if not Path(db_path).exists():
-        print(f"Error: Database {db_path} not found.")
-        return
+# Filas que se leen de SQLite y se escriben al archivo por vuelta
+CHUNK_ROWS = 2000
 
-    # Descargar YADCF para inyectarlo
-    print("📥 Downloading YADCF for inlining...")
-    try:
-        yadcf_js = requests.get(YADCF_JS_URL, timeout=10).text
-        yadcf_css = requests.get(YADCF_CSS_URL, timeout=10).text
-    except Exception as e:
-        print(f"⚠️ Warning: Could not download YADCF. Error: {e}")
-        yadcf_js = ""
-        yadcf_css = ""
+# Tablas de escape precompiladas: un str.translate por campo en vez de varios replace.
+# En texto el apóstrofo se sigue cambiando por ’ (así quedaba antes en los filtros de YADCF).
+_TEXT_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "’"})
+_ATTR_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+_JSON_TEXT = str.maketrans({"'": "’"})
 
-    conn = sqlite3.connect(db_path)
-    query = "SELECT title as Title, company as Company, location as Location, date as Posted, link as Link FROM vacantes WHERE status != 'closed' ORDER BY date DESC, scraped_at DESC"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+QUERY = "SELECT title as Title, company as Company, location as Location, date as Posted, link as Link FROM vacantes WHERE status != 'closed' ORDER BY date DESC, scraped_at DESC"
+COUNT_QUERY = "SELECT COUNT(*) FROM vacantes WHERE status != 'closed'"
+# Mismas filas y orden que QUERY más job_hash, para la huella del reporte
+FINGERPRINT_QUERY = "SELECT job_hash, title, company, location, date, link FROM vacantes WHERE status != 'closed' ORDER BY date DESC, scraped_at DESC"
 
-    if df.empty:
-        print("No active jobs found in database to export.")
-        return
+# Código de salida cuando la huella coincide con el reporte existente y no se reescribe
+UNCHANGED_EXIT_CODE = 3
+_FINGERPRINT_RE = re.compile(r'<meta name="report-fingerprint" content="([0-9a-f]{64})">')
 
-    # Limpieza para evitar errores en JS
-    for col in ['Title', 'Company', 'Location']:
-        df[col] = df[col].astype(str).str.replace("'", "’", regex=False)
 
-    df['Link'] = df['Link'].apply(lambda x: f'<a href="{x}" target="_blank" class="btn btn-sm btn-primary px-3">OPEN JOB</a>' if x else "")
-    
-    html_template = f"""
+def _render_head(now, total, style_tags, fingerprint):
+    return f"""
     <!DOCTYPE html>
     <html lang="es">
     <head>
         <meta charset="UTF-8">
+        <meta name="report-fingerprint" content="{fingerprint}">
         <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-        <title>Jobs - {datetime.now().strftime('%Y-%m-%d')}</title>
+        <title>Jobs - {now.strftime('%Y-%m-%d')}</title>
         
-        <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css">
-        <link rel="stylesheet" href="https://cdn.datatables.net/1.13.4/css/dataTables.bootstrap5.min.css">
-        <link rel="stylesheet" href="https://code.jquery.com/ui/1.13.2/themes/base/jquery-ui.css">
+        {style_tags}
         
         <style>
-            /* YADCF INLINED CSS */
-            {yadcf_css if yadcf_css else ''}
-            
             body {{ background-color: #f0f2f5; padding: 10px; font-family: -apple-system, system-ui, sans-serif; }}
             .report-card {{ background: white; padding: 12px; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); }}
             h1 {{ color: #1a1a1a; font-weight: 800; font-size: 1.4rem; margin-bottom: 4px; }}
@@ -122,9 +111,9 @@ def generate_html(db_path, output_path):
                     <div>
                         <h1>Job Report</h1>
                         <p class="text-muted mb-0" style="font-size: 0.7rem; font-weight: 500;">
-                            🗓️ Actualizado: {datetime.now().strftime('%d %b %Y, %H:%M')}
+                            🗓️ Actualizado: {now.strftime('%d %b %Y, %H:%M')}
                         </p>
-                        <span class="badge bg-light text-dark border mt-1">Total: {len(df)} Jobs</span>
+                        <span class="badge bg-light text-dark border mt-1">Total: {total} Jobs</span>
                     </div>
                     <div class="d-flex align-items-center bg-light border rounded px-2 py-1">
                         <label for="fontSize" class="me-2 mb-0" style="font-size: 0.65rem; font-weight: bold;">TEXT</label>
@@ -144,40 +133,42 @@ def generate_html(db_path, output_path):
                             </tr>
                         </thead>
                         <tbody>
-                            {"".join([f'<tr><td data-label="Title">{row["Title"]}</td><td data-label="Company">{row["Company"]}</td><td data-label="Location">{row["Location"]}</td><td data-label="Posted">{row["Posted"]}</td><td>{row["Link"]}</td></tr>' for _, row in df.iterrows()])}
-                        </tbody>
+"""
+
+
+def _render_tail(now, script_tags, data_js="", table_init="initTable({});"):
+    return f"""                        </tbody>
                     </table>
                 </div>
                 <div class="mt-3 text-center border-top pt-2">
                     <p class="text-muted mb-0" style="font-size: 0.75rem; font-weight: 500;">
-                        🗓️ Reporte actualizado: {datetime.now().strftime('%d %b %Y, %H:%M')}
+                        🗓️ Reporte actualizado: {now.strftime('%d %b %Y, %H:%M')}
                     </p>
                 </div>
             </div>
         </div>
 
-        <script src="https://code.jquery.com/jquery-3.6.0.min.js"></script>
-        <script src="https://code.jquery.com/ui/1.13.2/jquery-ui.min.js"></script>
-        <script src="https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js"></script>
-        <script src="https://cdn.datatables.net/1.13.4/js/dataTables.bootstrap5.min.js"></script>
+        {script_tags}
         
         <script>
-            /* YADCF INLINED JS */
-            {yadcf_js if yadcf_js else ''}
-            
-            $(document).ready(function() {{
-                const table = $('#jobsTable').DataTable({{
+            {data_js}
+            function initTable(extra) {{
+                const table = $('#jobsTable').DataTable(Object.assign({{
                     "pageLength": 50,
                     "order": [[ 3, "desc" ]],
                     "dom": "<'row'<'col-12'f>><'row'<'col-12'tr>><'row'<'col-12'p>>",
                     "language": {{ "search": "", "searchPlaceholder": "Quick Search..." }}
-                }});
+                }}, extra));
 
                 yadcf.init(table, [
                     {{ column_number: 1, filter_type: "select", filter_default_label: "Company", cumulative_filtering: true }},
                     {{ column_number: 2, filter_type: "select", filter_default_label: "Location", cumulative_filtering: true }},
                     {{ column_number: 3, filter_type: "range_date", date_format: "yyyy-mm-dd", filter_delay: 500 }}
                 ]);
+            }}
+
+            $(document).ready(function() {{
+                {table_init}
 
                 $('#fontSize').on('input', function() {{
                     $('.table').css('font-size', $(this).val() + 'rem');
@@ -188,14 +179,312 @@ def generate_html(db_path, output_path):
     </html>
     """
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_template)
-    
-    print(f"✅ Mobile-Ready Report generated: {output_path}")
+
+def _render_rows(rows):
+    """Un chunk de filas del cursor -> lista de <tr> ya escapados."""
+    out = []
+    append = out.append
+    for title, company, location, posted, link in rows:
+        link_html = (
+            f'<a href="{str(link).translate(_ATTR_ESCAPE)}" target="_blank" class="btn btn-sm btn-primary px-3">OPEN JOB</a>'
+            if link else ""
+        )
+        append(
+            f'<tr><td data-label="Title">{str(title or "").translate(_TEXT_ESCAPE)}</td>'
+            f'<td data-label="Company">{str(company or "").translate(_TEXT_ESCAPE)}</td>'
+            f'<td data-label="Location">{str(location or "").translate(_TEXT_ESCAPE)}</td>'
+            f'<td data-label="Posted">{str(posted or "").translate(_TEXT_ESCAPE)}</td>'
+            f'<td>{link_html}</td></tr>\n'
+        )
+    return out
+
+
+# Modo json: la tabla se arma en el cliente con la opción `data` + deferRender,
+# así solo las filas de la página visible llegan al DOM.
+_JSON_TABLE_JS = """
+            function loadJobs() {
+                const inline = document.getElementById('jobsData');
+                if (inline) {
+                    return Promise.resolve(JSON.parse(inline.textContent));
+                }
+                return fetch(JOBS_DATA_URL)
+                    .then(function (resp) {
+                        if (!resp.ok) { throw new Error('HTTP ' + resp.status + ' for ' + JOBS_DATA_URL); }
+                        return resp.arrayBuffer();
+                    })
+                    .then(function (buf) {
+                        const magic = new Uint8Array(buf, 0, Math.min(2, buf.byteLength));
+                        // Pages sirve el .json.gz tal cual (sin Content-Encoding): se descomprime aquí
+                        if (magic[0] === 0x1f && magic[1] === 0x8b) {
+                            const stream = new Blob([buf]).stream().pipeThrough(new DecompressionStream('gzip'));
+                            return new Response(stream).text();
+                        }
+                        return new TextDecoder().decode(buf);
+                    })
+                    .then(JSON.parse);
+            }
+
+            function labelled(label) {
+                return function (td) { td.setAttribute('data-label', label); };
+            }
+
+            function openJobLink(url, type) {
+                if (type !== 'display') { return url; }
+                if (!url) { return ''; }
+                const href = url.replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;');
+                return '<a href="' + href + '" target="_blank" class="btn btn-sm btn-primary px-3">OPEN JOB</a>';
+            }
+
+            const JOB_COLUMNS = [
+                { render: $.fn.dataTable.render.text(), createdCell: labelled('Title') },
+                { render: $.fn.dataTable.render.text(), createdCell: labelled('Company') },
+                { render: $.fn.dataTable.render.text(), createdCell: labelled('Location') },
+                { render: $.fn.dataTable.render.text(), createdCell: labelled('Posted') },
+                { render: openJobLink }
+            ];
+"""
+
+_JSON_TABLE_INIT = """loadJobs().then(function (jobs) {
+                    // company/location vienen como índices a sus diccionarios
+                    const companies = jobs.companies, locations = jobs.locations;
+                    jobs.rows.forEach(function (r) { r[1] = companies[r[1]]; r[2] = locations[r[2]]; });
+                    initTable({ "data": jobs.rows, "deferRender": true, "columns": JOB_COLUMNS });
+                }).catch(function (err) {
+                    // Sin datos (fetch, gzip o JSON roto): tabla vacía y el error a la vista
+                    console.error(err);
+                    $('#jobsTable').before($('<div class="alert alert-danger py-2" role="alert"></div>')
+                        .text('Could not load jobs: ' + err.message));
+                    if (!$.fn.dataTable.isDataTable('#jobsTable')) {
+                        initTable({ "data": [], "columns": JOB_COLUMNS });
+                    }
+                });"""
+
+
+def _dumps(obj):
+    # \\u003c en vez de "<": el JSON puede ir dentro de <script> sin cerrar la etiqueta
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+
+def _write_json_data(f, cur, chunk_rows):
+    """
+    Escribe las filas como JSON compacto en streaming y devuelve cuántas escribió.
+
+    Cada fila es [title, company_idx, location_idx, posted, link]; los valores de
+    company y location se repiten mucho, así que van una sola vez en los
+    diccionarios `companies` / `locations` al final del objeto.
+    """
+    companies, locations = {}, {}
+    f.write('{"columns":["Title","Company","Location","Posted","Link"],"rows":[')
+    written = 0
+    while True:
+        rows = cur.fetchmany(chunk_rows)
+        if not rows:
+            break
+        packed = [
+            [
+                str(title or "").translate(_JSON_TEXT),
+                companies.setdefault(str(company or "").translate(_JSON_TEXT), len(companies)),
+                locations.setdefault(str(location or "").translate(_JSON_TEXT), len(locations)),
+                str(posted or ""),
+                str(link or ""),
+            ]
+            for title, company, location, posted, link in rows
+        ]
+        if written:
+            f.write(",")
+        f.write(_dumps(packed)[1:-1])
+        written += len(rows)
+    f.write(f'],"companies":{_dumps(list(companies))},"locations":{_dumps(list(locations))}}}')
+    return written
+
+
+def _write_gzip_json(path, cur, chunk_rows):
+    """JSON de datos comprimido junto al HTML (mtime=0: mismo contenido, mismos bytes)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as raw, gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz:
+        with io.TextIOWrapper(gz, encoding="utf-8") as f:
+            written = _write_json_data(f, cur, chunk_rows)
+    os.replace(tmp_path, path)
+    return written
+
+
+def _fingerprint(conn, chunk_rows, options, assets):
+    """
+    sha256 de todo lo que determina el reporte: filas exportadas (job_hash y
+    campos pintados, en orden), opciones de salida, hashes de las librerías y
+    el código de este exporter y de asset_cache.
+    """
+    h = hashlib.sha256()
+    h.update(Path(__file__).read_bytes())
+    h.update(Path(__file__).with_name("asset_cache.py").read_bytes())
+    h.update(repr(options).encode())
+    for name, url, data in assets:
+        h.update(f"{name}\x1f{hashlib.sha256(data).hexdigest() if data is not None else url}\x1e".encode())
+    cur = conn.execute(FINGERPRINT_QUERY)
+    while True:
+        rows = cur.fetchmany(chunk_rows)
+        if not rows:
+            break
+        h.update("".join("\x1f".join(str(v) for v in row) + "\x1e" for row in rows).encode())
+    return h.hexdigest()
+
+
+def _previous_fingerprint(output_path):
+    """Huella guardada en el <head> del reporte anterior (None si no hay)."""
+    try:
+        with open(output_path, "r", encoding="utf-8", errors="replace") as f:
+            head = f.read(4096)
+    except OSError:
+        return None
+    m = _FINGERPRINT_RE.search(head)
+    return m.group(1) if m else None
+
+
+def _read_marker(marker_path):
+    """Huella del último deploy exitoso (la escriben los scripts con --mark-deployed)."""
+    try:
+        return Path(marker_path).read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def mark_deployed(output_path, marker_path):
+    """Guarda en `marker_path` la huella del reporte en `output_path`; se llama solo si el deploy salió bien."""
+    fingerprint = _previous_fingerprint(output_path)
+    if fingerprint is None:
+        print(f"Error: {output_path} no tiene huella; no se marca como desplegado.")
+        return False
+    tmp = f"{marker_path}.tmp"
+    Path(tmp).write_text(fingerprint + "\n", encoding="utf-8")
+    os.replace(tmp, marker_path)
+    return True
+
+
+def generate_html(db_path, output_path, chunk_rows=CHUNK_ROWS, mode="json", external_data=False,
+                  assets_mode="inline", offline=False, force=False, deployed_marker=None):
+    """
+    Escribe el reporte en streaming: cabecera, filas leídas del cursor en chunks
+    de `chunk_rows` y cierre. Nunca se arma el HTML completo en memoria.
+    Se escribe a un .tmp y se renombra al final para no publicar un reporte a medias.
+
+    mode="rows" pinta cada vacante como <tr> (DataTables lee el DOM).
+    mode="json" embebe las filas como JSON y la tabla se arma en el cliente;
+    con external_data=True el JSON va en `<output>.json.gz` junto al HTML.
+
+    Las librerías vienen del cache de asset_cache: assets_mode="inline" las mete
+    en la página y "external" las copia a `assets/` (nombre con hash) junto al
+    HTML. Solo se toca la red si falta algo en el cache y offline=False.
+
+    Si la huella de las filas y opciones coincide con la del reporte que ya está
+    en `output_path` (y force=False), no se escribe nada y se devuelve
+    "unchanged"; si se escribió, "written". None si no hubo reporte. Con
+    `deployed_marker` se compara contra la huella del último deploy exitoso en
+    lugar del reporte local: un deploy fallido no deja el reporte "sin cambios".
+    """
+    if not Path(db_path).exists():
+        print(f"Error: Database {db_path} not found.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # COUNT y filas en la misma transacción de lectura: el badge cuadra aunque el scraper esté escribiendo
+        conn.execute("BEGIN")
+        total = conn.execute(COUNT_QUERY).fetchone()[0]
+        if not total:
+            print("No active jobs found in database to export.")
+            return
+
+        assets = load_assets(offline=offline)
+        missing = [name for name, _, data in assets if data is None]
+        if missing:
+            print(f"⚠️ Assets fuera del cache, se enlazan al CDN: {', '.join(missing)}")
+        options = (mode, external_data, assets_mode)
+        fingerprint = _fingerprint(conn, chunk_rows, options, assets)
+        data_path = Path(output_path).with_suffix(".json.gz")
+        dist_dir = Path(output_path).parent
+        outputs_present = (
+            Path(output_path).exists()
+            and (not (mode == "json" and external_data) or data_path.exists())
+            and (assets_mode != "external" or all(p.exists() for p in external_paths(assets, dist_dir)))
+        )
+        previous = _read_marker(deployed_marker) if deployed_marker else _previous_fingerprint(output_path)
+        if not force and outputs_present and previous == fingerprint:
+            print(f"⏭️ Report unchanged ({total} jobs, fingerprint {fingerprint[:12]}): {output_path}")
+            return "unchanged"
+
+        style_tags = render_tags(assets, "css", assets_mode, dist_dir)
+        script_tags = render_tags(assets, "js", assets_mode, dist_dir)
+        if assets_mode == "external":
+            write_long_cache_headers(dist_dir)
+
+        now = datetime.now()
+        tmp_path = f"{output_path}.tmp"
+        written = 0
+        data_js, table_init = "", "initTable({});"
+        cur = conn.execute(QUERY)
+        if mode == "json":
+            table_init = _JSON_TABLE_INIT
+            data_js = _JSON_TABLE_JS
+            if external_data:
+                written = _write_gzip_json(data_path, cur, chunk_rows)
+                data_js = f"const JOBS_DATA_URL = {_dumps(data_path.name)};\n" + data_js
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_render_head(now, total, style_tags, fingerprint))
+            if mode == "rows":
+                while True:
+                    rows = cur.fetchmany(chunk_rows)
+                    if not rows:
+                        break
+                    f.writelines(_render_rows(rows))
+                    written += len(rows)
+            elif not external_data:
+                # <script> es contenido válido de <tbody>; DataTables lo reemplaza al dibujar
+                f.write('<script id="jobsData" type="application/json">')
+                written = _write_json_data(f, cur, chunk_rows)
+                f.write("</script>\n")
+            f.write(_render_tail(now, script_tags, data_js, table_init))
+        os.replace(tmp_path, output_path)
+    finally:
+        conn.close()
+
+    print(f"✅ Mobile-Ready Report generated: {output_path} ({written} jobs)")
+    return "written"
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate a mobile-ready HTML report.")
-    parser.add_argument("--db", type=str, required=True, help="Path to database.")
+    parser.add_argument("--db", type=str, help="Path to database (required unless --mark-deployed).")
     parser.add_argument("--output", type=str, required=True, help="Path to output.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows fetched and written per chunk.")
+    parser.add_argument("--mode", choices=["json", "rows"], default="json",
+                        help="json: rows as embedded JSON rendered client-side (deferRender). rows: one <tr> per job.")
+    parser.add_argument("--external-data", action="store_true",
+                        help="With --mode json, write the data to <output>.json.gz next to the HTML instead of inlining it.")
+    parser.add_argument("--assets", choices=["inline", "external"], default="inline",
+                        help="inline: libraries embedded in the page. external: hashed long-cache files in <output dir>/assets/.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never download: libraries missing from the asset cache are linked to their CDN.")
+    parser.add_argument("--force", action="store_true", help="Rewrite the report even if its fingerprint did not change.")
+    parser.add_argument("--deployed-marker", type=str,
+                        help="File with the fingerprint of the last successful deploy; 'unchanged' is decided against it.")
+    parser.add_argument("--mark-deployed", action="store_true",
+                        help="Record the fingerprint of --output in --deployed-marker (after a successful deploy) and exit.")
     args = parser.parse_args()
-    generate_html(args.db, args.output)
+    if args.mark_deployed:
+        if not args.deployed_marker:
+            parser.error("--mark-deployed requires --deployed-marker")
+        raise SystemExit(0 if mark_deployed(args.output, args.deployed_marker) else 1)
+    if not args.db:
+        parser.error("--db is required")
+    status = generate_html(
+        args.db,
+        args.output,
+        chunk_rows=args.chunk_rows,
+        mode=args.mode,
+        external_data=args.external_data,
+        assets_mode=args.assets,
+        offline=args.offline,
+        force=args.force,
+        deployed_marker=args.deployed_marker,
+    )
+    if status == "unchanged":
+        raise SystemExit(UNCHANGED_EXIT_CODE)
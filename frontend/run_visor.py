@@ -5,6 +5,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+import threading
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
@@ -37,17 +41,85 @@ if DATA_DIR is None:
 # 3. Rutas absolutas que siempre serán BASE/DATA/...
 DB_PATH = DATA_DIR / "vacantes.db"
 
-def _get_conn():
+def _get_conn(check_same_thread: bool = True):
     if DB_PATH is None:
         raise RuntimeError("DB_PATH not set. Call set_db_path() first.")
     timeout = int(os.getenv("SQLITE_TIMEOUT", "60"))
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=timeout)
+    conn = sqlite3.connect(
+        f"file:{DB_PATH}?mode=ro", uri=True, timeout=timeout, check_same_thread=check_same_thread
+    )
     conn.execute("PRAGMA busy_timeout = 60000;")
     conn.execute("PRAGMA query_only = ON;")
     conn.execute("PRAGMA foreign_keys = ON;")     # por si metes claves foráneas
     return conn
 
 
+def _db_change_token() -> tuple:
+    """
+    Token que cambia cuando el scraper escribe: mtime/tamaño de la DB y de su WAL.
+
+    Con WAL cada commit toca el -wal y cada checkpoint la DB, así que basta con
+    os.stat (sin abrir SQLite) para saber si lo cacheado sigue vigente.
+    """
+    parts = []
+    for path in (DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal")):
+        try:
+            stat = path.stat()
+            parts.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            parts.append(None)
+    return tuple(parts)
+
+
+@st.cache_resource
+def _shared_conn():
+    """Una conexión read-only por proceso; las sesiones de Streamlit la comparten con un lock."""
+    return _get_conn(check_same_thread=False), threading.Lock()
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_rows(sql: str, params: tuple, db_token: tuple) -> list:
+    conn, lock = _shared_conn()
+    with lock:
+        return conn.execute(sql, params).fetchall()
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _cached_frame(sql: str, params: tuple, db_token: tuple) -> pd.DataFrame:
+    conn, lock = _shared_conn()
+    with lock:
+        return pd.read_sql_query(sql, conn, params=list(params))
+
+
+class _CachedRows:
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> list:
+        return list(self._rows)
+
+
+class _CachedDB:
+    """
+    Fachada con la interfaz de sqlite3.Connection que usa el visor.
+
+    Cada SELECT se cachea por (sql, params, token de cambios): mientras el
+    scraper no escriba, los reruns de Streamlit no ejecutan SQL.
+    """
+
+    def __init__(self, db_token: tuple):
+        self.db_token = db_token
+
+    def execute(self, sql: str, params=()) -> _CachedRows:
+        return _CachedRows(_cached_rows(sql, tuple(params), self.db_token))
+
+    def read_frame(self, sql: str, params=()) -> pd.DataFrame:
+        return _cached_frame(sql, tuple(params), self.db_token)
+
+
 def _table_cols(conn, table: str) -> list[str]:
     try:
         cur = conn.execute(f"PRAGMA table_info({table})")
@@ -82,7 +154,174 @@ def _build_global_text_clause(cols: list[str], terms: list[str], params: list[st
     return "(" + " OR ".join(parts) + ")"
 
 
-def _build_where(filters: dict, available_cols: list[str], alias: str | None = None) -> tuple[str, list[str]]:
+# Columnas de vacantes_fts (mismo orden que FTS_COLUMNS en db_vacantes) y su peso en bm25
+FTS_WEIGHTS = {"title": 10.0, "company": 5.0, "location": 3.0, "full_text": 1.0}
+
+
+def _has_fts(conn) -> bool:
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vacantes_fts'"
+        ).fetchone()
+        return row is not None
+    except Exception:
+        return False
+
+
+def _has_company_dim(conn, vac_cols: list[str]) -> bool:
+    """La DB ya tiene la dimensión companies (db_vacantes.link_companies) y vacantes.company_id."""
+    if "company_id" not in vac_cols:
+        return False
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies'"
+        ).fetchone()
+        return row is not None
+    except Exception:
+        return False
+
+
+def _norm_company_term(term: str) -> str:
+    """Misma limpieza que db_vacantes.normalize_company (sin quitar sufijos) para buscar en norm_name."""
+    text = unicodedata.normalize("NFKD", term)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower().replace(".", "")
+    return " ".join(re.sub(r"[^\w&]+", " ", text).split())
+
+
+def _fts_term(term: str) -> str | None:
+    """'supply chain' -> '"supply"* "chain"*' (todas las palabras, con prefijo)."""
+    words = re.findall(r"\w+", term)
+    if not words:
+        return None
+    return " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+def _fts_group(terms: list[str], column: str | None = None) -> str | None:
+    """Términos separados por coma se combinan con OR, como en el modo LIKE."""
+    parts = [p for p in (_fts_term(t) for t in terms) if p]
+    if not parts:
+        return None
+    expr = " OR ".join(f"({p})" for p in parts)
+    if column:
+        return f"{{{column}}} : ({expr})"
+    return f"({expr})"
+
+
+def _build_fts_match(filters: dict) -> str | None:
+    """Expresión MATCH para todos los filtros de texto (lugar, empresa y búsqueda global)."""
+    groups = [
+        _fts_group(filters.get("filtro_lugar_terms") or [], "location"),
+        # Con la dimensión companies la empresa se filtra por company_id (ver _build_where)
+        None if filters.get("company_dim") else _fts_group(filters.get("filtro_empresa_terms") or [], "company"),
+        _fts_group(filters.get("filtro_texto_terms") or []),
+    ]
+    groups = [g for g in groups if g]
+    return " AND ".join(groups) if groups else None
+
+
+def _keyset_clause(sort_expr: str, descending: bool, cursor, nullable: bool, params: list) -> str:
+    """
+    Condición para la página que sigue a `cursor` = (valor_orden, job_hash).
+
+    El orden es (sort_expr, job_hash) en la misma dirección, así que la
+    comparación por row value avanza sobre el índice compuesto sin OFFSET.
+    En SQLite los NULL van al final en DESC y al principio en ASC.
+    """
+    value, job_hash = cursor
+    op = "<" if descending else ">"
+    if value is None:
+        params.append(job_hash)
+        clause = f"({sort_expr} IS NULL AND v.job_hash {op} ?)"
+        return clause if descending else f"({clause} OR {sort_expr} IS NOT NULL)"
+    params.extend([value, job_hash])
+    clause = f"({sort_expr}, v.job_hash) {op} (?, ?)"
+    return f"({clause} OR {sort_expr} IS NULL)" if nullable and descending else f"({clause})"
+
+
+# Buckets de antigüedad: (etiqueta, días mínimos, días máximos); orden de la gráfica
+AGE_BUCKETS = [
+    ("New", 0, 0),
+    ("One week old", 1, 7),
+    ("2 weeks old", 8, 14),
+    ("One month old", 15, 30),
+    ("2 months old", 31, 60),
+]
+
+
+def _age_label(day: str, now: datetime) -> str:
+    """Mismo criterio que CAST(julianday('now') - julianday(day) AS INT) del query anterior."""
+    if not day:
+        return "Unknown"
+    try:
+        ref = datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        return "Older"  # julianday() inválido caía en el ELSE
+    age = int((now - ref).total_seconds() / 86400)
+    for label, lo, hi in AGE_BUCKETS:
+        if lo <= age <= hi:
+            return label
+    return "Older"
+
+
+def _load_metrics(db, fecha_ref: str | None, company_col: str = "company") -> tuple[tuple, list]:
+    """
+    Totales, status, sin analizar, empresas, score promedio y antigüedad.
+
+    Lee vacantes_daily_stats (una fila por día × status, mantenida con triggers
+    en db_vacantes), así que el costo depende de los días, no de las vacantes.
+    En DBs sin ese resumen se agrega lo mismo con una sola pasada sobre vacantes.
+    """
+    has_stats = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vacantes_daily_stats'"
+    ).fetchone()
+    if has_stats and fecha_ref == "scraped_at":
+        rows = db.execute(
+            "SELECT day, status, n, n_scored, score_sum FROM vacantes_daily_stats WHERE n != 0"
+        ).fetchall()
+    else:
+        day_expr = f"COALESCE(substr({fecha_ref}, 1, 10), '')" if fecha_ref else "''"
+        rows = db.execute(f"""
+            SELECT {day_expr}, COALESCE(status, ''), COUNT(*), COUNT(score_total), COALESCE(SUM(score_total), 0)
+            FROM vacantes
+            GROUP BY 1, 2
+        """).fetchall()
+    # company_id agrupa variantes de nombre ("Acme S.A. de C.V." / "ACME") en una sola empresa
+    empresas_cnt = db.execute(f"SELECT COUNT(DISTINCT {company_col}) FROM vacantes").fetchone()[0]
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    by_status = {"new": 0, "active": 0, "closed": 0}
+    total = scored = 0
+    score_sum = 0.0
+    age_counts = {label: 0 for label, _, _ in AGE_BUCKETS}
+    age_counts.update({"Older": 0, "Unknown": 0})
+    for day, status, n, n_scored, s_sum in rows:
+        total += n
+        scored += n_scored
+        score_sum += s_sum
+        if status in by_status:
+            by_status[status] += n
+        # Antigüedad solo de no closed (status NULL tampoco contaba con status != 'closed')
+        if status and status != "closed":
+            age_counts[_age_label(day, now)] += n
+    metrics = (
+        total,
+        by_status["new"],
+        by_status["active"],
+        by_status["closed"],
+        total - scored,
+        empresas_cnt,
+        score_sum / scored if scored else None,
+    )
+    age_rows = list(age_counts.items()) if fecha_ref else []
+    return metrics, age_rows
+
+
+def _build_where(
+    filters: dict,
+    available_cols: list[str],
+    alias: str | None = None,
+    include_fts: bool = True,
+) -> tuple[str, list[str]]:
     clauses: list[str] = []
     params: list[str] = []
 
@@ -100,19 +339,35 @@ def _build_where(filters: dict, available_cols: list[str], alias: str | None = N
         clauses.append(f"{col('status')} IN ({placeholders})")
         params.extend(status_sel)
 
-    lugar_terms = filters.get("filtro_lugar_terms") or []
+    use_fts = filters.get("search_mode") == "fts"
+    if use_fts and include_fts:
+        match = _build_fts_match(filters)
+        if match:
+            clauses.append(f"{col('rowid')} IN (SELECT rowid FROM vacantes_fts WHERE vacantes_fts MATCH ?)")
+            params.append(match)
+
+    lugar_terms = [] if use_fts else filters.get("filtro_lugar_terms") or []
     if lugar_terms and "location" in available_cols:
         clause = _build_like_clause(col("location"), lugar_terms, params)
         if clause:
             clauses.append(clause)
 
     empresa_terms = filters.get("filtro_empresa_terms") or []
-    if empresa_terms and "company" in available_cols:
+    if empresa_terms and filters.get("company_dim"):
+        # Se busca en los nombres normalizados (pocas filas) y se filtra por la llave entera
+        norm_terms = [t for t in (_norm_company_term(t) for t in empresa_terms) if t]
+        if norm_terms:
+            # "acme sa" también encuentra "acme": norm_name ya viene sin sufijos legales
+            likes = " OR ".join("norm_name LIKE ? OR ? LIKE norm_name || ' %'" for _ in norm_terms)
+            clauses.append(f"{col('company_id')} IN (SELECT company_id FROM companies WHERE {likes})")
+            for t in norm_terms:
+                params.extend([f"%{t}%", t])
+    elif empresa_terms and not use_fts and "company" in available_cols:
         clause = _build_like_clause(col("company"), empresa_terms, params)
         if clause:
             clauses.append(clause)
 
-    texto_terms = filters.get("filtro_texto_terms") or []
+    texto_terms = [] if use_fts else filters.get("filtro_texto_terms") or []
     if texto_terms:
         text_cols = [c for c in ["title", "company", "location"] if c in available_cols]
         text_cols = [col(c) for c in text_cols]
@@ -174,7 +429,15 @@ perf_mode = True
 score_min = st.sidebar.slider("Score mínimo", min_value=-1, max_value=120, value=85, step=5)
 filtro_lugar = st.sidebar.text_input("📍 Filtrar por lugar (puedes usar múltiples, separados por coma)").strip().lower()
 filtro_empresa = st.sidebar.text_input("🏢 Filtrar por empresa (puedes usar múltiples, separados por coma)").strip().lower()
-filtro_texto = st.sidebar.text_input("🔎 Búsqueda global (title/company/location)").strip().lower()
+filtro_texto = st.sidebar.text_input("🔎 Búsqueda global (title/company/location/descripción)").strip().lower()
+search_mode_label = st.sidebar.radio(
+    "Modo de búsqueda",
+    ["FTS (índice)", "LIKE (substring)"],
+    index=0,
+    horizontal=True,
+    help="FTS busca palabras por prefijo en título, empresa, lugar y descripción, ordenadas por relevancia. "
+    "LIKE busca substrings solo en título/empresa/lugar (lento en DBs grandes).",
+)
 status_sel = st.sidebar.multiselect(
     "STATUS",
     options=["new", "active", "closed"],
@@ -204,181 +467,157 @@ if date_quick != "all":
         cutoff = hoy - pd.Timedelta(days=13)
 
 # --- Tabla SQL (filtros aplicados en DB) ---
-table_total_rows = None
 df_view = pd.DataFrame()
 perf = {} if perf_mode else None
-try:
-    t_conn = time.perf_counter() if perf_mode else None
-    conn_table = _get_conn()
-    vac_cols = _table_cols(conn_table, "vacantes")
-    emp_cols = _table_cols(conn_table, "empresas")
-    if perf_mode:
-        perf["conn+cols_ms"] = int((time.perf_counter() - t_conn) * 1000)
-    base_cols = [
-        "score_total",
-        "categoria_fit",
-        "status",
-        "title",
-        "company",
-        "sector_empresa",
-        "location",
-        "presencia_mexico",
-        "es_procurement",
-        "es_fit_usuario",
-        "nivel_estimado",
-        "link",
-        "scraped_at",
-    ]
-    select_cols_sql = []
-    for col_name in base_cols:
-        if col_name in vac_cols:
-            select_cols_sql.append(f"v.{col_name}")
-        elif col_name == "sector_empresa" and "sector_empresa" in emp_cols:
-            select_cols_sql.append("e.sector_empresa")
-        elif col_name == "presencia_mexico" and "presencia_mexico" in emp_cols:
-            select_cols_sql.append("e.presencia_mexico")
-
-    filtro_lugar_terms = _terms_from_csv(filtro_lugar)
-    filtro_empresa_terms = _terms_from_csv(filtro_empresa)
-    filtro_texto_terms = _terms_from_csv(filtro_texto)
-    fecha_ref_db = next((c for c in ["scraped_at", "date", "last_seen_on"] if c in vac_cols), None)
-    filters = {
-        "score_min": score_min,
-        "status_sel": status_sel,
-        "filtro_lugar_terms": filtro_lugar_terms,
-        "filtro_empresa_terms": filtro_empresa_terms,
-        "filtro_texto_terms": filtro_texto_terms,
-        "date_quick": date_quick,
-        "fecha_ref": fecha_ref_db,
-        "cutoff": cutoff.strftime("%Y-%m-%d") if cutoff is not None else None,
-    }
-    t_where = time.perf_counter() if perf_mode else None
-    where_sql, params = _build_where(filters, vac_cols, alias="v")
-    if perf_mode:
-        perf["build_where_ms"] = int((time.perf_counter() - t_where) * 1000)
-    cutoff_key = filters.get("cutoff")
-    filters_key = (
-        score_min,
-        tuple(status_sel),
-        tuple(filtro_lugar_terms),
-        tuple(filtro_empresa_terms),
-        tuple(filtro_texto_terms),
-        date_quick,
-        cutoff_key,
-    )
-    if st.session_state.get("filters_key") != filters_key:
-        st.session_state["filters_key"] = filters_key
-        st.session_state["table_total_rows"] = None
-
-    order_by = "v.score_total DESC" if "score_total" in vac_cols else "v.scraped_at DESC"
-    offset = (st.session_state.get("page", 1) - 1) * page_size
-    data_q = f"""
-        SELECT {', '.join(select_cols_sql)}
-        FROM vacantes v
-        LEFT JOIN empresas e ON v.company = e.company
-        {where_sql}
-        ORDER BY {order_by}
-        LIMIT ? OFFSET ?
-    """
-    data_params = params + [page_size, offset]
-    t_query = time.perf_counter() if perf_mode else None
-    df_view = pd.read_sql_query(data_q, conn_table, params=data_params)
-    if perf_mode:
-        perf["query_page_ms"] = int((time.perf_counter() - t_query) * 1000)
-finally:
-    try:
-        conn_table.close()
-    except Exception:
-        pass
-
+t_conn = time.perf_counter() if perf_mode else None
+# El día entra al token porque las métricas de antigüedad usan julianday('now')
+db = _CachedDB((_db_change_token(), pd.Timestamp.today().strftime("%Y-%m-%d")))
+vac_cols = _table_cols(db, "vacantes")
+emp_cols = _table_cols(db, "empresas")
+company_dim = _has_company_dim(db, vac_cols)
+search_mode = "fts" if search_mode_label.startswith("FTS") and _has_fts(db) else "like"
+if search_mode_label.startswith("FTS") and search_mode == "like":
+    st.sidebar.caption("⚠️ La DB no tiene índice FTS; usando LIKE.")
+if perf_mode:
+    perf["conn+cols_ms"] = int((time.perf_counter() - t_conn) * 1000)
+base_cols = [
+    "score_total",
+    "categoria_fit",
+    "status",
+    "title",
+    "company",
+    "sector_empresa",
+    "location",
+    "presencia_mexico",
+    "es_procurement",
+    "es_fit_usuario",
+    "nivel_estimado",
+    "link",
+    "scraped_at",
+]
+select_cols_sql = []
+for col_name in base_cols:
+    if col_name in vac_cols:
+        select_cols_sql.append(f"v.{col_name}")
+    elif col_name == "sector_empresa" and "sector_empresa" in emp_cols:
+        select_cols_sql.append("e.sector_empresa")
+    elif col_name == "presencia_mexico" and "presencia_mexico" in emp_cols:
+        select_cols_sql.append("e.presencia_mexico")
+
+filtro_lugar_terms = _terms_from_csv(filtro_lugar)
+filtro_empresa_terms = _terms_from_csv(filtro_empresa)
+filtro_texto_terms = _terms_from_csv(filtro_texto)
+fecha_ref_db = next((c for c in ["scraped_at", "date", "last_seen_on"] if c in vac_cols), None)
+filters = {
+    "score_min": score_min,
+    "status_sel": status_sel,
+    "filtro_lugar_terms": filtro_lugar_terms,
+    "filtro_empresa_terms": filtro_empresa_terms,
+    "filtro_texto_terms": filtro_texto_terms,
+    "date_quick": date_quick,
+    "fecha_ref": fecha_ref_db,
+    "cutoff": cutoff.strftime("%Y-%m-%d") if cutoff is not None else None,
+    "search_mode": search_mode,
+    "company_dim": company_dim,
+}
+t_where = time.perf_counter() if perf_mode else None
+where_sql, params = _build_where(filters, vac_cols, alias="v")
+fts_match = _build_fts_match(filters) if search_mode == "fts" else None
+if perf_mode:
+    perf["build_where_ms"] = int((time.perf_counter() - t_where) * 1000)
+cutoff_key = filters.get("cutoff")
+filters_key = (
+    score_min,
+    tuple(status_sel),
+    tuple(filtro_lugar_terms),
+    tuple(filtro_empresa_terms),
+    tuple(filtro_texto_terms),
+    date_quick,
+    cutoff_key,
+    search_mode,
+)
+# Pila de cursores de las páginas anteriores; se reinicia si cambian filtros o tamaño de página
+if st.session_state.get("cursor_key") != (filters_key, page_size):
+    st.session_state["cursor_key"] = (filters_key, page_size)
+    st.session_state["page_cursors"] = []
+page_cursors = st.session_state["page_cursors"]
+
+# Orden por (columna, job_hash), respaldado por idx_vacantes_score_hash / idx_vacantes_scraped_hash
+sort_expr = "v.score_total" if "score_total" in vac_cols else "v.scraped_at"
+sort_desc = True
+# Sin score_min los NULL de la columna de orden pueden aparecer al final
+sort_nullable = sort_expr != "v.score_total" or score_min is None
+fts_join = ""
+fts_params: list[str] = []
+if fts_match:
+    # Con búsqueda FTS se ordena por relevancia (bm25: menor es mejor) y luego por score
+    data_where_sql, data_where_params = _build_where(filters, vac_cols, alias="v", include_fts=False)
+    weights = ", ".join(str(FTS_WEIGHTS[c]) for c in FTS_WEIGHTS)
+    fts_join = f"""
+    JOIN (
+        SELECT rowid AS fts_rowid, bm25(vacantes_fts, {weights}) AS fts_rank
+        FROM vacantes_fts
+        WHERE vacantes_fts MATCH ?
+    ) f ON f.fts_rowid = v.rowid"""
+    fts_params = [fts_match]
+    sort_expr, sort_desc, sort_nullable = "f.fts_rank", False, False
+else:
+    data_where_sql, data_where_params = where_sql, list(params)
+if page_cursors:
+    keyset = _keyset_clause(sort_expr, sort_desc, page_cursors[-1], sort_nullable, data_where_params)
+    data_where_sql = f"{data_where_sql} AND {keyset}" if data_where_sql else f"WHERE {keyset}"
+direction = "DESC" if sort_desc else "ASC"
+# Join por llave entera (idx_empresas_company_id) en vez de comparar strings
+empresas_join = "e.company_id = v.company_id" if company_dim and "company_id" in emp_cols else "v.company = e.company"
+data_q = f"""
+    SELECT {', '.join(select_cols_sql)}, {sort_expr} AS _sort_key, v.job_hash AS _job_hash
+    FROM vacantes v{fts_join}
+    LEFT JOIN empresas e ON {empresas_join}
+    {data_where_sql}
+    ORDER BY {sort_expr} {direction}, v.job_hash {direction}
+    LIMIT ?
+"""
+# Una fila extra solo para saber si hay página siguiente (sin COUNT)
+data_params = fts_params + data_where_params + [page_size + 1]
+t_query = time.perf_counter() if perf_mode else None
+df_view = db.read_frame(data_q, data_params)
+if perf_mode:
+    perf["query_page_ms"] = int((time.perf_counter() - t_query) * 1000)
+next_cursor = None
+if len(df_view) > page_size:
+    df_view = df_view.iloc[:page_size]
+    last = df_view.iloc[-1]
+    sort_value = last["_sort_key"]
+    if pd.isna(sort_value):
+        sort_value = None
+    elif hasattr(sort_value, "item"):
+        sort_value = sort_value.item()  # numpy -> tipo nativo para sqlite3
+    next_cursor = (sort_value, str(last["_job_hash"]))
+df_view = df_view.drop(columns=["_sort_key", "_job_hash"])
 # --- Métricas SQL (totales y filtradas en DB completa) ---
-sql_metrics = None
-sql_view = None
-try:
-    t_conn_m = time.perf_counter() if perf_mode else None
-    conn_metrics = _get_conn()
-    vac_cols = _table_cols(conn_metrics, "vacantes")
-    if perf_mode:
-        perf["metrics_conn+cols_ms"] = int((time.perf_counter() - t_conn_m) * 1000)
-    # Totales
-    total_q = """
-        SELECT
-            COUNT(*) AS total,
-            SUM(CASE WHEN status='new' THEN 1 ELSE 0 END) AS new_cnt,
-            SUM(CASE WHEN status='active' THEN 1 ELSE 0 END) AS active_cnt,
-            SUM(CASE WHEN status='closed' THEN 1 ELSE 0 END) AS closed_cnt,
-            SUM(CASE WHEN score_total IS NULL THEN 1 ELSE 0 END) AS unanalyzed_cnt,
-            COUNT(DISTINCT company) AS empresas_cnt,
-            AVG(score_total) AS avg_score
-        FROM vacantes
-    """
-    t_metrics = time.perf_counter() if perf_mode else None
-    cur = conn_metrics.execute(total_q)
-    sql_metrics = cur.fetchone()
-    if perf_mode:
-        perf["metrics_total_ms"] = int((time.perf_counter() - t_metrics) * 1000)
-
-    # Filtros aplicados a DB completa (incluye score_min y filtros activos)
-    filtro_lugar_terms = _terms_from_csv(filtro_lugar)
-    filtro_empresa_terms = _terms_from_csv(filtro_empresa)
-    filtro_texto_terms = _terms_from_csv(filtro_texto)
-    filters = {
-        "score_min": score_min,
-        "status_sel": status_sel,
-        "filtro_lugar_terms": filtro_lugar_terms,
-        "filtro_empresa_terms": filtro_empresa_terms,
-        "filtro_texto_terms": filtro_texto_terms,
-        "date_quick": date_quick,
-        "fecha_ref": next((c for c in ["scraped_at", "date", "last_seen_on"] if c in vac_cols), None),
-        "cutoff": cutoff.strftime("%Y-%m-%d") if cutoff is not None else None,
-    }
-    where_sql, params = _build_where(filters, vac_cols, alias="v")
-    view_q = f"""
-        SELECT
-            COUNT(*) AS total,
-            SUM(CASE WHEN status='new' THEN 1 ELSE 0 END) AS new_cnt,
-            SUM(CASE WHEN status='active' THEN 1 ELSE 0 END) AS active_cnt,
-            SUM(CASE WHEN status='closed' THEN 1 ELSE 0 END) AS closed_cnt
-        FROM vacantes v
-        {where_sql}
-    """
-    t_view = time.perf_counter() if perf_mode else None
-    cur = conn_metrics.execute(view_q, params)
-    sql_view = cur.fetchone()
-    if perf_mode:
-        perf["metrics_view_ms"] = int((time.perf_counter() - t_view) * 1000)
-
-    # --- Métrica de antigüedad desde DB (solo no closed) ---
-    fecha_ref_db = next((c for c in ["scraped_at", "date", "last_seen_on"] if c in vac_cols), None)
-    if fecha_ref_db:
-        age_q = f"""
-            SELECT
-                CASE
-                    WHEN {fecha_ref_db} IS NULL THEN 'Unknown'
-                    WHEN CAST(julianday('now') - julianday({fecha_ref_db}) AS INT) = 0 THEN 'New'
-                    WHEN CAST(julianday('now') - julianday({fecha_ref_db}) AS INT) BETWEEN 1 AND 7 THEN 'One week old'
-                    WHEN CAST(julianday('now') - julianday({fecha_ref_db}) AS INT) BETWEEN 8 AND 14 THEN '2 weeks old'
-                    WHEN CAST(julianday('now') - julianday({fecha_ref_db}) AS INT) BETWEEN 15 AND 30 THEN 'One month old'
-                    WHEN CAST(julianday('now') - julianday({fecha_ref_db}) AS INT) BETWEEN 31 AND 60 THEN '2 months old'
-                    ELSE 'Older'
-                END AS bucket,
-                COUNT(*) AS cnt
-            FROM vacantes
-            WHERE status != 'closed'
-            GROUP BY bucket
-        """
-        t_age = time.perf_counter() if perf_mode else None
-        cur = conn_metrics.execute(age_q)
-        sql_age_rows = cur.fetchall()
-        if perf_mode:
-            perf["metrics_age_ms"] = int((time.perf_counter() - t_age) * 1000)
-    else:
-        sql_age_rows = []
-finally:
-    try:
-        conn_metrics.close()
-    except Exception:
-        pass
+# Totales + status + antigüedad desde el resumen diario; no depende de los filtros
+t_metrics = time.perf_counter() if perf_mode else None
+sql_metrics, sql_age_rows = _load_metrics(db, fecha_ref_db, "company_id" if company_dim else "company")
+if perf_mode:
+    perf["metrics_total_ms"] = int((time.perf_counter() - t_metrics) * 1000)
+
+# Filtros aplicados a DB completa (mismo WHERE que la tabla); su total es el de la paginación.
+# El conteo exacto corre al final del render, con la tabla ya pintada: mientras tanto se
+# muestra el último conteo exacto de estos mismos filtros (aunque la DB haya cambiado desde
+# entonces) marcado con "~", o "calculando" si estos filtros no se han contado.
+view_q = f"""
+    SELECT
+        COUNT(*) AS total,
+        SUM(status = 'new') AS new_cnt,
+        SUM(status = 'active') AS active_cnt,
+        SUM(status = 'closed') AS closed_cnt
+    FROM vacantes v
+    {where_sql}
+"""
+count_cache = st.session_state.setdefault("count_cache", {})
+cached_view = count_cache.get(filters_key)
+view_exact = cached_view is not None and cached_view[0] == db.db_token
+sql_view = cached_view[1] if cached_view is not None else None
 
 # layout principal: columna izquierda (4/5) y derecha (1/5)
 col_left, col_right = st.columns([4, 1], vertical_alignment="top")
@@ -416,19 +655,7 @@ with col_left:
             unsafe_allow_html=True,
         )
 
-    if sql_view:
-        st.markdown(
-            f"<div class='metrics-line'>Vista (filtros, DB): {sql_view[0] or 0} total • "
-            f"New {sql_view[1] or 0} • "
-            f"Active {sql_view[2] or 0} • "
-            f"Closed {sql_view[3] or 0}</div>",
-            unsafe_allow_html=True,
-        )
-    else:
-        st.markdown(
-            "<div class='metrics-line'>Vista (filtros, DB): 0 total • New 0 • Active 0 • Closed 0</div>",
-            unsafe_allow_html=True,
-        )
+    view_slot = st.empty()
     st.markdown("</div>", unsafe_allow_html=True)
 
 # ===== Gráfica en columna derecha =====
@@ -461,16 +688,19 @@ with col_right:
 with col_left:
     st.markdown("<div class='debug-frame'>", unsafe_allow_html=True)
     st.markdown("**Vacantes filtradas**")
-    table_total_rows = st.session_state.get("table_total_rows")
-    if table_total_rows is None:
-        st.caption(f"Mostrando {len(df_view)} vacantes (total no calculado) • score >= {score_min}")
-    else:
-        st.caption(f"Mostrando {table_total_rows} vacantes con score >= {score_min}")
+    total_slot = st.empty()
     st.markdown("</div>", unsafe_allow_html=True)
 
-total_rows = table_total_rows if table_total_rows is not None else None
-total_pages = max(1, (total_rows + page_size - 1) // page_size) if total_rows is not None else 1000
-page = st.sidebar.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1, key="page")
+page = len(page_cursors) + 1
+
+
+def _set_page_cursors(cursors):
+    st.session_state["page_cursors"] = cursors
+
+
+nav_prev, nav_next = st.sidebar.columns(2)
+nav_prev.button("◀ Anterior", on_click=_set_page_cursors, args=(page_cursors[:-1],), disabled=page == 1)
+nav_next.button("Siguiente ▶", on_click=_set_page_cursors, args=(page_cursors + [next_cursor],), disabled=next_cursor is None)
 start_idx = (page - 1) * page_size
 end_idx = start_idx + len(df_view)
 t_replace = time.perf_counter() if perf_mode else None
@@ -478,8 +708,35 @@ df_view = df_view.replace(r"\|", " ", regex=True)
 if perf_mode:
     perf["replace_regex_ms"] = int((time.perf_counter() - t_replace) * 1000)
 
-caption_total = total_rows if total_rows is not None else "?"
-st.caption(f"Página {page}/{total_pages} • filas {start_idx + 1}-{end_idx} de {caption_total}")
+page_slot = st.empty()
+
+
+def _render_view_totals(view_row, exact: bool):
+    """Llena las líneas de totales de la vista: exactas, o "~" con el último conteo de estos filtros."""
+    mark = "" if exact else "~"
+    if view_row:
+        view_slot.markdown(
+            f"<div class='metrics-line'>Vista (filtros, DB): {mark}{view_row[0] or 0} total • "
+            f"New {mark}{view_row[1] or 0} • "
+            f"Active {mark}{view_row[2] or 0} • "
+            f"Closed {mark}{view_row[3] or 0}</div>",
+            unsafe_allow_html=True,
+        )
+        total_txt = f"{mark}{view_row[0] or 0}"
+    else:
+        view_slot.markdown(
+            "<div class='metrics-line'>Vista (filtros, DB): calculando…</div>",
+            unsafe_allow_html=True,
+        )
+        total_txt = "?"
+    if exact:
+        total_slot.caption(f"Mostrando {total_txt} vacantes con score >= {score_min}")
+    else:
+        total_slot.caption(f"Mostrando {len(df_view)} vacantes (total {total_txt}, calculando exacto) • score >= {score_min}")
+    page_slot.caption(f"Página {page} • filas {start_idx + 1}-{end_idx} de {total_txt}")
+
+
+_render_view_totals(sql_view, view_exact)
 if AgGrid is None or GridOptionsBuilder is None or JsCode is None:
     st.error("AgGrid no está instalado. Instala con: `pip install streamlit-aggrid`")
     st.dataframe(df_view, use_container_width=True)
@@ -537,21 +794,17 @@ else:
     if perf_mode:
         perf["grid_render_ms"] = int((time.perf_counter() - t_render) * 1000)
 
-# --- Conteo total (lento, diferido) ---
-if st.session_state.get("table_total_rows") is None:
-    with st.spinner("Calculando total de vacantes..."):
-        try:
-            conn_count = _get_conn()
-            count_q = f"SELECT COUNT(*) FROM vacantes v {where_sql}"
-            t_count = time.perf_counter() if perf_mode else None
-            st.session_state["table_total_rows"] = conn_count.execute(count_q, params).fetchone()[0]
-            if perf_mode:
-                perf["count_total_ms"] = int((time.perf_counter() - t_count) * 1000)
-        finally:
-            try:
-                conn_count.close()
-            except Exception:
-                pass
+if not view_exact:
+    # Conteo exacto con la tabla ya en pantalla; queda cacheado por filtros + token de la DB
+    t_view = time.perf_counter() if perf_mode else None
+    sql_view = db.execute(view_q, params).fetchone()
+    if perf_mode:
+        perf["metrics_view_ms"] = int((time.perf_counter() - t_view) * 1000)
+    count_cache.pop(filters_key, None)
+    count_cache[filters_key] = (db.db_token, sql_view)
+    while len(count_cache) > 64:
+        count_cache.pop(next(iter(count_cache)))
+    _render_view_totals(sql_view, True)
 
 if perf_mode and perf:
     st.sidebar.subheader("Tiempos (ms)")
@@ -8,6 +8,8 @@ BASE_DIR=$(pwd)
 VENV="$BASE_DIR/.venvlinux/bin/python"
 DIST_DIR="$BASE_DIR/data/dist_$PROFILE"
 DB_FILE="$BASE_DIR/data/vacantes_$PROFILE.db"
+# Huella del último deploy exitoso (fuera de DIST_DIR para no publicarla)
+DEPLOY_MARKER="$BASE_DIR/data/.deployed_fingerprint_$PROFILE"
 
 # --- Cargar Variables de Entorno ---
 if [ -f "$BASE_DIR/.env-$PROFILE" ]; then
@@ -21,7 +23,18 @@ fi
 echo "📄 Step 1: Regenerating HTML report..."
 mkdir -p "$DIST_DIR"
 # Generamos el reporte con la lógica más reciente del script de Python
-"$VENV" exporter/html_report.py --db "$DB_FILE" --output "$DIST_DIR/report_$PROFILE.html"
+# --external-data: las vacantes van en report_$PROFILE.json.gz junto al HTML (se despliega todo DIST_DIR)
+# --assets external: librerías en DIST_DIR/assets con hash en el nombre (cache largo en el navegador)
+# Sale con 3 si las vacantes no cambiaron desde el último deploy exitoso: no hay nada que publicar
+"$VENV" exporter/html_report.py --db "$DB_FILE" --output "$DIST_DIR/report_$PROFILE.html" --external-data --assets external --deployed-marker "$DEPLOY_MARKER"
+REPORT_RC=$?
+if [ "$REPORT_RC" -eq 3 ]; then
+    echo "⏭️ Report unchanged, nothing to publish."
+    exit 0
+elif [ "$REPORT_RC" -ne 0 ]; then
+    echo "❌ Error: report generation failed ($REPORT_RC)."
+    exit "$REPORT_RC"
+fi
 
 if [ -z "$CLOUDFLARE_API_TOKEN" ]; then
     echo "❌ Error: CLOUDFLARE_API_TOKEN no configurada."
@@ -30,7 +43,11 @@ fi
 
 echo "☁️ Step 2: Publishing to Cloudflare Pages..."
 # npx --yes evita que pida confirmación para instalar wrangler
-CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-$PROFILE" --commit-dirty=true
+if ! CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-$PROFILE" --commit-dirty=true; then
+    echo "❌ Error: Cloudflare deploy failed; the next run will retry it."
+    exit 1
+fi
+"$VENV" exporter/html_report.py --output "$DIST_DIR/report_$PROFILE.html" --deployed-marker "$DEPLOY_MARKER" --mark-deployed
 
 REPORT_URL="https://chambas-$PROFILE.pages.dev/report_$PROFILE.html"
 
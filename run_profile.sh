@@ -33,6 +33,8 @@ DB_FILE="$BASE_DIR/data/vacantes_$PROFILE.db"
 DIST_DIR="$BASE_DIR/data/dist_$PROFILE"
 mkdir -p "$DIST_DIR"
 REPORT_FILE="$DIST_DIR/report_$PROFILE.html"
+# Huella del último deploy exitoso (fuera de DIST_DIR para no publicarla)
+DEPLOY_MARKER="$BASE_DIR/data/.deployed_fingerprint_$PROFILE"
 
 # 3. Check if config exists
 if [ ! -f "$CONFIG_FILE" ]; then
@@ -46,14 +48,34 @@ echo "🔎 Step 1: Scraping jobs with linkedin_public_mvp..."
 
 # 5. Generate HTML Report
 echo "📄 Step 2: Generating HTML report..."
-"$VENV" exporter/html_report.py --db "$DB_FILE" --output "$REPORT_FILE"
+# Sale con 3 si las vacantes exportadas no cambiaron (el reporte no se reescribe).
+# Con Cloudflare se compara contra el último deploy exitoso, no contra el archivo local.
+REPORT_ARGS=()
+if [ -n "$CLOUDFLARE_API_TOKEN" ]; then
+    REPORT_ARGS=(--deployed-marker "$DEPLOY_MARKER")
+fi
+"$VENV" exporter/html_report.py --db "$DB_FILE" --output "$REPORT_FILE" "${REPORT_ARGS[@]}"
+REPORT_RC=$?
+if [ "$REPORT_RC" -ne 0 ] && [ "$REPORT_RC" -ne 3 ]; then
+    # Sin reporte nuevo no se despliega DIST_DIR viejo ni se marca como desplegado
+    echo "❌ Error: report generation failed ($REPORT_RC)."
+    exit "$REPORT_RC"
+fi
 
 # 6. Cloudflare Pages Deployment
 if [ -n "$CLOUDFLARE_API_TOKEN" ]; then
-    echo "☁️ Step 3: Deploying to Cloudflare Pages..."
-    # npx --yes evita que pida confirmación para instalar wrangler en el NAS
-    CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-$PROFILE" --commit-dirty=true
-    
+    if [ "$REPORT_RC" -eq 3 ]; then
+        echo "⏭️ Step 3: Report unchanged, skipping Cloudflare deploy."
+    else
+        echo "☁️ Step 3: Deploying to Cloudflare Pages..."
+        # npx --yes evita que pida confirmación para instalar wrangler en el NAS
+        if CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-$PROFILE" --commit-dirty=true; then
+            "$VENV" exporter/html_report.py --output "$REPORT_FILE" --deployed-marker "$DEPLOY_MARKER" --mark-deployed
+        else
+            echo "⚠️ Cloudflare deploy failed; the next run will retry it."
+        fi
+    fi
+
     # URL directa al archivo
     REPORT_URL="https://chambas-$PROFILE.pages.dev/report_$PROFILE.html"
 fi
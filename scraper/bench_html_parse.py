@@ -0,0 +1,130 @@
+"""
+Benchmark de html_parse contra el parseo anterior con BeautifulSoup (html.parser
++ select/select_one) sobre HTML guardado.
+
+Por default usa las páginas de fixtures/linkedin/ (search_*.html, detail_*.html);
+con --http-cache usa además las respuestas reales guardadas en la cache HTTP del MVP.
+
+Uso (desde scraper/):
+    python bench_html_parse.py --repeat 20
+    python bench_html_parse.py --http-cache ../data/http_cache.db --limit 200
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import html_parse
+from html_parse import FIXTURES_DIR
+
+
+def legacy_search_cards(text):
+    """Implementación anterior de fetch_linkedin_public (solo la parte de parseo)."""
+    from bs4 import BeautifulSoup
+
+    cards = []
+    soup = BeautifulSoup(text, "html.parser")
+    for li in soup.select("li"):
+        card = li.select_one(".base-card")
+        if not card: continue
+        link_el = card.select_one("a.base-card__full-link")
+        title_el = card.select_one("h3.base-search-card__title")
+        company_el = card.select_one("h4.base-search-card__subtitle a")
+        location_el = card.select_one("span.job-search-card__location")
+        time_el = card.select_one("time")
+        cards.append({
+            "href": str(link_el.get("href")) if link_el and link_el.get("href") else "",
+            "title": title_el.get_text(strip=True) if title_el else None,
+            "company": company_el.get_text(strip=True) if company_el else None,
+            "location": location_el.get_text(strip=True) if location_el else None,
+            "datetime": str(time_el.get("datetime")) if time_el and time_el.get("datetime") else None,
+            "time_text": time_el.get_text(strip=True) if time_el else None,
+        })
+    return cards
+
+
+def legacy_detail(text):
+    """Implementación anterior de fetch_job_detail_description."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, "html.parser")
+    desc_el = soup.select_one(".show-more-less-html__markup") or soup.select_one(".description__text")
+    return desc_el.get_text(separator=" ", strip=True) if desc_el else ""
+
+
+def _load_fixtures(directory: Path) -> dict:
+    return {
+        "search": [p.read_text(encoding="utf-8") for p in sorted(directory.glob("search_*.html"))],
+        "detail": [p.read_text(encoding="utf-8") for p in sorted(directory.glob("detail_*.html"))],
+    }
+
+
+def _load_http_cache(db_path, limit) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        pages = {}
+        for url_class in ("search", "detail"):
+            rows = conn.execute(
+                "SELECT body FROM http_cache WHERE url_class = ? AND status = 200 ORDER BY last_access DESC LIMIT ?",
+                (url_class, limit),
+            ).fetchall()
+            pages[url_class] = [bytes(r[0]).decode("utf-8", errors="replace") for r in rows if r[0]]
+    finally:
+        conn.close()
+    return pages
+
+
+def _bench(label, fn, pages, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = [fn(p) for p in pages]
+    elapsed = (time.perf_counter() - t0) / (repeat * len(pages))
+    print(f"  {label:12s} {elapsed * 1000:8.2f} ms/página  ({1 / elapsed:8.0f} páginas/s)")
+    return result
+
+
+def _report_diffs(kind, legacy, new):
+    if kind == "detail":
+        # En el pipeline la descripción pasa por clean_text: solo cuentan los espacios colapsados
+        legacy = [" ".join(d.split()) for d in legacy]
+        new = [" ".join(d.split()) for d in new]
+    diffs = [(a, b) for a, b in zip(legacy, new) if a != b]
+    if kind == "search":
+        print(f"  cards: legacy={sum(map(len, legacy))} nuevo={sum(map(len, new))}  páginas con diferencias: {len(diffs)}")
+    else:
+        print(f"  páginas con diferencias: {len(diffs)}")
+    for a, b in diffs[:2]:
+        print(f"    old: {str(a)[:200]!r}\n    new: {str(b)[:200]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LinkedIn page parsing backends (ms per page).")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Directory with search_*.html / detail_*.html.")
+    parser.add_argument("--http-cache", type=str, help="http_cache.db to read saved responses from.")
+    parser.add_argument("--limit", type=int, default=200, help="Pages per class read from --http-cache.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=None, help=f"Default: the installed ones of {', '.join(html_parse.BACKENDS)}.")
+    args = parser.parse_args()
+
+    pages = _load_fixtures(args.fixtures)
+    if args.http_cache:
+        for kind, extra in _load_http_cache(args.http_cache, args.limit).items():
+            pages[kind].extend(extra)
+    backends = args.backends or html_parse.available_backends()
+    print(f"backends: {', '.join(backends)}")
+
+    legacy_fns = {"search": legacy_search_cards, "detail": legacy_detail}
+    for kind in ("search", "detail"):
+        if not pages[kind]:
+            continue
+        size_kb = sum(len(p) for p in pages[kind]) / len(pages[kind]) / 1024
+        print(f"\n{kind}: {len(pages[kind])} páginas (~{size_kb:.0f} KB c/u)")
+        legacy = _bench("legacy bs4", legacy_fns[kind], pages[kind], args.repeat)
+        for name in backends:
+            _, search, detail = html_parse.load_backend(name)
+            new = _bench(name, search if kind == "search" else detail, pages[kind], args.repeat)
+            _report_diffs(kind, legacy, new)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark de insert_vacantes: upsert ON CONFLICT vs. la implementación anterior (SELECT + split).
+
+Uso (desde scraper/):
+    python bench_insert_vacantes.py --rows 20000 --batch 500
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import db_vacantes
+from db_vacantes import (
+    calculate_hash, init_db, insert_vacantes, normalize_link, parse_date, set_db_path, transaction,
+)
+
+
+def insert_vacantes_legacy(vacs):
+    """Implementación anterior: SELECT ... IN + split en Python + UPDATE/INSERT por separado."""
+    NEW_TO_ACTIVE_DAYS = 5  # ajustable
+
+    if not vacs:
+        return 0
+
+    now = datetime.today().strftime("%Y-%m-%d")
+
+    for vac in vacs:
+        vac["link"] = normalize_link(vac.get("link"))
+        vac["job_hash"] = calculate_hash(vac.get("link"))
+
+    hashes = [vac["job_hash"] for vac in vacs]
+
+    # Lectura de existentes y escritura en la misma transacción
+    with transaction() as conn:
+        cursor = conn.cursor()
+
+        existing = {}
+        placeholders = ",".join(["?"] * len(hashes))
+        cursor.execute(
+            f"SELECT job_hash, scraped_at FROM vacantes WHERE job_hash IN ({placeholders})",
+            hashes,
+        )
+        for job_hash, scraped_at in cursor.fetchall():
+            existing[job_hash] = scraped_at
+
+        updates = []
+        inserts = []
+        queued = set()
+        for vac in vacs:
+            job_hash = vac["job_hash"]
+            # Un lote puede juntar varias búsquedas: la misma vacante solo se inserta una vez
+            if job_hash in queued:
+                continue
+            queued.add(job_hash)
+            if job_hash in existing:
+                first_seen_date = parse_date(existing[job_hash])
+                status = "active"
+                if first_seen_date is not None:
+                    status = "active" if (datetime.today().date() - first_seen_date).days > NEW_TO_ACTIVE_DAYS else "new"
+                updates.append((now, status, job_hash))
+                continue
+
+            vac = {
+                "scraped_at": now,
+                "last_seen_on": now,
+                "status": "new",
+                "reviewed_flag": 0,
+                **vac
+            }
+
+            inserts.append((
+                vac.get("job_hash"),
+                vac.get("qry_title"),
+                vac.get("qry_loc"),
+                vac.get("title"),
+                vac.get("company"),
+                vac.get("location"),
+                parse_date(vac.get("date")),
+                vac.get("date_text"),
+                vac.get("insights"),
+                vac.get("link"),
+                vac.get("tags"),
+                vac.get("job_description"),
+                vac.get("full_text"),
+                parse_date(vac.get("scraped_at")),
+                parse_date(vac.get("last_seen_on")),
+                parse_date(vac.get("updated_at")),
+                vac.get("status"),
+                parse_date(vac.get("processed_at")),
+                parse_date(vac.get("last_reviewed")),
+                vac.get("reviewed_flag", 0),
+                vac.get("modalidad_trabajo"),
+                vac.get("tipo_contrato"),
+                vac.get("salario_estimado"),
+                vac.get("applicants_count"),
+                vac.get("es_procurement"),
+                vac.get("es_fit_usuario"),
+                vac.get("nivel_estimado"),
+                vac.get("comentario_ai"),
+                vac.get("site_name")
+            ))
+
+        if updates:
+            cursor.executemany(
+                """
+                UPDATE vacantes
+                SET last_seen_on = ?,
+                    status = ?
+                WHERE job_hash = ?
+                """,
+                updates,
+            )
+
+        if inserts:
+            cursor.executemany(
+                """
+                INSERT INTO vacantes (
+                    job_hash, qry_title, qry_loc, title, company, location, date, date_text,
+                    insights, link, tags, job_description, full_text, scraped_at, last_seen_on, updated_at,
+                    status, processed_at, last_reviewed, reviewed_flag, modalidad_trabajo,
+                    tipo_contrato, salario_estimado, applicants_count, es_procurement,
+                    es_fit_usuario, nivel_estimado, comentario_ai, site_name
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                inserts,
+            )
+
+    return len(inserts)
+
+
+def _fake_vacs(n, seed):
+    return [
+        {
+            "site_name": "linkedin",
+            "qry_title": "Buyer Manager",
+            "qry_loc": "Monterrey, Mexico",
+            "title": f"Buyer {i}",
+            "company": f"Empresa {i % 300}",
+            "location": "Monterrey",
+            "link": f"https://mx.linkedin.com/jobs/view/{seed}-{i}?trk=bench",
+            "job_description": "desc " * 50,
+            "full_text": "desc " * 50,
+            "date": "2026-01-01",
+            "scraped_at": datetime.now().isoformat(),
+            "last_seen_on": datetime.now().date().isoformat(),
+            "modalidad_trabajo": "not remote",
+        }
+        for i in range(n)
+    ]
+
+
+def _run(fn, vacs, batch):
+    t0 = time.perf_counter()
+    inserted = 0
+    for i in range(0, len(vacs), batch):
+        inserted += fn(vacs[i:i + batch])
+    return inserted, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark insert_vacantes (rows/sec).")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    for name, fn in [("legacy", insert_vacantes_legacy), ("upsert", insert_vacantes)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            set_db_path(os.path.join(tmp, "bench.db"))
+            init_db()
+            vacs = _fake_vacs(args.rows, seed=name)
+            new, t_new = _run(fn, vacs, args.batch)
+            # Segunda pasada: todas existen, solo se refresca last_seen_on/status
+            seen, t_seen = _run(fn, _fake_vacs(args.rows, seed=name), args.batch)
+            db_vacantes.close_db()
+        print(
+            f"{name:7s} insert: {args.rows / t_new:10.0f} rows/s (new={new})   "
+            f"re-seen: {args.rows / t_seen:10.0f} rows/s (new={seen})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark del mapeo DataFrame de jobspy -> filas de vacantes: iterrows + dict por
+fila (implementación anterior, incluida la preparación de insert_vacantes) contra
+map_jobspy_frame por columnas. No toca la DB.
+
+Uso (desde scraper/):
+    python bench_map_jobspy.py --rows 5000
+"""
+import argparse
+import hashlib
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from db_vacantes import _VACANTE_COLS, _vacante_row, calculate_hash, normalize_link
+from run_scraper import MX, map_jobspy_frame
+from text_normalize import NO_DESCRIPTION, clean_texts
+
+
+def map_jobspy_row_legacy(row, qry_title, qry_loc, full_text):
+    """Implementación anterior de map_jobspy_row (un dict por fila desde la Series)."""
+    now_local = datetime.now(MX)
+    desc = row.get("description")
+    return {
+        "job_hash": calculate_hash(row["job_url"]),
+        "site_name": row["site"],
+        "qry_title": qry_title,
+        "qry_loc": qry_loc,
+        "qry_date": now_local.date().isoformat(),
+        "title": row.get("title"),
+        "company": row.get("company"),
+        "location": row.get("location"),
+        "link": row.get("job_url"),
+        "job_description": desc if isinstance(desc, str) else NO_DESCRIPTION,
+        "scraped_at": now_local.isoformat(),
+        "last_seen_on": now_local.date().isoformat(),
+        "date": row["date_posted"].isoformat() if isinstance(row.get("date_posted"), date) else None,
+        "full_text" : full_text,
+        "modalidad_trabajo": "remote" if(row.get("is_remote") is True or row.get("work_from_home_type") is True) else "not remote",
+        "tipo_contrato": row.get("job_type"),
+        "salario_estimado": f"{row.get('min_amount') or ''} to {row.get('max_amount') or ''} {row.get('currency') or ''} {row.get('interval') or ''}",
+        }
+
+
+def map_frame_legacy(jobs, qry_title, qry_loc):
+    """normalize_frame anterior + lo que insert_vacantes hacía antes del upsert."""
+    descs = jobs["description"] if "description" in jobs.columns else [None] * len(jobs)
+    full_texts = clean_texts(descs, missing=NO_DESCRIPTION)
+    vacs = [
+        map_jobspy_row_legacy(row, qry_title, qry_loc, full_text)
+        for (_, row), full_text in zip(jobs.iterrows(), full_texts)
+    ]
+    now = datetime.today().strftime("%Y-%m-%d")
+    rows = []
+    for vac in vacs:
+        vac["link"] = normalize_link(vac.get("link"))
+        vac["job_hash"] = hashlib.sha256(vac["link"].encode()).hexdigest()
+        rows.append(_vacante_row(vac, now))
+    return rows
+
+
+def _fake_frame(n, seed=23):
+    rnd = random.Random(seed)
+    sites = ["linkedin", "indeed", "glassdoor", "google"]
+    companies = ["Acme S.A. de C.V.", "Grupo Bimbo", "Ternium México", "Whirlpool", None]
+    rows = []
+    for i in range(n):
+        site = rnd.choice(sites)
+        url = (f"https://mx.linkedin.com/jobs/view/{4000000000 + i}?refId=abc{i}&trackingId=x"
+               if site == "linkedin" else f"https://mx.indeed.com/viewjob?jk={i:016x}&from=serp")
+        salary = rnd.random() < 0.3
+        rows.append({
+            "id": f"{site}-{i}", "site": site, "job_url": url, "job_url_direct": None,
+            "title": f"Comprador {i % 97}", "company": rnd.choice(companies), "location": "Monterrey, NL, MX",
+            "date_posted": date(2026, 10, 1) - timedelta(days=i % 30) if rnd.random() < 0.8 else None,
+            "job_type": rnd.choice(["fulltime", None]), "salary_source": None,
+            "interval": "monthly" if salary else None, "min_amount": 20000.0 + i if salary else None,
+            "max_amount": 30000.0 + i if salary else None, "currency": "MXN" if salary else None,
+            "is_remote": rnd.choice([True, False, None]), "job_level": None, "job_function": None,
+            "listing_type": None, "emails": None,
+            "description": f"**Puesto {i % 500}**\n\nCompras & abastecimiento " * 20 if rnd.random() < 0.9 else None,
+            "company_industry": None, "company_url": None, "company_logo": None,
+        })
+    return pd.DataFrame(rows)
+
+
+SALARY_IDX = _VACANTE_COLS.index("salario_estimado")
+
+
+def _comparable(row):
+    # Como queda en la DB: date se guarda como 'YYYY-MM-DD' y NaN como NULL
+    return tuple(
+        v.isoformat() if isinstance(v, date) else None if isinstance(v, float) and v != v else v
+        for v in row
+    )
+
+
+def _bench(label, fn, jobs, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(jobs, "Comprador Compras", "Monterrey, Nuevo León, México")
+    elapsed = (time.perf_counter() - t0) / repeat
+    print(f"{label:22s} {len(jobs) / elapsed:10.0f} rows/s  ({elapsed * 1000:.1f} ms por lote)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jobspy DataFrame -> vacantes row mapping (rows/sec).")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    jobs = _fake_frame(args.rows)
+    legacy = _bench("legacy iterrows", map_frame_legacy, jobs, args.repeat)
+    new = _bench("map_jobspy_frame", map_jobspy_frame, jobs, args.repeat)
+
+    # Antes un monto/moneda faltante (NaN) salía como "nan" en salario_estimado; ahora queda vacío
+    nan_salary = sum(1 for a, b in zip(legacy, new) if a[SALARY_IDX] != b[SALARY_IDX] and "nan" in a[SALARY_IDX])
+    diffs = [
+        (a, b) for a, b in zip(map(_comparable, legacy), new)
+        if a[:SALARY_IDX] + a[SALARY_IDX + 1:] != b[:SALARY_IDX] + b[SALARY_IDX + 1:]
+        or (a[SALARY_IDX] != b[SALARY_IDX] and "nan" not in a[SALARY_IDX])
+    ]
+    print(f"diferencias vs legacy: {len(diffs)} de {len(new)} (salario con 'nan' corregido: {nan_salary})")
+    for a, b in diffs[:3]:
+        print(f"  old: {a}\n  new: {b}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark de arranque de los entry points: tiempo en frío de `import <módulo>` en
+un proceso nuevo (lo que paga cada worker spawn/forkserver) y los imports más caros
+según `python -X importtime`.
+
+Uso (desde scraper/):
+    python bench_startup.py --runs 5
+    python bench_startup.py --modules run_scraper jobspy --top 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _python(args, **kw):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [HERE, os.environ.get("PYTHONPATH")]))}
+    # -B: sin escribir .pyc, para no mezclar la primera corrida con las demás
+    return subprocess.run([sys.executable, "-B", *args], cwd=HERE, env=env, capture_output=True, text=True, **kw)
+
+
+def cold_start_ms(module: str, runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = _python(["-c", f"import {module}"])
+        times.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} falló:\n{proc.stderr.strip()}")
+    return times
+
+
+def import_profile(module: str) -> list[tuple[int, int, str]]:
+    """[(self_us, cumulative_us, nombre)] de los imports de primer nivel que hace `module`."""
+    proc = _python(["-X", "importtime", "-c", f"import {module}"])
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Dos espacios de sangría por nivel: nivel 1 = imports directos del módulo
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return [(s, c, n) for d, s, c, n in rows if d <= 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time of the scraper entry points.")
+    parser.add_argument("--modules", nargs="+", default=["run_scraper", "linkedin_public_mvp"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    baseline = statistics.median(cold_start_ms("os", args.runs))
+    # Lo que ya carga el intérprete al arrancar (site, .pth) no cuenta contra el módulo
+    startup = {name for _, _, name in import_profile("os")}
+    print(f"{'import os':24s} {baseline:8.1f} ms  (intérprete en frío)")
+    for module in args.modules:
+        times = cold_start_ms(module, args.runs)
+        med = statistics.median(times)
+        print(f"{'import ' + module:24s} {med:8.1f} ms  (+{med - baseline:.1f} ms, min {min(times):.1f}, max {max(times):.1f})")
+        profile = sorted((r for r in import_profile(module) if r[2] not in startup), key=lambda r: r[1], reverse=True)
+        for self_us, cumulative_us, name in profile[:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
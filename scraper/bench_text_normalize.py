@@ -0,0 +1,90 @@
+"""
+Benchmark de text_normalize contra el clean_text anterior (BeautifulSoup por fila).
+
+Con --db usa las descripciones reales guardadas en vacantes.job_description;
+sin DB genera descripciones sintéticas (HTML de LinkedIn y markdown de jobspy).
+
+Uso (desde scraper/):
+    python bench_text_normalize.py --db ../data/vacantes_bil.db --limit 5000
+    python bench_text_normalize.py --rows 5000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from text_normalize import NO_DESCRIPTION, clean_text, clean_texts
+
+
+def clean_text_legacy(text):
+    """Implementación anterior: árbol completo de BeautifulSoup por descripción."""
+    from bs4 import BeautifulSoup
+
+    if not text:
+        return ""
+    soup = BeautifulSoup(text, "html.parser")
+    return " ".join(soup.get_text().split())
+
+
+def _load_descriptions(db_path, limit):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT job_description FROM vacantes WHERE job_description IS NOT NULL AND job_description != ? LIMIT ?",
+            (NO_DESCRIPTION, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+def _fake_descriptions(n, seed=7):
+    rnd = random.Random(seed)
+    words = "procurement buyer supplier negotiation SAP contracts logistics category sourcing México &amp; LATAM".split()
+    out = []
+
+    def text(k):
+        return " ".join(rnd.choice(words) for _ in range(k))
+
+    for i in range(n):
+        body = text(rnd.randint(150, 400))
+        if i % 2:
+            items = "".join(f"<li>{rnd.choice(words)} &nbsp;{rnd.choice(words)}</li>" for _ in range(8))
+            out.append(f"<div><p><strong>About</strong> {body}</p><ul>{items}</ul><br/><p>{text(40)}</p></div>")
+        else:
+            out.append(f"**About**\n\n{body}\n\n- {text(15)}\n- {text(15)}")
+    # Las mismas vacantes salen en varias búsquedas
+    return out + out[: n // 4]
+
+
+def _bench(label, fn, descs):
+    t0 = time.perf_counter()
+    result = fn(descs)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:28s} {len(descs) / elapsed:10.0f} rows/s  ({elapsed * 1000:.0f} ms)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text normalization (rows/sec).")
+    parser.add_argument("--db", type=str, help="vacantes DB to read real job_description values from.")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=4000, help="Synthetic descriptions when --db is not given.")
+    args = parser.parse_args()
+
+    descs = _load_descriptions(args.db, args.limit) if args.db else _fake_descriptions(args.rows)
+    with_markup = sum(1 for d in descs if "<" in d or "&" in d)
+    print(f"{len(descs)} descripciones ({with_markup} con marcado o entidades)")
+
+    legacy = _bench("legacy BeautifulSoup", lambda ds: [clean_text_legacy(d) for d in ds], descs)
+    _bench("clean_text (por fila)", lambda ds: [clean_text(d) for d in ds], descs)
+    batch = _bench("clean_texts (lote)", clean_texts, descs)
+
+    diffs = [(d, a, b) for d, a, b in zip(descs, legacy, batch) if a != b]
+    print(f"diferencias vs legacy: {len(diffs)}")
+    for d, a, b in diffs[:3]:
+        print(f"  in:  {d[:120]!r}\n  old: {a[:120]!r}\n  new: {b[:120]!r}")
+
+
+if __name__ == "__main__":
+    main()
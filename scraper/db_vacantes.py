@@ -1,24 +1,144 @@
 import sqlite3
 import hashlib
-from datetime import datetime
+import json
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
 import os
+import re
+import unicodedata
 
 DB_PATH = None
+_MANAGER = None
+# use_db(): managers por ruta y el que está activo en cada hilo
+_MANAGERS: dict = {}
+_MANAGERS_LOCK = threading.Lock()
+_scope = threading.local()
+
+
+class ConnectionManager:
+    """
+    Dueño de las conexiones a una DB: una conexión por hilo (y por proceso), abierta una vez.
+
+    Los PRAGMAs se aplican solo al abrir, y como la conexión vive toda la corrida
+    el cache de sentencias de sqlite3 (`cached_statements`) reutiliza las
+    sentencias preparadas entre llamadas.
+    """
+
+    def __init__(self, path, timeout: int | None = None, cached_statements: int = 256):
+        self.path = str(path)
+        self.timeout = timeout if timeout is not None else int(os.getenv("SQLITE_TIMEOUT", "60"))
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: list[sqlite3.Connection] = []
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, cached_statements=self.cached_statements)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA busy_timeout = 60000;")
+        with self._lock:
+            self._conns.append(conn)
+        return conn
+
+    def conn(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            # Proceso hijo tras fork: las conexiones heredadas no se deben usar
+            self._local = threading.local()
+            self._conns = []
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT (o ROLLBACK si hay excepción). Anidado se une a la externa."""
+        conn = self.conn()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Conexión de otro hilo: se cierra sola al terminar el proceso
+                pass
+        self._local = threading.local()
+
 
 def set_db_path(path: str):
-    global DB_PATH
+    global DB_PATH, _MANAGER
+    if _MANAGER is not None:
+        _MANAGER.close()
     DB_PATH = path
+    _MANAGER = ConnectionManager(path)
 
-def _get_conn():
-    if DB_PATH is None:
+@contextmanager
+def use_db(path):
+    """
+    Dentro del bloque, las funciones de este módulo usan `path` en el hilo actual
+    en lugar de la DB de set_db_path (varias DBs en un mismo proceso).
+    """
+    path = str(path)
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(path)
+        if manager is None:
+            manager = _MANAGERS[path] = ConnectionManager(path)
+    prev = getattr(_scope, "manager", None)
+    _scope.manager = manager
+    try:
+        yield manager
+    finally:
+        _scope.manager = prev
+
+def _get_manager() -> ConnectionManager:
+    manager = getattr(_scope, "manager", None)
+    if manager is not None:
+        return manager
+    if _MANAGER is None:
         raise RuntimeError("DB_PATH not set. Call set_db_path() first.")
-    timeout = int(os.getenv("SQLITE_TIMEOUT", "60"))
-    conn = sqlite3.connect(DB_PATH, timeout=timeout)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous = NORMAL;")
-    conn.execute("PRAGMA busy_timeout = 60000;")
-    return conn
+    return _MANAGER
+
+def _get_conn():
+    return _get_manager().conn()
+
+def transaction():
+    """Transacción sobre la conexión del hilo actual: `with transaction() as conn: ...`"""
+    return _get_manager().transaction()
+
+def close_db():
+    if _MANAGER is not None:
+        _MANAGER.close()
+    with _MANAGERS_LOCK:
+        managers = list(_MANAGERS.values())
+    for manager in managers:
+        manager.close()
+
+def _ensure_columns(cursor, table, columns):
+    """Agrega columnas nuevas a tablas ya existentes (CREATE IF NOT EXISTS no las migra)."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
 
 def init_db():
     conn = _get_conn()
@@ -57,9 +177,11 @@ def init_db():
             nivel_estimado TEXT,                      -- estimacion por IA del nivel de la vacante
             comentario_ai TEXT,                       -- Comentario generado por IA sobre la vacante
             score_total INTEGER,                     -- scoring de fit de la vacante
-            categoria_fit TEXT                          -- fit intuido en funccion del score. 
+            categoria_fit TEXT,                         -- fit intuido en funccion del score. 
+            company_id INTEGER REFERENCES companies(company_id)  -- empresa normalizada (ver normalize_company)
         )
     """)
+    _ensure_columns(cursor, "vacantes", {"company_id": "INTEGER REFERENCES companies(company_id)"})
 
     # Tabla de información ejecutiva por empresa
     cursor.execute("""
@@ -70,7 +192,18 @@ def init_db():
             tamaño_empresa TEXT,                     -- Tamaño (Small, Medium, Large)
             presencia_mexico TEXT,                   -- Presencia confirmada en México (Sí, No, Parcial)
             glassdoor_score REAL,                    -- Puntaje Glassdoor (si está disponible)
-            last_updated DATE                        -- Última fecha de actualización de esta info
+            last_updated DATE,                       -- Última fecha de actualización de esta info
+            company_id INTEGER                       -- companies.company_id (lo llena link_companies)
+        )
+    """)
+    _ensure_columns(cursor, "empresas", {"company_id": "INTEGER"})
+
+    # Dimensión de empresas: un id entero por nombre normalizado
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS companies (
+            company_id INTEGER PRIMARY KEY,
+            norm_name TEXT NOT NULL UNIQUE,          -- normalize_company(company)
+            display_name TEXT                        -- primer nombre visto, tal cual
         )
     """)
 
@@ -87,24 +220,328 @@ def init_db():
             duration_05_scoring INTEGER,
             total_duration INTEGER,
             total_jobs_db INTEGER,
-            total_companies_db INTEGER
+            total_companies_db INTEGER,
+            stage_metrics TEXT                       -- JSON: throughput y profundidad de colas por etapa
+        )
+    """)
+    _ensure_columns(cursor, "pipeline_runs", {"stage_metrics": "TEXT"})
+
+    # Checkpoints de la malla role × function × location (para reanudar corridas)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+            qry_title TEXT NOT NULL,
+            qry_loc TEXT NOT NULL,
+            page INTEGER NOT NULL DEFAULT 0,         -- página de resultados (0 si el scraper no pagina)
+            status TEXT NOT NULL,                    -- pending, done, failed
+            started_at TEXT,                         -- cuándo se empezó el último intento
+            updated_at TEXT,                         -- último cambio de estado
+            error TEXT,                              -- mensaje del último fallo
+            PRIMARY KEY (qry_title, qry_loc, page)
         )
     """)
 
     # Índices para acelerar filtros/orden del visor
     for stmt in [
-        "CREATE INDEX IF NOT EXISTS idx_vacantes_score_total ON vacantes(score_total)",
-        "CREATE INDEX IF NOT EXISTS idx_vacantes_status ON vacantes(status)",
+        # Paginación por cursor del visor: (columna de orden, job_hash)
+        "DROP INDEX IF EXISTS idx_vacantes_score_total",
+        "DROP INDEX IF EXISTS idx_vacantes_scraped_at",
+        # status tiene 3 valores: con su índice el planner filtra por status y ordena todo en un B-tree temporal
+        "DROP INDEX IF EXISTS idx_vacantes_status",
+        "CREATE INDEX IF NOT EXISTS idx_vacantes_score_hash ON vacantes(score_total, job_hash)",
+        "CREATE INDEX IF NOT EXISTS idx_vacantes_scraped_hash ON vacantes(scraped_at, job_hash)",
         "CREATE INDEX IF NOT EXISTS idx_vacantes_company ON vacantes(company)",
-        "CREATE INDEX IF NOT EXISTS idx_vacantes_scraped_at ON vacantes(scraped_at)",
         "CREATE INDEX IF NOT EXISTS idx_vacantes_date ON vacantes(date)",
         "CREATE INDEX IF NOT EXISTS idx_vacantes_last_seen_on ON vacantes(last_seen_on)",
+        "CREATE INDEX IF NOT EXISTS idx_vacantes_qry_close ON vacantes(qry_title, qry_loc, status, last_seen_on)",
         "CREATE INDEX IF NOT EXISTS idx_empresas_company ON empresas(company)",
+        "CREATE INDEX IF NOT EXISTS idx_vacantes_company_id ON vacantes(company_id)",
+        # Una fila de empresas por company_id: el visor hace LEFT JOIN sin duplicar vacantes
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_empresas_company_id ON empresas(company_id)",
     ]:
         cursor.execute(stmt)
 
+    _init_fts(cursor)
+    _init_daily_stats(cursor)
+
     conn.commit()
-    conn.close()
+
+    link_companies()
+
+# Columnas indexadas en vacantes_fts (el visor les da peso en bm25 en este orden)
+FTS_COLUMNS = ("title", "company", "location", "full_text")
+
+def _init_fts(cursor):
+    """
+    Índice FTS5 (external content) sobre vacantes, sincronizado con triggers.
+
+    Se indexa por el rowid implícito de vacantes (la PK es job_hash TEXT), que
+    VACUUM puede renumerar. vacantes_fts_map guarda qué job_hash tenía cada
+    rowid al indexarse; si ya no coincide con vacantes, se reconstruye el índice.
+    """
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS vacantes_fts USING fts5(
+                {cols},
+                content='vacantes',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: el visor cae al modo LIKE
+        print(f"⚠️ FTS5 no disponible ({e}); búsqueda de texto sin índice.")
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vacantes_fts_map (
+            id INTEGER PRIMARY KEY,                  -- rowid de vacantes al indexarse
+            job_hash TEXT NOT NULL
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_fts_ai AFTER INSERT ON vacantes BEGIN
+            INSERT INTO vacantes_fts(rowid, {cols}) VALUES (new.rowid, {new_cols});
+            INSERT OR REPLACE INTO vacantes_fts_map(id, job_hash) VALUES (new.rowid, new.job_hash);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_fts_ad AFTER DELETE ON vacantes BEGIN
+            INSERT INTO vacantes_fts(vacantes_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+            DELETE FROM vacantes_fts_map WHERE id = old.rowid;
+        END
+    """)
+    # Solo cuando cambia texto indexado: el upsert diario (last_seen_on/status) no lo dispara
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_fts_au AFTER UPDATE OF {cols} ON vacantes BEGIN
+            INSERT INTO vacantes_fts(vacantes_fts, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+            INSERT INTO vacantes_fts(rowid, {cols}) VALUES (new.rowid, {new_cols});
+        END
+    """)
+    if _fts_out_of_sync(cursor):
+        # Índice nuevo sobre una DB existente, o rowids renumerados (VACUUM)
+        print("🔁 [DB] Reconstruyendo vacantes_fts (rowids de vacantes cambiaron).")
+        _rebuild_fts(cursor)
+
+def _fts_out_of_sync(cursor) -> bool:
+    """True si algún rowid de vacantes no apunta al job_hash con el que se indexó."""
+    n_rows = cursor.execute("SELECT COUNT(*) FROM vacantes").fetchone()[0]
+    n_map = cursor.execute("SELECT COUNT(*) FROM vacantes_fts_map").fetchone()[0]
+    if n_rows != n_map:
+        return True
+    return cursor.execute("""
+        SELECT 1 FROM vacantes v
+        LEFT JOIN vacantes_fts_map m ON m.id = v.rowid
+        WHERE m.job_hash IS NOT v.job_hash
+        LIMIT 1
+    """).fetchone() is not None
+
+def _rebuild_fts(cursor):
+    cursor.execute("INSERT INTO vacantes_fts(vacantes_fts) VALUES ('rebuild')")
+    cursor.execute("DELETE FROM vacantes_fts_map")
+    cursor.execute("INSERT INTO vacantes_fts_map(id, job_hash) SELECT rowid, job_hash FROM vacantes")
+
+def rebuild_fts():
+    """Reconstruye vacantes_fts desde vacantes (tras VACUUM o si se desincroniza)."""
+    with transaction() as conn:
+        _rebuild_fts(conn)
+
+def _daily_stats_upsert(ref, sign=""):
+    """UPSERT que suma (sign='') o resta (sign='-') la fila `ref` (new/old) en vacantes_daily_stats."""
+    return f"""
+            INSERT INTO vacantes_daily_stats (day, status, n, n_scored, score_sum)
+            VALUES (
+                COALESCE(substr({ref}.scraped_at, 1, 10), ''),
+                COALESCE({ref}.status, ''),
+                {sign}1,
+                {sign}({ref}.score_total IS NOT NULL),
+                {sign}COALESCE({ref}.score_total, 0)
+            )
+            ON CONFLICT(day, status) DO UPDATE SET
+                n = n + excluded.n,
+                n_scored = n_scored + excluded.n_scored,
+                score_sum = score_sum + excluded.score_sum;"""
+
+def _init_daily_stats(cursor):
+    """
+    Resumen materializado por (día de scraped_at, status) para las métricas del visor.
+
+    Se mantiene con triggers, así que también refleja lo que escriben otras
+    etapas (scoring, cierre): el visor agrega cientos de filas en vez de
+    recorrer toda la tabla de vacantes.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vacantes_daily_stats'"
+    ).fetchone()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vacantes_daily_stats (
+            day TEXT NOT NULL,                       -- substr(scraped_at, 1, 10); '' si no hay fecha
+            status TEXT NOT NULL,                    -- status de la vacante; '' si es NULL
+            n INTEGER NOT NULL DEFAULT 0,            -- vacantes
+            n_scored INTEGER NOT NULL DEFAULT 0,     -- vacantes con score_total
+            score_sum REAL NOT NULL DEFAULT 0,       -- suma de score_total (para el promedio)
+            PRIMARY KEY (day, status)
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_stats_ai AFTER INSERT ON vacantes BEGIN
+            {_daily_stats_upsert("new")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_stats_ad AFTER DELETE ON vacantes BEGIN
+            {_daily_stats_upsert("old", "-")}
+        END
+    """)
+    # El upsert diario pone status aunque no cambie: el WHEN evita tocar el resumen en ese caso
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vacantes_stats_au AFTER UPDATE OF scraped_at, status, score_total ON vacantes
+        WHEN old.scraped_at IS NOT new.scraped_at
+          OR old.status IS NOT new.status
+          OR old.score_total IS NOT new.score_total
+        BEGIN
+            {_daily_stats_upsert("old", "-")}
+            {_daily_stats_upsert("new")}
+        END
+    """)
+    if not exists:
+        rebuild_daily_stats(cursor)
+
+def rebuild_daily_stats(cursor=None):
+    """Recalcula vacantes_daily_stats desde cero (DB existente o si se desincroniza)."""
+    sql_delete = "DELETE FROM vacantes_daily_stats"
+    sql_fill = """
+        INSERT INTO vacantes_daily_stats (day, status, n, n_scored, score_sum)
+        SELECT COALESCE(substr(scraped_at, 1, 10), ''), COALESCE(status, ''),
+               COUNT(*), COUNT(score_total), COALESCE(SUM(score_total), 0)
+        FROM vacantes
+        GROUP BY 1, 2
+    """
+    if cursor is not None:
+        cursor.execute(sql_delete)
+        cursor.execute(sql_fill)
+        return
+    with transaction() as conn:
+        conn.execute(sql_delete)
+        conn.execute(sql_fill)
+
+# Sufijos legales que no distinguen a una empresa (ya en minúsculas, sin puntos ni acentos)
+_COMPANY_SUFFIXES = sorted(
+    (tuple(s.split()) for s in (
+        "s de rl de cv", "s de rl", "sa de cv", "sab de cv", "sapi de cv", "sc", "ac",
+        "sa", "sab", "sapi", "sas", "sl", "srl", "spa", "ltda", "inc", "llc", "llp", "lp",
+        "ltd", "limited", "corp", "corporation", "co", "gmbh", "ag", "bv", "nv", "plc",
+    )),
+    key=len,
+    reverse=True,
+)
+_COMPANY_PUNCT_RE = re.compile(r"[^\w\s&]")
+
+@lru_cache(maxsize=8192)
+def normalize_company(name):
+    """
+    'Acme, S.A. de C.V.' -> 'acme'. Minúsculas, sin acentos ni puntuación,
+    espacios colapsados y sin sufijos legales al final. None si queda vacío.
+    """
+    if not isinstance(name, str) or not name:
+        return None  # None / NaN de pandas
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _COMPANY_PUNCT_RE.sub(" ", text.replace(".", ""))
+    words = text.split()
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _COMPANY_SUFFIXES:
+            # Nunca se quita el nombre completo ("CO" o "SA" a secas se quedan)
+            if len(words) > len(suffix) and tuple(words[-len(suffix):]) == suffix:
+                del words[-len(suffix):]
+                stripped = True
+                break
+    return " ".join(words) or None
+
+def _company_ids(conn, names):
+    """{nombre crudo: company_id}; da de alta en companies los nombres normalizados nuevos."""
+    norms = {}
+    for name in names:
+        if name and name not in norms:
+            norm = normalize_company(name)
+            if norm:
+                norms[name] = norm
+    if not norms:
+        return {}
+    first_seen = {}
+    for name, norm in norms.items():
+        first_seen.setdefault(norm, name)
+    conn.executemany(
+        "INSERT OR IGNORE INTO companies (norm_name, display_name) VALUES (?, ?)",
+        list(first_seen.items()),
+    )
+    ids = {}
+    uniq = list(first_seen)
+    for i in range(0, len(uniq), 900):
+        chunk = uniq[i:i + 900]
+        placeholders = ", ".join("?" for _ in chunk)
+        ids.update(conn.execute(
+            f"SELECT norm_name, company_id FROM companies WHERE norm_name IN ({placeholders})", chunk
+        ).fetchall())
+    return {name: ids[norm] for name, norm in norms.items() if norm in ids}
+
+def link_companies():
+    """
+    Asigna company_id a vacantes y empresas que aún no lo tienen (DBs viejas,
+    filas que escriben otras etapas). Solo toca filas con company_id NULL.
+    """
+    with transaction() as conn:
+        names = [r[0] for r in conn.execute(
+            "SELECT DISTINCT company FROM vacantes WHERE company_id IS NULL AND company IS NOT NULL"
+        )]
+        ids = _company_ids(conn, names)
+        conn.executemany(
+            "UPDATE vacantes SET company_id = ? WHERE company = ? AND company_id IS NULL",
+            [(cid, name) for name, cid in ids.items()],
+        )
+        names = [r[0] for r in conn.execute(
+            "SELECT company FROM empresas WHERE company_id IS NULL AND company IS NOT NULL"
+        )]
+        _link_empresas(conn, _company_ids(conn, names))
+
+def _link_empresas(conn, ids):
+    """
+    Liga filas de empresas a su company_id. Si varias normalizan a la misma
+    empresa (o ya había una ligada) se fusionan en una: por columna gana el
+    valor no nulo más reciente (last_updated), y las demás filas se borran.
+    """
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(empresas)") if r[1] not in ("company", "company_id")]
+    quoted = [f'"{c}"' for c in cols]
+    order = "ORDER BY last_updated IS NULL, last_updated DESC" if "last_updated" in cols else ""
+    by_id = {}
+    for name, cid in ids.items():
+        by_id.setdefault(cid, []).append(name)
+    for cid, names in by_id.items():
+        linked = conn.execute("SELECT company FROM empresas WHERE company_id = ?", (cid,)).fetchone()
+        group = names + ([linked[0]] if linked else [])
+        if len(group) == 1:
+            conn.execute("UPDATE empresas SET company_id = ? WHERE company = ?", (cid, group[0]))
+            continue
+        placeholders = ", ".join("?" for _ in group)
+        rows = conn.execute(
+            f"SELECT company, {', '.join(quoted)} FROM empresas WHERE company IN ({placeholders}) {order}",
+            group,
+        ).fetchall()
+        # La ya ligada se conserva; si no hay, la actualizada más recientemente
+        keeper = linked[0] if linked else rows[0][0]
+        merged = [next((r[i] for r in rows if r[i] is not None), None) for i in range(1, len(cols) + 1)]
+        dropped = [r[0] for r in rows if r[0] != keeper]
+        conn.executemany("DELETE FROM empresas WHERE company = ?", [(name,) for name in dropped])
+        conn.execute(
+            f"UPDATE empresas SET {', '.join(f'{c} = ?' for c in quoted)}, company_id = ? WHERE company = ?",
+            (*merged, cid, keeper),
+        )
+        print(f"🔗 [DB] empresas: {', '.join(repr(n) for n in dropped)} fusionada(s) en {keeper!r} (company_id {cid}).")
 
 def calculate_hash(link:str)->str:
     """Se genera un Hash por vacante que funge con el primary key de la base de datos. usamos el link del job para ello"""
@@ -145,12 +582,12 @@ def insert_vacante(vac):
         cursor.execute("""
             UPDATE vacantes
             SET last_seen_on = ?,
-            status = ?
+            status = ?,
+            company_id = COALESCE(company_id, ?)
             WHERE job_hash = ?
-        """, (now, status, vac["job_hash"]))
+        """, (now, status, _company_ids(conn, [vac.get("company")]).get(vac.get("company")), vac["job_hash"]))
         
         conn.commit()
-        conn.close()
         return 0
 
     else:
@@ -169,8 +606,8 @@ def insert_vacante(vac):
                 insights, link, tags, job_description, full_text, scraped_at, last_seen_on, updated_at,
                 status, processed_at, last_reviewed, reviewed_flag, modalidad_trabajo,
                 tipo_contrato, salario_estimado, applicants_count, es_procurement,
-                es_fit_usuario, nivel_estimado, comentario_ai,site_name
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,?)
+                es_fit_usuario, nivel_estimado, comentario_ai,site_name, company_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,?, ?)
         """, (
             vac.get("job_hash"),
             vac.get("qry_title"),
@@ -200,119 +637,225 @@ def insert_vacante(vac):
             vac.get("es_fit_usuario"),
             vac.get("nivel_estimado"),
             vac.get("comentario_ai"),
-            vac.get("site_name")
+            vac.get("site_name"),
+            _company_ids(conn, [vac.get("company")]).get(vac.get("company"))
         ))
         conn.commit()
-        conn.close()
         return 1
 
 
+NEW_TO_ACTIVE_DAYS = 5  # ajustable
+CLOSE_AFTER_DAYS = 3    # días sin verse antes de cerrar una vacante
+# Filas por INSERT multi-fila: sentencias más grandes tardan más en bindear que lo que ahorran
+UPSERT_CHUNK_ROWS = 50
+
+_VACANTE_COLS = (
+    "job_hash", "qry_title", "qry_loc", "title", "company", "location", "date", "date_text",
+    "insights", "link", "tags", "job_description", "full_text", "scraped_at", "last_seen_on", "updated_at",
+    "status", "processed_at", "last_reviewed", "reviewed_flag", "modalidad_trabajo",
+    "tipo_contrato", "salario_estimado", "applicants_count", "es_procurement",
+    "es_fit_usuario", "nivel_estimado", "comentario_ai", "site_name",
+)
+# upsert_vacante_rows agrega company_id (resuelto desde company) al final de cada tupla
+_UPSERT_COLS = _VACANTE_COLS + ("company_id",)
+_COMPANY_IDX = _VACANTE_COLS.index("company")
+
+def _vacante_row(vac, now):
+    """Dict de vacante -> tupla en el orden de _VACANTE_COLS (con defaults de alta)."""
+    vac = {
+        "scraped_at": now,
+        "last_seen_on": now,
+        "status": "new",
+        "reviewed_flag": 0,
+        **vac
+    }
+    return (
+        vac.get("job_hash"),
+        vac.get("qry_title"),
+        vac.get("qry_loc"),
+        vac.get("title"),
+        vac.get("company"),
+        vac.get("location"),
+        parse_date(vac.get("date")),
+        vac.get("date_text"),
+        vac.get("insights"),
+        vac.get("link"),
+        vac.get("tags"),
+        vac.get("job_description"),
+        vac.get("full_text"),
+        parse_date(vac.get("scraped_at")),
+        parse_date(vac.get("last_seen_on")),
+        parse_date(vac.get("updated_at")),
+        vac.get("status"),
+        parse_date(vac.get("processed_at")),
+        parse_date(vac.get("last_reviewed")),
+        vac.get("reviewed_flag", 0),
+        vac.get("modalidad_trabajo"),
+        vac.get("tipo_contrato"),
+        vac.get("salario_estimado"),
+        vac.get("applicants_count"),
+        vac.get("es_procurement"),
+        vac.get("es_fit_usuario"),
+        vac.get("nivel_estimado"),
+        vac.get("comentario_ai"),
+        vac.get("site_name")
+    )
+
+def vacante_rows(columns, n_rows, now):
+    """
+    Tuplas en el orden de _VACANTE_COLS a partir de columnas (la ruta por lote de los scrapers).
+
+    `columns` mapea nombre de columna -> lista con n_rows valores, o un escalar
+    que vale para todas las filas. Lo que no viene toma los defaults de alta de
+    _vacante_row. Las fechas van ya como texto 'YYYY-MM-DD' (no pasan por parse_date).
+    """
+    defaults = {"scraped_at": now, "last_seen_on": now, "status": "new", "reviewed_flag": 0}
+    cols = []
+    for name in _VACANTE_COLS:
+        value = columns.get(name, defaults.get(name))
+        cols.append(value if isinstance(value, (list, tuple)) else repeat(value, n_rows))
+    return list(zip(*cols))
+
+def link_hashes(links):
+    """normalize_link + job_hash (el de calculate_hash) para una columna de links: ([link], [job_hash])."""
+    norm = []
+    for link in links:
+        if not isinstance(link, str):
+            link = ""
+        # Sin "linkedin." en el texto no puede ser host de LinkedIn: normalize_link solo haría strip()
+        norm.append(normalize_link(link) if "linkedin." in link.lower() else link.strip())
+    return norm, [hashlib.sha256(link.encode()).hexdigest() for link in norm]
+
+def _max_host_params(conn):
+    try:
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    except AttributeError:
+        # Python < 3.11: límite conservador de SQLite antiguo
+        return 999
+
+# La vacante guardada no tiene una descripción útil (get_hashes_with_description la pide de nuevo)
+_MISSING_DESCRIPTION = """(vacantes.job_description IS NULL
+                OR TRIM(vacantes.job_description) = ''
+                OR vacantes.job_description = '[[NO DESCRIPTION RETURNED]]')"""
+
+@lru_cache(maxsize=8)
+def _upsert_sql(n_rows):
+    """
+    INSERT multi-fila con ON CONFLICT(job_hash). ?1 es la fecha de hoy.
+
+    Para las existentes se actualiza last_seen_on y el status (new/active
+    según los días desde scraped_at, o active si scraped_at no es una fecha);
+    company_id solo se llena si venía NULL, y job_description/full_text solo si
+    la guardada está vacía o es el marcador de sin descripción (así el detalle
+    que se vuelve a pedir para esas vacantes no se pierde).
+    """
+    n_cols = len(_UPSERT_COLS)
+    values = ",\n".join(
+        "(" + ", ".join(f"?{2 + r * n_cols + c}" for c in range(n_cols)) + ")"
+        for r in range(n_rows)
+    )
+    return f"""
+        INSERT INTO vacantes ({", ".join(_UPSERT_COLS)})
+        VALUES {values}
+        ON CONFLICT(job_hash) DO UPDATE SET
+            last_seen_on = ?1,
+            company_id = COALESCE(vacantes.company_id, excluded.company_id),
+            job_description = CASE WHEN {_MISSING_DESCRIPTION}
+                THEN excluded.job_description ELSE vacantes.job_description END,
+            full_text = CASE WHEN {_MISSING_DESCRIPTION}
+                THEN excluded.full_text ELSE vacantes.full_text END,
+            status = CASE
+                WHEN julianday(substr(vacantes.scraped_at, 1, 10)) IS NULL THEN 'active'
+                WHEN julianday(?1) - julianday(substr(vacantes.scraped_at, 1, 10)) > {NEW_TO_ACTIVE_DAYS} THEN 'active'
+                ELSE 'new'
+            END
+        RETURNING rowid
+    """
+
 def insert_vacantes(vacs):
-    NEW_TO_ACTIVE_DAYS = 5  # ajustable
+    """
+    Upsert por lotes: inserta las vacantes nuevas y refresca last_seen_on/status de las existentes.
 
+    Un solo INSERT ... ON CONFLICT por bloque (partido para no pasar el límite
+    de host parameters). Las filas insertadas se cuentan por RETURNING rowid:
+    las nuevas reciben un rowid mayor al máximo que había antes del INSERT.
+
+    Returns:
+        int: número de vacantes nuevas.
+    """
     if not vacs:
         return 0
 
     now = datetime.today().strftime("%Y-%m-%d")
 
+    rows = []
     for vac in vacs:
         vac["link"] = normalize_link(vac.get("link"))
-        vac["job_hash"] = calculate_hash(vac.get("link"))
-
-    hashes = [vac["job_hash"] for vac in vacs]
-
-    conn = _get_conn()
-    cursor = conn.cursor()
+        # El link ya va normalizado: mismo hash que calculate_hash sin volver a parsear la URL
+        vac["job_hash"] = hashlib.sha256(vac["link"].encode()).hexdigest()
+        rows.append(_vacante_row(vac, now))
 
-    existing = {}
-    placeholders = ",".join(["?"] * len(hashes))
-    cursor.execute(
-        f"SELECT job_hash, scraped_at FROM vacantes WHERE job_hash IN ({placeholders})",
-        hashes,
-    )
-    for job_hash, scraped_at in cursor.fetchall():
-        existing[job_hash] = scraped_at
-
-    updates = []
-    inserts = []
-    for vac in vacs:
-        job_hash = vac["job_hash"]
-        if job_hash in existing:
-            first_seen_date = parse_date(existing[job_hash])
-            status = "active"
-            if first_seen_date is not None:
-                status = "active" if (datetime.today().date() - first_seen_date).days > NEW_TO_ACTIVE_DAYS else "new"
-            updates.append((now, status, job_hash))
-            continue
-
-        vac = {
-            "scraped_at": now,
-            "last_seen_on": now,
-            "status": "new",
-            "reviewed_flag": 0,
-            **vac
-        }
+    return upsert_vacante_rows(rows, now)
 
-        inserts.append((
-            vac.get("job_hash"),
-            vac.get("qry_title"),
-            vac.get("qry_loc"),
-            vac.get("title"),
-            vac.get("company"),
-            vac.get("location"),
-            parse_date(vac.get("date")),
-            vac.get("date_text"),
-            vac.get("insights"),
-            vac.get("link"),
-            vac.get("tags"),
-            vac.get("job_description"),
-            vac.get("full_text"),
-            parse_date(vac.get("scraped_at")),
-            parse_date(vac.get("last_seen_on")),
-            parse_date(vac.get("updated_at")),
-            vac.get("status"),
-            parse_date(vac.get("processed_at")),
-            parse_date(vac.get("last_reviewed")),
-            vac.get("reviewed_flag", 0),
-            vac.get("modalidad_trabajo"),
-            vac.get("tipo_contrato"),
-            vac.get("salario_estimado"),
-            vac.get("applicants_count"),
-            vac.get("es_procurement"),
-            vac.get("es_fit_usuario"),
-            vac.get("nivel_estimado"),
-            vac.get("comentario_ai"),
-            vac.get("site_name")
-        ))
+def upsert_vacante_rows(rows, now=None):
+    """Upsert de tuplas ya armadas en el orden de _VACANTE_COLS. Devuelve cuántas fueron nuevas."""
+    if not rows:
+        return 0
+    now = now or datetime.today().strftime("%Y-%m-%d")
+
+    # Un lote puede juntar varias búsquedas: la misma vacante solo se inserta una vez
+    unique = {}
+    for row in rows:
+        unique.setdefault(row[0], row)
+    rows = list(unique.values())
+
+    inserted = 0
+    with transaction() as conn:
+        company_ids = _company_ids(conn, [row[_COMPANY_IDX] for row in rows])
+        rows = [tuple(row) + (company_ids.get(row[_COMPANY_IDX]),) for row in rows]
+        chunk_size = max(1, min(UPSERT_CHUNK_ROWS, (_max_host_params(conn) - 1) // len(_UPSERT_COLS)))
+        max_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM vacantes").fetchone()[0]
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            params = [now]
+            for row in chunk:
+                params.extend(row)
+            returned = conn.execute(_upsert_sql(len(chunk)), params).fetchall()
+            inserted += sum(1 for (rowid,) in returned if rowid > max_rowid)
+    return inserted
+
+
+def get_hashes_with_description(hashes):
+    """
+    Devuelve el subconjunto de `hashes` que ya existe en vacantes con una descripción útil.
 
-    if updates:
-        cursor.executemany(
-            """
-            UPDATE vacantes
-            SET last_seen_on = ?,
-                status = ?
-            WHERE job_hash = ?
-            """,
-            updates,
-        )
+    Sirve para no volver a bajar páginas de detalle de vacantes ya guardadas
+    (insert_vacantes conserva la descripción de un job_hash existente; solo
+    llena las que están vacías o con el marcador de sin descripción).
+    """
+    hashes = list(dict.fromkeys(h for h in hashes if h))
+    if not hashes:
+        return set()
 
-    if inserts:
-        cursor.executemany(
-            """
-            INSERT INTO vacantes (
-                job_hash, qry_title, qry_loc, title, company, location, date, date_text,
-                insights, link, tags, job_description, full_text, scraped_at, last_seen_on, updated_at,
-                status, processed_at, last_reviewed, reviewed_flag, modalidad_trabajo,
-                tipo_contrato, salario_estimado, applicants_count, es_procurement,
-                es_fit_usuario, nivel_estimado, comentario_ai, site_name
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    found = set()
+    conn = _get_conn()
+    cursor = conn.cursor()
+    # Lotes por debajo del límite de host parameters de SQLite
+    for i in range(0, len(hashes), 900):
+        chunk = hashes[i:i + 900]
+        placeholders = ",".join(["?"] * len(chunk))
+        cursor.execute(
+            f"""
+            SELECT job_hash FROM vacantes
+            WHERE job_hash IN ({placeholders})
+              AND job_description IS NOT NULL
+              AND TRIM(job_description) != ''
+              AND job_description != '[[NO DESCRIPTION RETURNED]]'
             """,
-            inserts,
+            chunk,
         )
-
-    conn.commit()
-    conn.close()
-    return len(inserts)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
 
 
 def get_vacante_by_id(vac_id):
@@ -321,20 +864,15 @@ def get_vacante_by_id(vac_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM vacantes WHERE job_hash = ?", (vac_id,))
     row = cursor.fetchone()
-    conn.close()
     return row
 
 def update_vacante_status(vac_id, status):
-    conn = _get_conn()
-
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE vacantes
-        SET status = ?, updated_at = datetime('now')
-        WHERE job_hash = ?
-    """, (status, vac_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE vacantes
+            SET status = ?, updated_at = datetime('now')
+            WHERE job_hash = ?
+        """, (status, vac_id))
 
 def normalize_link(link: str) -> str:
     if not link:
@@ -352,17 +890,64 @@ def normalize_link(link: str) -> str:
 
 
 
-def finalize_scrape_run ():
-    with _get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE vacantes
-            SET status = 'closed'
-            WHERE last_seen_on IS NOT NULL
-              AND DATE(last_seen_on) < DATE('now','-3 days')
-              AND status IN ('new','active')
-        """)
-        conn.commit()
+def finalize_scrape_run(covered, stale_days=CLOSE_AFTER_DAYS):
+    """
+    Cierra las vacantes new/active que no se han visto en `stale_days` días,
+    solo para los pares (qry_title, qry_loc) que esta corrida sí cubrió.
+
+    Las búsquedas saltadas (MAX_RUN_SECONDS, checkpoint, fallos) no tocan sus
+    vacantes. La comparación es directa contra last_seen_on (texto ISO) para
+    que use idx_vacantes_qry_close.
+
+    Devuelve {(qry_title, qry_loc): vacantes_cerradas} solo con los pares que cerraron algo.
+    """
+    cutoff = (datetime.today() - timedelta(days=stale_days)).strftime("%Y-%m-%d")
+    closed = {}
+    with transaction() as conn:
+        for qry_title, qry_loc in sorted(set(covered)):
+            n = conn.execute("""
+                UPDATE vacantes
+                SET status = 'closed'
+                WHERE qry_title = ? AND qry_loc = ?
+                  AND status IN ('new','active')
+                  AND last_seen_on < ?
+            """, (qry_title, qry_loc, cutoff)).rowcount
+            if n:
+                closed[(qry_title, qry_loc)] = n
+    return closed
+
+def get_done_checkpoints(fresh_hours):
+    """
+    Devuelve {(qry_title, qry_loc, page)} completados dentro de la ventana de frescura.
+
+    Los pending/failed (corrida matada, timeout, MAX_RUN_SECONDS) no se devuelven,
+    así que la siguiente corrida los vuelve a intentar.
+    """
+    if not fresh_hours or fresh_hours <= 0:
+        return set()
+    cutoff = (datetime.now() - timedelta(hours=fresh_hours)).isoformat(timespec="seconds")
+    rows = _get_conn().execute("""
+        SELECT qry_title, qry_loc, page
+        FROM scrape_checkpoints
+        WHERE status = 'done' AND updated_at >= ?
+    """, (cutoff,)).fetchall()
+    return {tuple(r) for r in rows}
+
+def mark_checkpoint(qry_title, qry_loc, pages, status, error=None):
+    """Registra el estado (pending/done/failed) de una o varias páginas de una búsqueda."""
+    if isinstance(pages, int):
+        pages = [pages]
+    now = datetime.now().isoformat(timespec="seconds")
+    with transaction() as conn:
+        conn.executemany("""
+            INSERT INTO scrape_checkpoints (qry_title, qry_loc, page, status, started_at, updated_at, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(qry_title, qry_loc, page) DO UPDATE SET
+                status = excluded.status,
+                started_at = CASE WHEN excluded.status = 'pending' THEN excluded.started_at ELSE started_at END,
+                updated_at = excluded.updated_at,
+                error = excluded.error
+        """, [(qry_title, qry_loc, page, status, now, now, error) for page in pages])
 
 def parse_date(value):
     if not value:
@@ -376,7 +961,7 @@ def parse_date(value):
             return None
     return None
 
-def log_scraper_run(start_time, new_jobs_found, duration):
+def log_scraper_run(start_time, new_jobs_found, duration, stage_metrics=None):
     """
     Inserta en la tabla pipeline_runs un registro de la ejecución del scraper.
 
@@ -384,15 +969,16 @@ def log_scraper_run(start_time, new_jobs_found, duration):
         start_time (datetime): timestamp de inicio de la corrida.
         new_jobs_found (int): número de vacantes nuevas encontradas.
         duration (int): duración en segundos del scraping.
+        stage_metrics (dict, opcional): métricas por etapa del ScrapePipeline.
     """
-    with _get_conn() as conn:
+    with transaction() as conn:
         cur = conn.cursor()
         cur.execute("""
-            INSERT INTO pipeline_runs (timestamp, new_jobs_found, duration_01_scraper)
-            VALUES (?, ?, ?)
+            INSERT INTO pipeline_runs (timestamp, new_jobs_found, duration_01_scraper, stage_metrics)
+            VALUES (?, ?, ?, ?)
         """, (
             start_time.isoformat(timespec='seconds'),
             new_jobs_found,
-            duration
+            duration,
+            json.dumps(stage_metrics) if stage_metrics else None,
         ))
-        conn.commit()
@@ -9,7 +9,19 @@ echo "🔎 Starting Scraping for BIL..."
 python scraper/linkedin_public_mvp.py --profile bil
 
 echo "📄 Generating HTML Report..."
-python exporter/html_report.py --db /app/data/vacantes_bil.db --output /app/data/report_bil.html
+# Sale con 3 si las vacantes no cambiaron desde el último deploy exitoso (o desde el
+# último reporte si no hay Cloudflare); con set -e hay que atraparlo aquí
+DEPLOY_MARKER="/app/data/.deployed_fingerprint_bil"
+REPORT_ARGS=()
+if [ -n "$CLOUDFLARE_API_TOKEN" ]; then
+    REPORT_ARGS=(--deployed-marker "$DEPLOY_MARKER")
+fi
+REPORT_CHANGED=1
+python exporter/html_report.py --db /app/data/vacantes_bil.db --output /app/data/report_bil.html "${REPORT_ARGS[@]}" || {
+    rc=$?
+    [ "$rc" -eq 3 ] || exit "$rc"
+    REPORT_CHANGED=0
+}
 
 if [ -n "$DISCORD_WEBHOOK_URL" ]; then
     NEW_JOBS=$(cat /tmp/new_jobs_count.txt || echo "0")
@@ -48,15 +60,20 @@ if [ -n "$DISCORD_WEBHOOK_URL" ]; then
 
     # 6. Cloudflare Pages Deployment inside Docker
     if [ -n "$CLOUDFLARE_API_TOKEN" ]; then
-        echo "☁️ Deploying to Cloudflare Pages..."
-        DIST_DIR="/app/data/dist_bil"
-        mkdir -p "$DIST_DIR"
-        # En docker lo guardamos directamente como report_bil.html
-        cp /app/data/report_bil.html "$DIST_DIR/report_bil.html"
-        
-        # Desplegar a Cloudflare
-        CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-bil" --commit-dirty=true
-        
+        if [ "$REPORT_CHANGED" -eq 0 ]; then
+            echo "⏭️ Report unchanged, skipping Cloudflare deploy."
+        else
+            echo "☁️ Deploying to Cloudflare Pages..."
+            DIST_DIR="/app/data/dist_bil"
+            mkdir -p "$DIST_DIR"
+            # En docker lo guardamos directamente como report_bil.html
+            cp /app/data/report_bil.html "$DIST_DIR/report_bil.html"
+
+            # Desplegar a Cloudflare (con set -e un fallo corta aquí y la huella no se guarda)
+            CLOUDFLARE_ACCOUNT_ID=$CLOUDFLARE_ACCOUNT_ID npx --yes wrangler pages deploy "$DIST_DIR" --project-name "chambas-bil" --commit-dirty=true
+            python exporter/html_report.py --output /app/data/report_bil.html --deployed-marker "$DEPLOY_MARKER" --mark-deployed
+        fi
+
         REPORT_URL="https://chambas-bil.pages.dev/report_bil.html"
     fi
 
@@ -0,0 +1,481 @@
+"""
+Extracción de los campos que usa el MVP desde el HTML de LinkedIn.
+
+`parse_search_cards` saca href, título, empresa, ubicación y fecha de cada
+`.base-card` de una página de resultados en una sola pasada (antes: árbol de
+BeautifulSoup + `select("li")` + seis `select_one` por card), y
+`parse_detail_description` el texto de la descripción de una página de detalle.
+
+Backends: uno de eventos sobre html.parser de la stdlib que no arma árbol (la
+referencia, comparada contra bs4), y selectolax (Lexbor, C) y lxml si están
+instalados. "auto" solo toma selectolax o lxml si al cargarlo da lo mismo que
+stdlib sobre fixtures/linkedin/; si no, se queda con stdlib. Se fuerza uno
+con LI_HTML_PARSER=selectolax|lxml|stdlib.
+Los tres devuelven lo mismo que el código con bs4 (get_text(strip=True)):
+pedazos de texto sin espacios en los extremos, sin script/style/template.
+"""
+import os
+import threading
+from html.parser import HTMLParser
+from pathlib import Path
+
+BACKENDS = ("selectolax", "lxml", "stdlib")
+
+# Páginas guardadas contra las que "auto" valida los backends (también las usa bench_html_parse.py)
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "linkedin"
+
+CARD_CLASS = "base-card"
+DESCRIPTION_CLASSES = ("show-more-less-html__markup", "description__text")
+
+# Igual que get_text() de bs4: el contenido de estos tags no es texto visible
+_SKIP_TAGS = frozenset({"script", "style", "template"})
+
+
+def _card(href=None, title=None, company=None, location=None, dt_attr=None, dt_text=None) -> dict:
+    return {"href": href or "", "title": title, "company": company, "location": location,
+            "datetime": dt_attr or None, "time_text": dt_text}
+
+
+# --- stdlib -------------------------------------------------------------------
+
+class _Capture:
+    """Texto de un elemento abierto; termina con el cierre de su mismo tag."""
+
+    __slots__ = ("field", "tag", "depth", "parts")
+
+    def __init__(self, field, tag, keep_text=True):
+        self.field = field
+        self.tag = tag
+        self.depth = 1
+        self.parts = [] if keep_text else None
+
+
+class _EventParser(HTMLParser):
+    """
+    Base de los extractores stdlib: lleva las capturas abiertas y junta el texto
+    entre eventos de tag en un solo nodo, igual que el tree builder de bs4.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+    def reset(self):
+        super().reset()
+        self._open: list[_Capture] = []
+        self._text: list[str] = []
+        self._skip = 0
+
+    def _flush_text(self):
+        if self._text:
+            text = "".join(self._text).strip()
+            self._text.clear()
+            if text and not self._skip:
+                for cap in self._open:
+                    if cap.parts is not None:
+                        cap.parts.append(text)
+
+    def _open_capture(self, field, tag, keep_text=True):
+        self._open.append(_Capture(field, tag, keep_text))
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        for cap in self._open:
+            if cap.tag == tag:
+                cap.depth += 1
+        self.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img/>: sin contenido, no cambian la profundidad de nada
+        self._flush_text()
+        self.start(tag, attrs, void=True)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        closed = []
+        for cap in self._open:
+            if cap.tag == tag:
+                cap.depth -= 1
+                if not cap.depth:
+                    closed.append(cap)
+        for cap in reversed(closed):
+            # Un finish() puede haber cerrado otras capturas (las de adentro del card)
+            if cap in self._open:
+                self._open.remove(cap)
+                self.finish(cap)
+        self.end(tag)
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self._text.append(data[6:])
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        # Lo que quedó sin cerrar al final del documento se cierra aquí (de adentro hacia afuera)
+        while self._open:
+            self.finish(self._open.pop())
+
+    # Hooks de las subclases
+    def start(self, tag, attrs, void=False):
+        pass
+
+    def end(self, tag):
+        pass
+
+    def finish(self, cap: _Capture):
+        pass
+
+
+def _classes(attrs) -> list[str]:
+    for name, value in attrs:
+        if name == "class" and value:
+            return value.split()
+    return []
+
+
+def _attr(attrs, key):
+    # html.parser/bs4 se quedan con el último valor si el atributo se repite
+    found = None
+    for name, value in attrs:
+        if name == key:
+            found = value
+    return found
+
+
+class _SearchCardParser(_EventParser):
+    # (campo, tag, clase que debe tener; None = cualquiera)
+    _FIELDS = (
+        ("href", "a", "base-card__full-link"),
+        ("title", "h3", "base-search-card__title"),
+        ("location", "span", "job-search-card__location"),
+        ("time", "time", None),
+    )
+
+    def reset(self):
+        super().reset()
+        self.cards: list[dict] = []
+        self._li = 0
+        self._card = None
+        self._subtitle = 0
+
+    def start(self, tag, attrs, void=False):
+        if tag == "li" and not void:
+            self._li += 1
+        classes = _classes(attrs) if attrs else []
+        card = self._card
+        if card is None:
+            if self._li and CARD_CLASS in classes and not void:
+                self._card = {"_found": set()}
+                self._open_capture("card", tag, keep_text=False)
+            return
+        found = card["_found"]
+        for field, field_tag, cls in self._FIELDS:
+            if tag == field_tag and field not in found and (cls is None or cls in classes):
+                found.add(field)
+                if field == "href":
+                    card["href"] = _attr(attrs, "href")
+                elif field == "time":
+                    card["datetime"] = _attr(attrs, "datetime")
+                    if void:
+                        card["time_text"] = ""
+                if not void and field != "href":
+                    self._open_capture(field, tag)
+        if tag == "h4" and not void and (self._subtitle or "base-search-card__subtitle" in classes):
+            self._subtitle += 1
+        elif tag == "a" and self._subtitle and "company" not in found and not void:
+            found.add("company")
+            self._open_capture("company", tag)
+
+    def end(self, tag):
+        if tag == "li" and self._li:
+            self._li -= 1
+        elif tag == "h4" and self._subtitle:
+            self._subtitle -= 1
+
+    def finish(self, cap):
+        card = self._card
+        if card is None:
+            return
+        if cap.field == "card":
+            # Lo que siga abierto adentro del card termina con él
+            while self._open:
+                self.finish(self._open.pop())
+            self.cards.append(_card(card.get("href"), card.get("title"), card.get("company"),
+                                    card.get("location"), card.get("datetime"), card.get("time_text")))
+            self._card = None
+            self._subtitle = 0
+        else:
+            card["time_text" if cap.field == "time" else cap.field] = "".join(cap.parts)
+
+
+class _DetailParser(_EventParser):
+    def reset(self):
+        super().reset()
+        self.found: dict[str, str] = {}
+        self._pending = set(DESCRIPTION_CLASSES)
+
+    def start(self, tag, attrs, void=False):
+        if not self._pending or void or not attrs:
+            return
+        for cls in _classes(attrs):
+            if cls in self._pending:
+                self._pending.discard(cls)
+                self._open_capture(cls, tag)
+
+    def finish(self, cap):
+        self.found[cap.field] = " ".join(cap.parts)
+
+
+_local = threading.local()
+
+
+def _stdlib_parser(cls):
+    # Un parser por hilo y por tipo (el detalle se parsea desde el pool de hilos)
+    key = cls.__name__
+    parser = getattr(_local, key, None)
+    if parser is None:
+        parser = cls()
+        setattr(_local, key, parser)
+    parser.reset()
+    return parser
+
+
+def _stdlib_search(html: str) -> list[dict]:
+    parser = _stdlib_parser(_SearchCardParser)
+    parser.feed(html)
+    parser.close()
+    return parser.cards
+
+
+def _stdlib_detail(html: str) -> str:
+    parser = _stdlib_parser(_DetailParser)
+    parser.feed(html)
+    parser.close()
+    for cls in DESCRIPTION_CLASSES:
+        if cls in parser.found:
+            return parser.found[cls]
+    return ""
+
+
+# --- lxml ---------------------------------------------------------------------
+
+def _xp_class(cls: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+_XP_TEXT = ".//text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+
+
+def _lxml_backend():
+    from lxml import etree, html as lxml_html
+
+    cards_xp = etree.XPath(f"//li//*[{_xp_class(CARD_CLASS)}]")
+    href_xp = etree.XPath(f"(.//a[{_xp_class('base-card__full-link')}])[1]/@href")
+    title_xp = etree.XPath(f"(.//h3[{_xp_class('base-search-card__title')}])[1]")
+    company_xp = etree.XPath(f"(.//h4[{_xp_class('base-search-card__subtitle')}]//a)[1]")
+    location_xp = etree.XPath(f"(.//span[{_xp_class('job-search-card__location')}])[1]")
+    time_xp = etree.XPath("(.//time)[1]")
+    text_xp = etree.XPath(_XP_TEXT)
+    desc_xps = [etree.XPath(f"(//*[{_xp_class(cls)}])[1]") for cls in DESCRIPTION_CLASSES]
+
+    def doc(html):
+        try:
+            return lxml_html.document_fromstring(html)
+        except (etree.ParserError, ValueError):
+            # Documento vacío, o str con declaración de encoding
+            return None
+
+    def text(el, sep=""):
+        return sep.join(s for s in (str(t).strip() for t in text_xp(el)) if s)
+
+    def first_text(xp, el):
+        found = xp(el)
+        return text(found[0]) if found else None
+
+    def search(html):
+        root = doc(html)
+        if root is None:
+            return []
+        cards = []
+        for el in cards_xp(root):
+            href = href_xp(el)
+            time_el = time_xp(el)
+            cards.append(_card(
+                str(href[0]) if href else None,
+                first_text(title_xp, el),
+                first_text(company_xp, el),
+                first_text(location_xp, el),
+                time_el[0].get("datetime") if time_el else None,
+                text(time_el[0]) if time_el else None,
+            ))
+        return cards
+
+    def detail(html):
+        root = doc(html)
+        if root is None:
+            return ""
+        for xp in desc_xps:
+            found = xp(root)
+            if found:
+                return text(found[0], " ")
+        return ""
+
+    return search, detail
+
+
+# --- selectolax ---------------------------------------------------------------
+
+def _selectolax_backend():
+    try:
+        from selectolax.lexbor import LexborHTMLParser as Parser
+    except ImportError:
+        from selectolax.parser import HTMLParser as Parser
+
+    def first_text(el, selector, sep=""):
+        found = el.css_first(selector)
+        return found.text(deep=True, separator=sep, strip=True) if found is not None else None
+
+    def tree(html):
+        tree = Parser(html)
+        tree.strip_tags(list(_SKIP_TAGS))
+        return tree
+
+    def search(html):
+        cards = []
+        for el in tree(html).css(f"li .{CARD_CLASS}"):
+            link = el.css_first("a.base-card__full-link")
+            time_el = el.css_first("time")
+            cards.append(_card(
+                link.attributes.get("href") if link is not None else None,
+                first_text(el, "h3.base-search-card__title"),
+                first_text(el, "h4.base-search-card__subtitle a"),
+                first_text(el, "span.job-search-card__location"),
+                time_el.attributes.get("datetime") if time_el is not None else None,
+                time_el.text(deep=True, strip=True) if time_el is not None else None,
+            ))
+        return cards
+
+    def detail(html):
+        root = tree(html)
+        for cls in DESCRIPTION_CLASSES:
+            found = first_text(root, f".{cls}", " ")
+            if found is not None:
+                return found
+        return ""
+
+    return search, detail
+
+
+# --- selección ----------------------------------------------------------------
+
+_LOADERS = {
+    "selectolax": _selectolax_backend,
+    "lxml": _lxml_backend,
+    "stdlib": lambda: (_stdlib_search, _stdlib_detail),
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def parity_mismatches(search, detail, fixtures_dir: Path = FIXTURES_DIR) -> list[str]:
+    """
+    Fixtures en los que `search`/`detail` no dan lo mismo que stdlib ([] si todo
+    cuadra). La descripción se compara con los espacios colapsados, como queda
+    tras clean_text. Sin fixtures no hay con qué validar: cuenta como diferencia.
+    """
+    pages = sorted(Path(fixtures_dir).glob("search_*.html")) + sorted(Path(fixtures_dir).glob("detail_*.html"))
+    if not pages:
+        return [f"sin fixtures en {fixtures_dir}"]
+    bad = []
+    for path in pages:
+        html = path.read_text(encoding="utf-8")
+        try:
+            if path.name.startswith("search_"):
+                same = search(html) == _stdlib_search(html)
+            else:
+                same = " ".join(detail(html).split()) == " ".join(_stdlib_detail(html).split())
+        except Exception:
+            same = False
+        if not same:
+            bad.append(path.name)
+    return bad
+
+
+def load_backend(name: str) -> tuple:
+    """
+    (nombre, search, detail) del backend pedido. "auto" toma el primero
+    instalado de selectolax/lxml que pase parity_mismatches; si ninguno, stdlib.
+    """
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        for candidate in BACKENDS[:-1]:
+            try:
+                search, detail = _LOADERS[candidate]()
+            except ImportError:
+                continue
+            bad = parity_mismatches(search, detail)
+            if not bad:
+                return (candidate, search, detail)
+            print(f"⚠️ [HTML] {candidate} no coincide con stdlib en {', '.join(bad)}; no se usa.", flush=True)
+        name = "stdlib"
+    if name not in _LOADERS:
+        raise ValueError(f"Backend HTML desconocido: {name!r} (opciones: auto, {', '.join(BACKENDS)})")
+    return (name, *_LOADERS[name]())
+
+
+def available_backends() -> list[str]:
+    out = []
+    for name in BACKENDS:
+        try:
+            _LOADERS[name]()
+        except ImportError:
+            continue
+        out.append(name)
+    return out
+
+
+def set_backend(name: str = None) -> str:
+    """Fija el backend (default: LI_HTML_PARSER o "auto") y devuelve su nombre."""
+    global _backend
+    with _backend_lock:
+        _backend = load_backend(name or os.getenv("LI_HTML_PARSER", "auto"))
+    return _backend[0]
+
+
+def _current() -> tuple:
+    if _backend is None:
+        set_backend()
+    return _backend
+
+
+def backend_name() -> str:
+    return _current()[0]
+
+
+def parse_search_cards(html: str) -> list[dict]:
+    """
+    Cards de una página de resultados: [{href, title, company, location,
+    datetime, time_text}] en orden. Un card sin un campo lo trae como None
+    (href como "").
+    """
+    if not html:
+        return []
+    return _current()[1](html)
+
+
+def parse_detail_description(html: str) -> str:
+    """Texto de la descripción de una página de detalle ("" si no la hay)."""
+    if not html:
+        return ""
+    return _current()[2](html)
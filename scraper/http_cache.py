@@ -0,0 +1,189 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, urlunparse, urlencode, parse_qsl
+
+# TTL por clase de URL (segundos): las búsquedas cambian seguido, el detalle casi nunca
+DEFAULT_TTLS = {
+    "search": 3 * 3600,
+    "detail": 14 * 24 * 3600,
+    "default": 24 * 3600,
+}
+
+
+def classify_url(url: str) -> str:
+    path = urlparse(url).path
+    if "seeMoreJobPostings" in path or "/search" in path:
+        return "search"
+    if "/jobs/view/" in path:
+        return "detail"
+    return "default"
+
+
+def cache_key(url: str, params: dict | None = None) -> str:
+    """Llave normalizada: host en minúsculas, sin fragmento, query + params ordenados."""
+    parsed = urlparse(url.strip())
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items())
+    norm = urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        parsed.path.rstrip("/") or "/",
+        "",
+        urlencode(sorted(query)),
+        "",
+    ))
+    return hashlib.sha256(norm.encode()).hexdigest()
+
+
+class CachedResponse:
+    """Respuesta servida desde cache; expone lo que usan los scrapers de requests.Response."""
+
+    def __init__(self, url: str, status_code: int, body: bytes, headers: dict):
+        self.url = url
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers
+        self.from_cache = True
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self):
+        return None
+
+
+class HttpCache:
+    """
+    Cache HTTP persistente en SQLite con TTL por clase de URL y desalojo LRU por tamaño.
+
+    Guarda ETag / Last-Modified para revalidar con peticiones condicionales
+    cuando la entrada ya expiró. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, path, max_bytes: int = 200 * 1024 * 1024, ttls: dict | None = None):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous = NORMAL;")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                url_class TEXT,
+                status INTEGER,
+                body BLOB,
+                headers TEXT,                 -- JSON con etag / last-modified
+                size INTEGER,
+                fetched_at REAL,              -- epoch de la última descarga o revalidación
+                last_access REAL              -- epoch del último uso (para LRU)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)")
+        self._conn.commit()
+
+    def lookup(self, url: str, params: dict | None = None):
+        """
+        Devuelve (key, respuesta, fresca, headers_condicionales).
+
+        Si no hay entrada, respuesta es None. Si la entrada expiró, fresca es
+        False y headers_condicionales trae If-None-Match / If-Modified-Since.
+        """
+        key = cache_key(url, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, body, headers, fetched_at, url_class FROM http_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return key, None, False, {}
+            status, body, headers_json, fetched_at, url_class = row
+            headers = json.loads(headers_json or "{}")
+            fresh = (time.time() - fetched_at) < self.ttls.get(url_class, self.ttls["default"])
+            if fresh:
+                self.hits += 1
+                self.bytes_saved += len(body or b"")
+                self._conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            else:
+                self.misses += 1
+
+        conditional = {}
+        if headers.get("etag"):
+            conditional["If-None-Match"] = headers["etag"]
+        if headers.get("last-modified"):
+            conditional["If-Modified-Since"] = headers["last-modified"]
+        return key, CachedResponse(url, status, body or b"", headers), fresh, conditional
+
+    def mark_revalidated(self, key: str, cached: CachedResponse):
+        """El servidor contestó 304: se renueva la entrada sin volver a bajar el cuerpo."""
+        now = time.time()
+        with self._lock:
+            # Se contó como miss en lookup; ahora sabemos que fue un acierto
+            self.misses -= 1
+            self.hits += 1
+            self.revalidated += 1
+            self.bytes_saved += len(cached.content)
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ?, last_access = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._conn.commit()
+
+    def store(self, key: str, url: str, resp):
+        if resp.status_code != 200:
+            return
+        body = resp.content or b""
+        headers = {
+            "etag": resp.headers.get("ETag"),
+            "last-modified": resp.headers.get("Last-Modified"),
+        }
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache
+                    (key, url, url_class, status, body, headers, size, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, url, classify_url(url), resp.status_code, body, json.dumps(headers), len(body), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM http_cache ORDER BY last_access ASC"):
+            victims.append((key,))
+            excess -= size or 0
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0.0
+        return (
+            f"hits={self.hits} misses={self.misses} ({ratio:.1f}% hit) "
+            f"revalidated_304={self.revalidated} bytes_saved={self.bytes_saved}"
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,55 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import requests
+
+
+class SessionPool:
+    """
+    Sesiones de requests compartidas entre llamadas: keep-alive y conexiones
+    TCP/TLS reutilizadas en vez de un handshake por petición.
+
+    requests.Session no es thread-safe, así que cada hilo toma una sesión del
+    pool mientras hace su petición y la devuelve al terminar. Si no hay libres
+    se crea otra; se conservan hasta `size` para la siguiente.
+    """
+
+    def __init__(self, size: int = 4):
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=max(1, size))
+        self._lock = threading.Lock()
+        self.created = 0
+        self.checkouts = 0
+
+    @contextmanager
+    def session(self, session: requests.Session | None = None):
+        """Usa `session` si se pasa una; si no, presta una del pool."""
+        if session is not None:
+            yield session
+            return
+        try:
+            # LIFO: la más reciente es la que más probablemente tiene conexiones vivas
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            pooled = requests.Session()
+            with self._lock:
+                self.created += 1
+        with self._lock:
+            self.checkouts += 1
+        try:
+            yield pooled
+        finally:
+            try:
+                self._idle.put_nowait(pooled)
+            except queue.Full:
+                pooled.close()
+
+    def report(self) -> str:
+        return f"sessions={self.created} checkouts={self.checkouts}"
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
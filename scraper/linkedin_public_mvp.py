@@ -1,65 +1,88 @@
 import os
 import time
 import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, date
 from pathlib import Path
 from urllib.parse import urlparse, urlunparse
 from typing import Optional, List
 
 import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-import yaml
 import zoneinfo
-import argparse
 
-from db_vacantes import insert_vacantes, calculate_hash, set_db_path, init_db
+from db_vacantes import close_db, insert_vacantes, calculate_hash, set_db_path, init_db, get_hashes_with_description, get_done_checkpoints, mark_checkpoint, log_scraper_run
+from rate_limit import TokenBucket, HostBreakers, CircuitOpenError, DecorrelatedJitter, parse_retry_after
+from http_pool import SessionPool
+from http_cache import HttpCache
+from pipeline import ScrapePipeline
+from text_normalize import NO_DESCRIPTION, clean_text, clean_texts
+import html_parse
+from run_config import find_data_dir, load_config, parse_args, resolve_paths
 
 # --- Configuración ---
-BASE_DIR = Path(__file__).resolve().parent
-candidates = [
-    BASE_DIR / "data",           # caso Docker
-    BASE_DIR.parent / "data",    # caso local
-]
+# Los argumentos, el YAML y los recursos de la corrida (cache HTTP, bucket de detalle)
+# se cargan en main() -> configure(); importar este módulo no tiene efectos.
+
+
+def configure(config: dict, data_dir: Path):
+    """Ajustes de la corrida (entorno > YAML > default) como globals del módulo; se llama desde main()."""
+    global LI_PAGES, LI_SLEEP_MIN, LI_SLEEP_MAX, REQUEST_TIMEOUT, FETCH_DETAIL, DETAIL_SLEEP_MIN
+    global DETAIL_SLEEP_MAX, WRITE_DB, CHECKPOINT_FRESH_HOURS, DETAIL_WORKERS, DETAIL_RATE
+    global MAX_PENDING_BATCHES, PIPELINE_QUEUE_SIZE, PIPELINE_PARSE_WORKERS, PIPELINE_WRITE_BATCH_ROWS
+    global PIPELINE_WRITE_FLUSH_S, HTTP_CACHE_ENABLED, HTTP_CACHE_PATH, HTTP_CACHE_MAX_MB, HTTP_CACHE_TTLS
+    global DETAIL_BUCKET, HTTP_CACHE, HTML_PARSER, RETRY_BASE_S, RETRY_CAP_S, DEFER_MAX_S, BREAKERS, SESSIONS
+    global MAX_DEFERRED_BATCHES
+
+    LI_PAGES = int(os.getenv("LI_PAGES", config.get("li_pages", 2)))
+    LI_SLEEP_MIN = int(os.getenv("LI_SLEEP_MIN", "3"))
+    LI_SLEEP_MAX = int(os.getenv("LI_SLEEP_MAX", "7"))
+    REQUEST_TIMEOUT = int(os.getenv("LI_TIMEOUT", "30"))
+    FETCH_DETAIL = os.getenv("LI_FETCH_DETAIL", "1") not in {"0", "false", "False"}
+    DETAIL_SLEEP_MIN = int(os.getenv("LI_DETAIL_SLEEP_MIN", "2"))
+    DETAIL_SLEEP_MAX = int(os.getenv("LI_DETAIL_SLEEP_MAX", "5"))
+    WRITE_DB = os.getenv("LI_WRITE_DB", "1") in {"1", "true", "True"}
+    # Páginas completadas hace menos de estas horas se saltan al reanudar (0 = desactivado)
+    CHECKPOINT_FRESH_HOURS = float(os.getenv("CHECKPOINT_FRESH_HOURS", config.get("checkpoint_fresh_hours", 20)))
+    # Detalle concurrente: misma tasa promedio que los sleeps secuenciales, pero con varias peticiones en vuelo
+    DETAIL_WORKERS = int(os.getenv("LI_DETAIL_WORKERS", "4"))
+    DETAIL_RATE = float(os.getenv("LI_DETAIL_RATE", 2 / (DETAIL_SLEEP_MIN + DETAIL_SLEEP_MAX)))
+    MAX_PENDING_BATCHES = int(os.getenv("LI_MAX_PENDING_BATCHES", "2"))
+    # Tope de búsquedas en vuelo mientras el host de detalle está en enfriamiento (la búsqueda sigue un rato)
+    MAX_DEFERRED_BATCHES = int(os.getenv("LI_MAX_DEFERRED_BATCHES", "20"))
+    # Pipeline parse/normalize -> writer (backpressure y tamaño de transacción)
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", config.get("pipeline_queue_size", 8)))
+    PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", config.get("pipeline_parse_workers", 1)))
+    PIPELINE_WRITE_BATCH_ROWS = int(os.getenv("PIPELINE_WRITE_BATCH_ROWS", config.get("pipeline_write_batch_rows", 500)))
+    PIPELINE_WRITE_FLUSH_S = float(os.getenv("PIPELINE_WRITE_FLUSH_S", config.get("pipeline_write_flush_s", 5)))
+    # Cache HTTP en disco (sobrevive a crashes / 429 a media corrida)
+    HTTP_CACHE_ENABLED = os.getenv("LI_HTTP_CACHE", "1") not in {"0", "false", "False"}
+    HTTP_CACHE_PATH = Path(os.getenv("LI_HTTP_CACHE_PATH", data_dir / "http_cache.db"))
+    HTTP_CACHE_MAX_MB = int(os.getenv("LI_HTTP_CACHE_MAX_MB", "200"))
+    HTTP_CACHE_TTLS = {
+        "search": int(os.getenv("LI_CACHE_TTL_SEARCH_S", 3 * 3600)),
+        "detail": int(os.getenv("LI_CACHE_TTL_DETAIL_S", 14 * 24 * 3600)),
+    }
+
+    # 429 / errores de red: breaker por host con enfriamiento (Retry-After si viene, si no
+    # decorrelated jitter entre base y cap) y reintentos cortos para errores transitorios
+    BREAKER_BASE_S = float(os.getenv("LI_BREAKER_BASE_S", "120"))
+    BREAKER_CAP_S = float(os.getenv("LI_BREAKER_CAP_S", "900"))
+    BREAKER_FAILURES = int(os.getenv("LI_BREAKER_FAILURES", "5"))
+    RETRY_BASE_S = float(os.getenv("LI_RETRY_BASE_S", "2"))
+    RETRY_CAP_S = float(os.getenv("LI_RETRY_CAP_S", "30"))
+    # Tiempo máximo esperando a que un host salga de enfriamiento antes de dejar su trabajo para otra corrida
+    DEFER_MAX_S = float(os.getenv("LI_DEFER_MAX_S", "3600"))
+
+    # Parser de páginas: auto = selectolax > lxml > stdlib según lo que esté instalado
+    HTML_PARSER = html_parse.set_backend(os.getenv("LI_HTML_PARSER", config.get("html_parser", "auto")))
+
+    # Bucket global compartido por todas las queries para las páginas de detalle
+    DETAIL_BUCKET = TokenBucket(rate=DETAIL_RATE, capacity=1)
+    BREAKERS = HostBreakers(base_s=BREAKER_BASE_S, cap_s=BREAKER_CAP_S, failure_threshold=BREAKER_FAILURES)
+    SESSIONS = SessionPool(size=DETAIL_WORKERS + 1)
+    HTTP_CACHE = HttpCache(HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024, ttls=HTTP_CACHE_TTLS) if HTTP_CACHE_ENABLED else None
 
-DATA_DIR = next((p for p in candidates if p.exists()), None)
-if DATA_DIR is None:
-    raise FileNotFoundError("No se encontró carpeta data en ninguna ruta candidata.")
-
-parser = argparse.ArgumentParser(description="Run the LinkedIn Public MVP job scraper.")
-parser.add_argument("--profile", type=str, help="Profile name.")
-parser.add_argument("--config", type=Path, help="Path to config.")
-parser.add_argument("--db", type=Path, help="Path to DB.")
-args = parser.parse_args()
-
-if args.profile:
-    CONFIG_PATH = DATA_DIR / f"config_{args.profile}.yaml"
-    DB_PATH = DATA_DIR / f"vacantes_{args.profile}.db"
-else:
-    CONFIG_PATH = args.config if args.config else DATA_DIR / "config_scraper.yaml"
-    DB_PATH = args.db if args.db else DATA_DIR / "vacantes.db"
-
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
-
-print(f"[MVP] DATA_DIR={DATA_DIR}")
-print(f"[MVP] DB_PATH={DB_PATH}")
-print(f"[MVP] CONFIG_PATH={CONFIG_PATH}")
-
-set_db_path(str(DB_PATH))
-
-roles = config["roles"]
-functions = config["functions"]
-locations = config["locations"]
-
-LI_PAGES = int(os.getenv("LI_PAGES", config.get("li_pages", 2)))
-LI_SLEEP_MIN = int(os.getenv("LI_SLEEP_MIN", "3"))
-LI_SLEEP_MAX = int(os.getenv("LI_SLEEP_MAX", "7"))
-REQUEST_TIMEOUT = int(os.getenv("LI_TIMEOUT", "30"))
-FETCH_DETAIL = os.getenv("LI_FETCH_DETAIL", "1") not in {"0", "false", "False"}
-DETAIL_SLEEP_MIN = int(os.getenv("LI_DETAIL_SLEEP_MIN", "2"))
-DETAIL_SLEEP_MAX = int(os.getenv("LI_DETAIL_SLEEP_MAX", "5"))
-WRITE_DB = os.getenv("LI_WRITE_DB", "1") in {"1", "true", "True"}
 
 USER_AGENTS = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -70,41 +93,85 @@ USER_AGENTS = [
 
 MX = zoneinfo.ZoneInfo("America/Monterrey")
 
+SEARCH_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+SEARCH_HOST = urlparse(SEARCH_URL).netloc
+
+# job_hash -> future del detalle ya encolado en esta corrida (la misma vacante sale en varias búsquedas)
+_detail_requested: dict[str, Future] = {}
+# job_hash -> monotonic de la primera vez que su detalle se reprogramó por el breaker
+_detail_deferred_since: dict[str, float] = {}
+
 def _get_random_ua():
     return random.choice(USER_AGENTS)
 
-def safe_request(url, params=None, method="GET", session=None):
-    """Realiza peticiones manejando el error 429 con esperas largas."""
-    if not session:
-        session = requests.Session()
-    
+def safe_request(url, params=None, method="GET", session=None, cache=None, limiter=None):
+    """Realiza peticiones con reintentos, backoff y circuit breaker por host.
+
+    Los GET pasan por el cache HTTP en disco: una entrada fresca se sirve sin
+    red y una expirada se revalida con ETag / Last-Modified si el servidor los dio.
+
+    Un 429 (o 503 con Retry-After) no duerme al proceso: abre el breaker del
+    host y lanza CircuitOpenError para que quien llama reprograme ese trabajo.
+    Mientras siga abierto, las peticiones a ese host fallan de inmediato con el
+    mismo error. Los errores de red se reintentan con decorrelated jitter.
+    """
+    if cache is None:
+        cache = HTTP_CACHE
+
     headers = {"User-Agent": _get_random_ua()}
-    
+
+    cache_key, cached = None, None
+    if cache is not None and method == "GET":
+        cache_key, cached, fresh, conditional = cache.lookup(url, params)
+        if cached is not None and fresh:
+            return cached
+        headers.update(conditional)
+
+    host = urlparse(url).netloc.lower()
+    breaker = BREAKERS.get(host)
+    backoff = DecorrelatedJitter(RETRY_BASE_S, RETRY_CAP_S)
     max_retries = 3
-    for attempt in range(max_retries):
-        try:
+    with SESSIONS.session(session) as session:
+        for attempt in range(max_retries):
+            breaker.before_request()
+            if limiter is not None:
+                limiter.acquire()
             print(f"   [HTTP] {method} {url} (Intento {attempt+1}/{max_retries})...", flush=True)
-            if method == "GET":
-                resp = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
-            else:
-                resp = session.post(url, json=params, headers=headers, timeout=REQUEST_TIMEOUT)
-            
-            if resp.status_code == 429:
-                wait_time = (attempt + 1) * 300 # 5, 10, 15 minutos
-                print(f"\n🛑 [ERROR 429] LinkedIn detectó tráfico de bot. Entrando en enfriamiento: {wait_time/60} min...", flush=True)
-                time.sleep(wait_time)
+            try:
+                if method == "GET":
+                    resp = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+                else:
+                    resp = session.post(url, json=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                breaker.record_failure()
+                if attempt == max_retries - 1:
+                    raise e
+                wait_s = backoff.next()
+                print(f"   [HTTP] {type(e).__name__} en {host}; reintento en {wait_s:.1f}s", flush=True)
+                time.sleep(wait_s)
                 continue
-            
+            except Exception:
+                # Cualquier otra falla cuenta igual: no debe dejar colgada la petición de prueba del breaker
+                breaker.record_failure()
+                raise
+
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429 or (resp.status_code == 503 and retry_after is not None):
+                cooldown = breaker.record_failure(retry_after, trip=True)
+                print(f"\n🛑 [ERROR {resp.status_code}] LinkedIn detectó tráfico de bot en {host}. "
+                      f"Enfriamiento de {cooldown:.0f}s (Retry-After={retry_after}); se reprograma su trabajo.", flush=True)
+                raise CircuitOpenError(host, cooldown)
+
+            # El host respondió: cualquier otro status cierra el breaker (los 4xx/5xx se lanzan como antes)
+            breaker.record_success()
+            if resp.status_code == 304 and cached is not None:
+                cache.mark_revalidated(cache_key, cached)
+                return cached
+
             resp.raise_for_status()
+            if cache_key is not None:
+                cache.store(cache_key, url, resp)
             return resp
-        except requests.exceptions.HTTPError as e:
-            if resp.status_code == 429:
-                continue
-            raise e
-        except Exception as e:
-            if attempt == max_retries - 1:
-                raise e
-            time.sleep(10)
     return None
 
 def _clean_url(url: str) -> str:
@@ -118,14 +185,11 @@ def _parse_date(text: Optional[str], dt_attr: Optional[str]) -> Optional[date]:
         except ValueError: return None
     return None
 
-def clean_text(text: str) -> str:
-    if not text: return ""
-    soup = BeautifulSoup(text, "html.parser")
-    return " ".join(soup.get_text().split())
-
-def map_mvp_row(row: dict, qry_title: str, qry_loc: str) -> dict:
+def map_mvp_row(row: dict, qry_title: str, qry_loc: str, full_text: Optional[str] = None) -> dict:
     now_local = datetime.now(MX)
     desc = row.get("description")
+    if full_text is None:
+        full_text = clean_text(desc) if isinstance(desc, str) else NO_DESCRIPTION
     posted = row.get("date_posted")
     return {
         "job_hash": calculate_hash(str(row.get("job_url") or "")),
@@ -137,63 +201,198 @@ def map_mvp_row(row: dict, qry_title: str, qry_loc: str) -> dict:
         "company": row.get("company"),
         "location": row.get("location"),
         "link": row.get("job_url"),
-        "job_description": desc if isinstance(desc, str) else "[[NO DESCRIPTION RETURNED]]",
+        "job_description": desc if isinstance(desc, str) else NO_DESCRIPTION,
         "scraped_at": now_local.isoformat(),
         "last_seen_on": now_local.date().isoformat(),
         "date": posted.isoformat() if isinstance(posted, date) else None,
-        "full_text": clean_text(desc) if isinstance(desc, str) else "[[NO DESCRIPTION RETURNED]]",
+        "full_text": full_text,
         "modalidad_trabajo": "remote" if (row.get("is_remote") is True or row.get("work_from_home_type") is True) else "not remote",
         "tipo_contrato": row.get("job_type"),
         "salario_estimado": f"{row.get('min_amount') or ''} to {row.get('max_amount') or ''} {row.get('currency') or ''} {row.get('interval') or ''}",
     }
 
-def fetch_linkedin_public(search_term: str, location: str, pages: int = 2) -> list[dict]:
+def fetch_linkedin_public(search_term: str, location: str, pages: int = 2, skip_pages: frozenset = frozenset()) -> tuple[list[dict], tuple]:
+    """
+    Cards de las páginas de resultados, y las páginas que quedaron pendientes
+    porque el host de búsqueda entró en enfriamiento (para reprogramarlas).
+    """
     results: list[dict] = []
-    base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+    deferred: list[int] = []
 
     for page in range(pages):
+        if page in skip_pages:
+            continue
+        if deferred:
+            # Breaker abierto: el resto de las páginas también se reprograma
+            deferred.append(page)
+            continue
         start = page * 25
         params = {"keywords": search_term, "location": location, "start": start}
-        
-        resp = safe_request(base_url, params=params)
-        if not resp: continue
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for li in soup.select("li"):
-            card = li.select_one(".base-card")
-            if not card: continue
-            link_el = card.select_one("a.base-card__full-link")
-            title_el = card.select_one("h3.base-search-card__title")
-            company_el = card.select_one("h4.base-search-card__subtitle a")
-            location_el = card.select_one("span.job-search-card__location")
-            time_el = card.select_one("time")
-
-            href = str(link_el.get("href")) if link_el and link_el.get("href") else ""
-            job_url = _clean_url(href) if href else ""
-            title = title_el.get_text(strip=True) if title_el else None
-            company = company_el.get_text(strip=True) if company_el else None
-            loc = location_el.get_text(strip=True) if location_el else None
-            dt_attr = str(time_el.get("datetime")) if time_el and time_el.get("datetime") else None
-            dt_text = time_el.get_text(strip=True) if time_el else None
+        try:
+            resp = safe_request(SEARCH_URL, params=params)
+        except CircuitOpenError as e:
+            print(f"   [MVP] {e}; se reprograma '{search_term}' en '{location}' desde la página {page}.", flush=True)
+            deferred.append(page)
+            continue
+        if not resp: continue
+        from_cache = getattr(resp, "from_cache", False)
 
+        for card in html_parse.parse_search_cards(resp.text):
+            href = card["href"]
             results.append({
-                "site": "linkedin_public", "job_url": job_url, "title": title, "company": company,
-                "location": loc, "date_posted": _parse_date(dt_text, dt_attr), "description": None,
+                "site": "linkedin_public", "job_url": _clean_url(href) if href else "", "title": card["title"],
+                "company": card["company"], "location": card["location"],
+                "date_posted": _parse_date(card["time_text"], card["datetime"]), "description": None,
                 "is_remote": None, "work_from_home_type": None, "job_type": None, "min_amount": None,
                 "max_amount": None, "currency": None, "interval": None,
             })
-        time.sleep(random.randint(LI_SLEEP_MIN, LI_SLEEP_MAX))
-    return results
+        if not from_cache:
+            time.sleep(random.randint(LI_SLEEP_MIN, LI_SLEEP_MAX))
+    return results, tuple(deferred)
 
-def fetch_job_detail_description(session: requests.Session, job_url: str) -> str:
+def fetch_job_detail_description(job_url: str, session: Optional[requests.Session] = None, limiter: Optional[TokenBucket] = None) -> str:
     if not job_url: return ""
-    resp = safe_request(job_url, session=session)
+    resp = safe_request(job_url, session=session, limiter=limiter)
     if not resp: return ""
-    soup = BeautifulSoup(resp.text, "html.parser")
-    desc_el = soup.select_one(".show-more-less-html__markup") or soup.select_one(".description__text")
-    return desc_el.get_text(separator=" ", strip=True) if desc_el else ""
+    return html_parse.parse_detail_description(resp.text)
+
+def _fetch_detail_limited(job_url: str) -> str:
+    """
+    Detalle desde el pool de hilos. Con el host de detalle en enfriamiento la
+    tarea termina de inmediato con CircuitOpenError (el hilo no se queda
+    dormido) y requeue_details() la vuelve a encolar cuando el breaker deja pasar.
+    """
+    # El bucket se consume solo si hay petición real (los aciertos de cache no cuentan)
+    return fetch_job_detail_description(job_url, limiter=DETAIL_BUCKET)
+
+def requeue_details(executor: ThreadPoolExecutor, rows: list[dict], futures: list) -> bool:
+    """
+    Reencola (en `futures`, en su lugar) el detalle que terminó en CircuitOpenError
+    en cuanto su host sale de enfriamiento; pasado DEFER_MAX_S desde la primera
+    vez la fila se queda sin descripción y la siguiente corrida la vuelve a pedir.
+
+    Devuelve True si ya terminó todo el detalle de la búsqueda.
+    """
+    ready = True
+    now = time.monotonic()
+    for i, fut in enumerate(futures):
+        if fut is None:
+            continue
+        if not fut.done():
+            ready = False
+            continue
+        exc = fut.exception()
+        if not isinstance(exc, CircuitOpenError):
+            continue
+        job_url = rows[i]["job_url"]
+        job_hash = calculate_hash(job_url)
+        current = _detail_requested.get(job_hash)
+        if current is not None and current is not fut:
+            # Otra búsqueda con la misma vacante ya lo reencoló
+            futures[i] = current
+            ready = False
+            continue
+        if now - _detail_deferred_since.setdefault(job_hash, now) > DEFER_MAX_S:
+            print(f"   [MVP] {exc}; se omite el detalle de {job_url}.", flush=True)
+            futures[i] = None
+            continue
+        ready = False
+        if BREAKERS.get(exc.host).retry_in() <= 0:
+            futures[i] = _detail_requested[job_hash] = executor.submit(_fetch_detail_limited, job_url)
+    return ready
+
+def wait_details(futures: list, timeout: float = 5.0):
+    """Espera a que avance el detalle de una búsqueda: algún future en vuelo o el enfriamiento de su host."""
+    running = [f for f in futures if f is not None and not f.done()]
+    if running:
+        wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        return
+    retry_in = [
+        BREAKERS.get(f.exception().host).retry_in()
+        for f in futures if f is not None and isinstance(f.exception(), CircuitOpenError)
+    ]
+    time.sleep(max(0.05, min(min(retry_in, default=0.0), timeout)))
+
+def submit_detail_fetches(executor: ThreadPoolExecutor, rows: list[dict], known_fn=get_hashes_with_description) -> list:
+    """
+    Encola el detalle de cada card en el pool; devuelve un future (o None) por fila.
+
+    Solo se pide el detalle de hashes no vistos: los que `known_fn` da como ya
+    guardados con descripción quedan en None (insert_vacantes únicamente
+    actualiza last_seen_on/status) y los ya encolados en esta corrida reciben
+    el mismo future, sin otra petición.
+    """
+    hashes = [calculate_hash(r["job_url"]) if r.get("job_url") else None for r in rows]
+    known = known_fn(hashes)
+    futures = []
+    new = 0
+    for r, job_hash in zip(rows, hashes):
+        if job_hash is None or job_hash in known:
+            futures.append(None)
+            continue
+        fut = _detail_requested.get(job_hash)
+        if fut is None:
+            fut = _detail_requested[job_hash] = executor.submit(_fetch_detail_limited, r["job_url"])
+            new += 1
+        futures.append(fut)
+    skipped = sum(1 for h in hashes if h) - new
+    if skipped:
+        print(f"   [MVP] {skipped}/{len(rows)} vacantes ya conocidas, se omite su detalle.", flush=True)
+    return futures
+
+def normalize_batch(key: tuple, rows: list[dict]) -> list[dict]:
+    """Etapa parse/normalize del pipeline: cards (con descripción) -> filas de vacantes."""
+    qry_title, location = key
+    full_texts = clean_texts((r.get("description") for r in rows), missing=NO_DESCRIPTION)
+    return [map_mvp_row(r, qry_title, location, full_text) for r, full_text in zip(rows, full_texts)]
+
+def _checkpoint_callback(qry_title: str, location: str, pages: tuple):
+    def on_done(ok: bool, error: Optional[str]):
+        if WRITE_DB and pages:
+            mark_checkpoint(qry_title, location, pages, "done" if ok else "failed", error)
+    return on_done
+
+def hand_off_batch(pipeline: ScrapePipeline, qry_title: str, location: str, rows: list[dict], futures: list, pages: tuple = ()):
+    """Espera los detalles de una búsqueda y pasa las filas al pipeline.
+
+    Las páginas que cubría la búsqueda se marcan done (o failed) cuando el
+    escritor confirma la transacción. Sin LI_FETCH_DETAIL las filas se escriben
+    igual, con el marcador de sin descripción (el upsert lo rellena después).
+    """
+    on_done = _checkpoint_callback(qry_title, location, pages)
+    try:
+        if not rows:
+            on_done(True, None)
+            return
+        for r, fut in zip(rows, futures):
+            if fut is not None:
+                r["description"] = fut.result()
+        pipeline.put((qry_title, location), rows, on_done)
+    except Exception as e:
+        print(f"\n⚠️ Error en búsqueda '{qry_title}' en '{location}': {e}. Saltando...")
+        on_done(False, f"{type(e).__name__}: {e}")
+
+def main(argv=None):
+    from tqdm import tqdm
+
+    args = parse_args("Run the LinkedIn Public MVP job scraper.", argv)
+    data_dir = find_data_dir()
+    config_path, db_path = resolve_paths(args, data_dir)
+    config = load_config(config_path)
+    configure(config, data_dir)
+
+    print(f"[MVP] DATA_DIR={data_dir}")
+    print(f"[MVP] DB_PATH={db_path}")
+    print(f"[MVP] CONFIG_PATH={config_path}")
+    print(f"[MVP] HTML_PARSER={HTML_PARSER}")
+
+    set_db_path(str(db_path))
+
+    roles = config["roles"]
+    functions = config["functions"]
+    locations = config["locations"]
 
-if __name__ == "__main__":
     start = datetime.now()
     print(f"\n[MVP] Started at {start.isoformat(sep=' ', timespec='seconds')}\n")
     init_db()
@@ -203,35 +402,125 @@ if __name__ == "__main__":
         country = loc.split(",")[-1].strip() if "," in loc else loc
         loc_country.append((loc, country))
 
-    total_inserted = 0
     total_loops = len(roles) * len(functions) * len(loc_country)
-    
-    with tqdm(total=total_loops, desc="Scraping LinkedIn public") as pbar:
+
+    # Búsquedas cuyo detalle sigue en vuelo: (qry_title, location, rows, futures, pages)
+    pending = deque()
+    # Búsquedas reprogramadas por el breaker del host de búsqueda: (qry_title, location, pages)
+    deferred = deque()
+    done_checkpoints = get_done_checkpoints(CHECKPOINT_FRESH_HOURS) if WRITE_DB else set()
+    if done_checkpoints:
+        print(f"[MVP] Resuming: {len(done_checkpoints)} pages completed in the last {CHECKPOINT_FRESH_HOURS}h will be skipped.")
+
+    pipeline = ScrapePipeline(
+        normalize_batch,
+        insert_vacantes if WRITE_DB else (lambda vacs: 0),
+        queue_size=PIPELINE_QUEUE_SIZE,
+        parse_workers=PIPELINE_PARSE_WORKERS,
+        write_batch_rows=PIPELINE_WRITE_BATCH_ROWS,
+        write_flush_s=PIPELINE_WRITE_FLUSH_S,
+    )
+
+    with tqdm(total=total_loops, desc="Scraping LinkedIn public") as pbar, \
+            ThreadPoolExecutor(max_workers=DETAIL_WORKERS, thread_name_prefix="li-detail") as executor:
+
+        def _drain(keep: int, final: bool = False):
+            """
+            Pasa al pipeline las búsquedas con el detalle terminado y espera mientras haya más de `keep` en vuelo.
+
+            Con un host en enfriamiento el tope sube a MAX_DEFERRED_BATCHES (la
+            búsqueda sigue mientras el detalle reprogramado espera), pero no desaparece.
+            """
+            while pending:
+                _, _, rows, futures, _ = pending[0]
+                if not requeue_details(executor, rows, futures):
+                    limit = max(keep, MAX_DEFERRED_BATCHES) if BREAKERS.any_open() else keep
+                    if not final and len(pending) <= limit:
+                        break
+                    wait_details(futures)
+                    continue
+                hand_off_batch(pipeline, *pending.popleft())
+                pbar.update(1)
+
+        def _search(qry_title: str, location: str, pages: tuple):
+            """Busca `pages` y encola su detalle; lo que el breaker deja pendiente va a `deferred`."""
+            skip_pages = frozenset(p for p in range(LI_PAGES) if p not in pages)
+            try:
+                rows, deferred_pages = fetch_linkedin_public(qry_title, location, pages=LI_PAGES, skip_pages=skip_pages)
+                futures = submit_detail_fetches(executor, rows) if FETCH_DETAIL else []
+                if deferred_pages:
+                    deferred.append((qry_title, location, deferred_pages))
+                    pbar.total += 1
+                    pbar.refresh()
+                done_pages = tuple(p for p in pages if p not in deferred_pages)
+                pending.append((qry_title, location, rows, futures, done_pages))
+            except Exception as e:
+                print(f"\n⚠️ Error en búsqueda '{qry_title}' en '{location}': {e}. Saltando...")
+                if WRITE_DB:
+                    mark_checkpoint(qry_title, location, pages, "failed", f"{type(e).__name__}: {e}")
+                pbar.update(1)
+
+            _drain(keep=MAX_PENDING_BATCHES)
+
         for role in roles:
             for function in functions:
                 for location, _ in loc_country:
                     qry_title = f"{role} {function}".strip()
+                    skip_pages = frozenset(p for p in range(LI_PAGES) if (qry_title, location, p) in done_checkpoints)
+                    pages = tuple(p for p in range(LI_PAGES) if p not in skip_pages)
+                    if not pages:
+                        print(f"\n[MVP] skip '{qry_title}' en '{location}' (checkpoint fresco)", flush=True)
+                        pbar.update(1)
+                        continue
+
                     print(f"\n🚀 [MVP] Iniciando búsqueda: '{qry_title}' en '{location}'...", flush=True)
-                    try:
-                        rows = fetch_linkedin_public(qry_title, location, pages=LI_PAGES)
-                        vacs = []
-                        if FETCH_DETAIL and rows:
-                            session = requests.Session()
-                            for r in rows:
-                                if r.get("job_url"):
-                                    r["description"] = fetch_job_detail_description(session, r["job_url"])
-                                    time.sleep(random.randint(DETAIL_SLEEP_MIN, DETAIL_SLEEP_MAX))
-                                vacs.append(map_mvp_row(r, qry_title, location))
-                        
-                        if WRITE_DB and vacs:
-                            inserted = insert_vacantes(vacs)
-                            total_inserted += inserted
-                    except Exception as e:
-                        print(f"\n⚠️ Error en búsqueda '{qry_title}' en '{location}': {e}. Saltando...")
-                    
-                    pbar.update(1)
+                    if WRITE_DB:
+                        # Queda 'pending' si el contenedor muere antes de escribir la búsqueda
+                        mark_checkpoint(qry_title, location, pages, "pending")
+                    _search(qry_title, location, pages)
+
+        # Páginas que el breaker dejó pendientes: se retoman cuando el host de búsqueda sale
+        # de enfriamiento. Mientras tanto el detalle y el pipeline siguen con lo que ya hay.
+        defer_deadline = time.monotonic() + DEFER_MAX_S
+        while deferred:
+            wait_s = BREAKERS.get(SEARCH_HOST).retry_in()
+            if wait_s > 0:
+                if time.monotonic() + wait_s > defer_deadline:
+                    break
+                _drain(keep=0)
+                time.sleep(min(wait_s, 5))
+                continue
+            qry_title, location, pages = deferred.popleft()
+            print(f"\n🔁 [MVP] Retomando búsqueda: '{qry_title}' en '{location}' (páginas {list(pages)})...", flush=True)
+            _search(qry_title, location, pages)
+
+        for qry_title, location, pages in deferred:
+            print(f"\n⚠️ [MVP] '{qry_title}' en '{location}' queda para la siguiente corrida (host en enfriamiento).")
+            if WRITE_DB:
+                mark_checkpoint(qry_title, location, pages, "failed", "circuit open")
+            pbar.update(1)
+
+        _drain(keep=0, final=True)
+
+    stage_metrics = pipeline.close()
+    total_inserted = pipeline.inserted
+    print(f"[MVP] Pipeline: {stage_metrics}")
+    if WRITE_DB:
+        log_scraper_run(start, total_inserted, int((datetime.now() - start).total_seconds()), stage_metrics)
 
     with open("/tmp/new_jobs_count.txt", "w") as f:
         f.write(str(total_inserted))
 
+    if HTTP_CACHE is not None:
+        print(f"[MVP] HTTP cache: {HTTP_CACHE.report()}")
+        HTTP_CACHE.close()
+    print(f"[MVP] HTTP: {SESSIONS.report()}; breakers: {BREAKERS.report()}")
+    SESSIONS.close()
+
+    close_db()
+
     print(f"\n[MVP] Finished. Duration: {int((datetime.now() - start).total_seconds())}s. New jobs: {total_inserted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+def _notify(on_done, key, ok: bool, error):
+    """Llama on_done sin dejar que una excepción (p. ej. "database is locked" al marcar
+    el checkpoint) mate el hilo: un hilo muerto deja put() y close() bloqueados."""
+    if not on_done:
+        return
+    try:
+        on_done(ok, error)
+    except Exception as e:
+        print(f"⚠️ [PIPELINE] Error en on_done de {key}: {type(e).__name__}: {e}", flush=True)
+
+
+class _StageStats:
+    def __init__(self):
+        self.items = 0
+        self.rows = 0
+        self.busy_s = 0.0
+        self.depth_samples = 0
+        self.depth_sum = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth: int):
+        self.depth_samples += 1
+        self.depth_sum += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "rows": self.rows,
+            "busy_s": round(self.busy_s, 3),
+            "rows_per_s": round(self.rows / self.busy_s, 1) if self.busy_s > 0 else None,
+            "queue_max": self.depth_max,
+            "queue_avg": round(self.depth_sum / self.depth_samples, 2) if self.depth_samples else 0,
+        }
+
+
+class ScrapePipeline:
+    """
+    Pipeline por etapas entre el scraping y la DB: fetch -> parse/normalize -> writer.
+
+    El productor (loop de búsquedas) llama `put(key, payload, on_done)`; si la cola
+    de parseo está llena, `put` bloquea (backpressure). Las filas normalizadas se
+    juntan en un solo hilo escritor que agrupa varias búsquedas por transacción.
+    `on_done(ok, error)` se llama desde el hilo escritor cuando las filas del
+    payload quedaron (o no) escritas en DB.
+
+    Args:
+        parse_fn: (key, payload) -> lista de filas: dicts para insert_vacantes o
+            tuplas para upsert_vacante_rows.
+        write_fn: lista de filas -> número de vacantes nuevas (una transacción).
+        queue_size: tamaño máximo de cada cola entre etapas.
+        parse_workers: hilos de la etapa de parseo.
+        write_batch_rows: filas a juntar antes de escribir.
+        write_flush_s: segundos máximos que una fila espera antes de escribirse.
+    """
+
+    def __init__(self, parse_fn, write_fn, queue_size: int = 8, parse_workers: int = 1,
+                 write_batch_rows: int = 500, write_flush_s: float = 5.0):
+        self._parse_fn = parse_fn
+        self._write_fn = write_fn
+        self._parse_q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._write_q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._write_batch_rows = max(1, write_batch_rows)
+        self._write_flush_s = write_flush_s
+        self.stats = {"fetch": _StageStats(), "parse": _StageStats(), "write": _StageStats()}
+        self.inserted = 0
+        self.transactions = 0
+        self._started_at = time.monotonic()
+        self._put_lock = threading.Lock()
+        self._parse_threads = [
+            threading.Thread(target=self._parse_loop, name=f"pipeline-parse-{i}", daemon=True)
+            for i in range(max(1, parse_workers))
+        ]
+        self._writer = threading.Thread(target=self._write_loop, name="pipeline-writer", daemon=True)
+        for t in self._parse_threads:
+            t.start()
+        self._writer.start()
+
+    def put(self, key, payload, on_done=None, rows: int | None = None):
+        with self._put_lock:
+            fetch = self.stats["fetch"]
+            fetch.items += 1
+            fetch.rows += rows if rows is not None else len(payload)
+            self.stats["parse"].sample_depth(self._parse_q.qsize())
+        self._parse_q.put((key, payload, on_done))
+
+    def _parse_loop(self):
+        stats = self.stats["parse"]
+        while True:
+            item = self._parse_q.get()
+            if item is _STOP:
+                break
+            key, payload, on_done = item
+            t0 = time.monotonic()
+            try:
+                vacs = self._parse_fn(key, payload)
+            except Exception as e:
+                print(f"⚠️ [PIPELINE] Error normalizando {key}: {type(e).__name__}: {e}", flush=True)
+                _notify(on_done, key, False, f"{type(e).__name__}: {e}")
+                continue
+            finally:
+                stats.busy_s += time.monotonic() - t0
+            stats.items += 1
+            stats.rows += len(vacs)
+            self.stats["write"].sample_depth(self._write_q.qsize())
+            self._write_q.put((key, vacs, on_done))
+
+    def _flush(self, pending: list):
+        if not pending:
+            return
+        stats = self.stats["write"]
+        vacs = [v for _, batch, _ in pending for v in batch]
+        t0 = time.monotonic()
+        ok, error = True, None
+        try:
+            if vacs:
+                self.inserted += self._write_fn(vacs)
+                self.transactions += 1
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+            print(f"⚠️ [PIPELINE] Error escribiendo {len(vacs)} filas: {error}", flush=True)
+        stats.busy_s += time.monotonic() - t0
+        stats.items += len(pending)
+        stats.rows += len(vacs)
+        for key, _, on_done in pending:
+            _notify(on_done, key, ok, error)
+        pending.clear()
+
+    def _write_loop(self):
+        pending: list = []
+        pending_rows = 0
+        first_at = None
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, self._write_flush_s - (time.monotonic() - first_at))
+            try:
+                item = self._write_q.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(pending)
+                pending_rows = 0
+                continue
+            if item is _STOP:
+                self._flush(pending)
+                break
+            if not pending:
+                first_at = time.monotonic()
+            pending.append(item)
+            pending_rows += len(item[1])
+            if pending_rows >= self._write_batch_rows:
+                self._flush(pending)
+                pending_rows = 0
+
+    def close(self) -> dict:
+        """Vacía las colas, espera a los hilos y devuelve las métricas por etapa."""
+        for _ in self._parse_threads:
+            self._parse_q.put(_STOP)
+        for t in self._parse_threads:
+            t.join()
+        self._write_q.put(_STOP)
+        self._writer.join()
+        return self.metrics()
+
+    def metrics(self) -> dict:
+        wall_s = time.monotonic() - self._started_at
+        stages = {name: stats.as_dict() for name, stats in self.stats.items()}
+        # El fetch corre en el productor: su throughput es contra el tiempo total
+        stages["fetch"]["busy_s"] = None
+        stages["fetch"]["rows_per_s"] = round(self.stats["fetch"].rows / wall_s, 1) if wall_s > 0 else None
+        return {
+            "wall_s": round(wall_s, 3),
+            "inserted": self.inserted,
+            "transactions": self.transactions,
+            **stages,
+        }
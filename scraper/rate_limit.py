@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Token bucket thread-safe para limitar la tasa de peticiones hacia un host.
+
+    Se comparte entre todos los hilos (y todas las queries) para que la tasa
+    promedio hacia LinkedIn sea la misma que con los sleeps secuenciales,
+    aunque haya varias peticiones en vuelo a la vez.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate debe ser > 0")
+        self.rate = rate              # tokens por segundo
+        self.capacity = capacity      # ráfaga máxima permitida
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Bloquea hasta que haya `tokens` disponibles y los consume."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_s = (tokens - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def parse_retry_after(value) -> float | None:
+    """Segundos de un header Retry-After (número o fecha HTTP); None si no viene o no se entiende."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class DecorrelatedJitter:
+    """Backoff exponencial con decorrelated jitter: espera = min(cap, uniform(base, anterior * 3)).
+
+    Con varios hilos (o varios contenedores) golpeando el mismo host, las
+    esperas no quedan sincronizadas como con 5/10/15 fijos.
+    """
+
+    def __init__(self, base: float, cap: float):
+        self.base = base
+        self.cap = cap
+        self._prev = base
+
+    def next(self) -> float:
+        self._prev = min(self.cap, random.uniform(self.base, self._prev * 3))
+        return self._prev
+
+    def reset(self):
+        self._prev = self.base
+
+
+class CircuitOpenError(Exception):
+    """El host está en enfriamiento: el trabajo se reprograma en vez de esperar aquí."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuito abierto para {host}, reintentar en {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Breaker de un host: closed -> open -> half-open -> closed.
+
+    Un 429 lo abre de inmediato (trip); los errores de red, después de
+    `failure_threshold` seguidos. Abierto no deja pasar peticiones hasta que
+    acaba el enfriamiento: lo que diga Retry-After si el servidor lo mandó, si no
+    decorrelated jitter que crece con cada apertura seguida. Luego deja pasar una
+    sola petición de prueba: si sale bien se cierra, si falla se vuelve a abrir.
+    """
+
+    # Espera sugerida a los demás mientras la petición de prueba está en vuelo
+    PROBE_WAIT_S = 1.0
+
+    def __init__(self, host: str, base_s: float = 120, cap_s: float = 900, failure_threshold: int = 5):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.trips = 0
+        self._backoff = DecorrelatedJitter(base_s, cap_s)
+        self._state = "closed"
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _retry_in(self, now: float) -> float:
+        if self._state == "open":
+            return max(0.0, self._open_until - now)
+        if self._state == "half-open" and self._probing:
+            return self.PROBE_WAIT_S
+        return 0.0
+
+    def retry_in(self) -> float:
+        """Segundos hasta que el breaker vuelva a dejar pasar una petición (0 = ya)."""
+        with self._lock:
+            return self._retry_in(time.monotonic())
+
+    def is_open(self) -> bool:
+        return self.retry_in() > 0
+
+    def before_request(self):
+        """Lanza CircuitOpenError si el host sigue en enfriamiento (o ya hay una prueba en vuelo)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open" and now >= self._open_until:
+                self._state = "half-open"
+                self._probing = False
+            if self._state == "closed":
+                return
+            if self._state == "half-open" and not self._probing:
+                self._probing = True
+                return
+            retry_in = self._retry_in(now)
+        raise CircuitOpenError(self.host, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._probing = False
+            self._backoff.reset()
+
+    def record_failure(self, retry_after: float | None = None, trip: bool = False) -> float:
+        """Cuenta una falla; si abre el breaker devuelve los segundos de enfriamiento (si no, 0)."""
+        with self._lock:
+            self._failures += 1
+            if not (trip or self._state == "half-open" or self._failures >= self.failure_threshold):
+                return 0.0
+            cooldown = retry_after if retry_after is not None else self._backoff.next()
+            self._state = "open"
+            self._open_until = time.monotonic() + cooldown
+            self._probing = False
+            self.trips += 1
+            return cooldown
+
+
+class HostBreakers:
+    """Un CircuitBreaker por host (netloc), creado la primera vez que se pide."""
+
+    def __init__(self, **breaker_kwargs):
+        self._kwargs = breaker_kwargs
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        host = host.lower()
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, **self._kwargs)
+            return breaker
+
+    def any_open(self) -> bool:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return any(b.is_open() for b in breakers)
+
+    def report(self) -> str:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return ", ".join(f"{b.host}: trips={b.trips} retry_in={b.retry_in():.0f}s" for b in breakers) or "sin peticiones"
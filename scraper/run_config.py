@@ -0,0 +1,47 @@
+"""
+Arranque común de los scrapers (run_scraper, linkedin_public_mvp, run_profiles):
+carpeta data, argumentos --profile/--config/--db, rutas de config y DB, y YAML.
+
+Sin imports pesados: los workers del pool de run_scraper reimportan ese módulo.
+"""
+import argparse
+from pathlib import Path
+
+# Carpeta donde están los scripts
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def find_data_dir() -> Path:
+    # Busca una carpeta "data" en los niveles relevantes
+    candidates = [
+        BASE_DIR / "data",           # caso Docker
+        BASE_DIR.parent / "data",    # caso local si hay carpeta "data" arriba
+    ]
+    data_dir = next((p for p in candidates if p.exists()), None)
+    if data_dir is None:
+        raise FileNotFoundError("No se encontró carpeta data en ninguna ruta candidata.")
+    return data_dir
+
+
+def parse_args(description: str, argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--profile", type=str, help="Profile name (e.g. 'bil'). If provided, automatically sets config and db paths.")
+    parser.add_argument("--config", type=Path, help="Path to the configuration YAML file.")
+    parser.add_argument("--db", type=Path, help="Path to the SQLite database file.")
+    return parser.parse_args(argv)
+
+
+def resolve_paths(args, data_dir: Path) -> tuple[Path, Path]:
+    """(CONFIG_PATH, DB_PATH) a partir de --profile o de --config / --db."""
+    if args.profile:
+        return data_dir / f"config_{args.profile}.yaml", data_dir / f"vacantes_{args.profile}.db"
+    config_path = args.config if args.config else data_dir / "config_scraper.yaml"
+    db_path = args.db if args.db else data_dir / "vacantes.db"
+    return config_path, db_path
+
+
+def load_config(config_path: Path) -> dict:
+    import yaml
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
@@ -0,0 +1,278 @@
+"""
+Scheduler multi-perfil: corre todos los perfiles (data/config_*.yaml) en un solo
+proceso sobre la capa de fetch del MVP, en vez de un contenedor por perfil.
+
+Cada página (query, ubicación, página) que piden varios perfiles se baja una
+sola vez, con el mismo ritmo de búsqueda, bucket de detalle, breakers y cache
+HTTP para todos, y sus filas se reparten a la DB de cada perfil que la necesita
+(vacantes_<perfil>.db; config_scraper.yaml es el default -> vacantes.db).
+Los checkpoints siguen siendo por perfil.
+
+Uso (desde la raíz):
+    python scraper/run_profiles.py
+    python scraper/run_profiles.py --profiles bil scraper --dry-run
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import linkedin_public_mvp as mvp
+from db_vacantes import close_db, get_done_checkpoints, get_hashes_with_description, init_db, insert_vacantes, log_scraper_run, mark_checkpoint, use_db
+from pipeline import ScrapePipeline
+from run_config import find_data_dir, load_config, resolve_paths
+
+# config_scraper.yaml no lleva sufijo en la DB (igual que el MVP sin --profile)
+DEFAULT_PROFILE = "scraper"
+
+
+class _Profile:
+    def __init__(self, name: str, config_path: Path, db_path: Path, config: dict):
+        self.name = name
+        self.config_path = config_path
+        self.db_path = db_path
+        self.config = config
+        # Mismo orden que configure(): entorno > YAML > default
+        self.pages = int(os.getenv("LI_PAGES", config.get("li_pages", 2)))
+        self.fresh_hours = float(os.getenv("CHECKPOINT_FRESH_HOURS", config.get("checkpoint_fresh_hours", 20)))
+        self.done_checkpoints: set = set()
+        self.wanted = 0
+        self.pipeline: ScrapePipeline | None = None
+
+    def queries(self):
+        for role in self.config["roles"]:
+            for function in self.config["functions"]:
+                for location in self.config["locations"]:
+                    yield f"{role} {function}".strip(), location
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run several scraper profiles against one shared LinkedIn fetch layer.")
+    parser.add_argument("--profiles", nargs="+", help="Profile names (default: every data/config_*.yaml).")
+    parser.add_argument("--dry-run", action="store_true", help="Print the deduplicated request plan and exit.")
+    return parser.parse_args(argv)
+
+
+def discover_profiles(data_dir: Path, names=None) -> list[_Profile]:
+    if not names:
+        names = sorted(p.stem[len("config_"):] for p in data_dir.glob("config_*.yaml"))
+    profiles = []
+    for name in dict.fromkeys(names):
+        args = SimpleNamespace(profile=None if name == DEFAULT_PROFILE else name, config=None, db=None)
+        config_path, db_path = resolve_paths(args, data_dir)
+        if not config_path.exists():
+            raise FileNotFoundError(f"No existe {config_path} para el perfil '{name}'.")
+        profiles.append(_Profile(name, config_path, db_path, load_config(config_path)))
+    return profiles
+
+
+def plan_requests(profiles: list[_Profile]) -> dict:
+    """
+    {(qry_title, location, page): [perfiles]} con cada página que al menos un
+    perfil necesita (sin checkpoint fresco en su DB), en el orden de sus configs.
+    """
+    plan: dict[tuple, list[_Profile]] = {}
+    for prof in profiles:
+        # Una query repetida en la config tampoco se pide dos veces
+        for qry_title, location in dict.fromkeys(prof.queries()):
+            for page in range(prof.pages):
+                key = (qry_title, location, page)
+                recipients = plan.setdefault(key, [])
+                prof.wanted += 1
+                if key not in prof.done_checkpoints:
+                    recipients.append(prof)
+    return {key: recipients for key, recipients in plan.items() if recipients}
+
+
+def _mark(profiles, qry_title: str, location: str, page: int, status: str, error=None):
+    if not mvp.WRITE_DB:
+        return
+    for prof in profiles:
+        with use_db(prof.db_path):
+            mark_checkpoint(qry_title, location, page, status, error)
+
+
+def _writer(db_path: Path):
+    """write_fn del pipeline de un perfil: el hilo escritor escribe en la DB de ese perfil."""
+    def write(vacs):
+        with use_db(db_path):
+            return insert_vacantes(vacs)
+    return write
+
+
+def _known_in_all(profiles):
+    """Hashes con descripción en todas las DBs destino (si falta en una, el detalle se pide)."""
+    def known(hashes):
+        found = None
+        for prof in profiles:
+            with use_db(prof.db_path):
+                have = get_hashes_with_description(hashes)
+            found = have if found is None else found & have
+        return found or set()
+    return known
+
+
+def hand_off_page(qry_title: str, location: str, page: int, rows: list[dict], futures: list, recipients: list):
+    """Espera los detalles de una página y pasa las mismas filas al pipeline de cada perfil destino."""
+    try:
+        for r, fut in zip(rows, futures):
+            if fut is not None:
+                r["description"] = fut.result()
+    except Exception as e:
+        print(f"\n⚠️ Error en búsqueda '{qry_title}' en '{location}' (página {page}): {e}. Saltando...")
+        _mark(recipients, qry_title, location, page, "failed", f"{type(e).__name__}: {e}")
+        return
+    for prof in recipients:
+        def on_done(ok: bool, error, prof=prof):
+            _mark([prof], qry_title, location, page, "done" if ok else "failed", error)
+        if rows:
+            prof.pipeline.put((qry_title, location), rows, on_done)
+        else:
+            on_done(True, None)
+
+
+def main(argv=None):
+    from tqdm import tqdm
+
+    args = parse_args(argv)
+    data_dir = find_data_dir()
+    profiles = discover_profiles(data_dir, args.profiles)
+    if not profiles:
+        raise FileNotFoundError(f"No hay config_*.yaml en {data_dir}.")
+    # La capa de fetch es una sola: sus ajustes salen del entorno; del YAML solo se toman los de cada perfil
+    mvp.configure({}, data_dir)
+
+    print(f"[SCHED] DATA_DIR={data_dir}")
+    for prof in profiles:
+        print(f"[SCHED] {prof.name}: CONFIG_PATH={prof.config_path} DB_PATH={prof.db_path}")
+    print(f"[SCHED] HTML_PARSER={mvp.HTML_PARSER}")
+
+    start = datetime.now()
+    print(f"\n[SCHED] Started at {start.isoformat(sep=' ', timespec='seconds')}\n")
+    for prof in profiles:
+        with use_db(prof.db_path):
+            init_db()
+            if mvp.WRITE_DB:
+                prof.done_checkpoints = get_done_checkpoints(prof.fresh_hours)
+
+    plan = plan_requests(profiles)
+    fanned_out = sum(len(recipients) for recipients in plan.values())
+    for prof in profiles:
+        needed = sum(1 for recipients in plan.values() if prof in recipients)
+        print(f"[SCHED] {prof.name}: {prof.wanted} páginas en su config, {prof.wanted - needed} con checkpoint fresco.")
+    print(f"[SCHED] Plan: {len(plan)} páginas únicas para {fanned_out} páginas pedidas por los perfiles "
+          f"({fanned_out - len(plan)} compartidas se piden una sola vez).")
+    if args.dry_run:
+        for (qry_title, location, page), recipients in plan.items():
+            print(f"  '{qry_title}' en '{location}' p{page} -> {', '.join(p.name for p in recipients)}")
+        close_db()
+        return
+
+    for prof in profiles:
+        prof.pipeline = ScrapePipeline(
+            mvp.normalize_batch,
+            _writer(prof.db_path) if mvp.WRITE_DB else (lambda vacs: 0),
+            queue_size=mvp.PIPELINE_QUEUE_SIZE,
+            parse_workers=mvp.PIPELINE_PARSE_WORKERS,
+            write_batch_rows=mvp.PIPELINE_WRITE_BATCH_ROWS,
+            write_flush_s=mvp.PIPELINE_WRITE_FLUSH_S,
+        )
+
+    # Páginas cuyo detalle sigue en vuelo: (qry_title, location, page, rows, futures, recipients)
+    pending = deque()
+    # Páginas reprogramadas por el breaker del host de búsqueda: ((qry_title, location, page), recipients)
+    deferred = deque()
+
+    with tqdm(total=len(plan), desc="Scraping LinkedIn public (profiles)") as pbar, \
+            ThreadPoolExecutor(max_workers=mvp.DETAIL_WORKERS, thread_name_prefix="li-detail") as executor:
+
+        def _drain(keep: int, final: bool = False):
+            # Igual que en el MVP: el detalle reprogramado se reencola y con un host en
+            # enfriamiento el tope de páginas en vuelo sube a MAX_DEFERRED_BATCHES
+            while pending:
+                _, _, _, rows, futures, _ = pending[0]
+                if not mvp.requeue_details(executor, rows, futures):
+                    limit = max(keep, mvp.MAX_DEFERRED_BATCHES) if mvp.BREAKERS.any_open() else keep
+                    if not final and len(pending) <= limit:
+                        break
+                    mvp.wait_details(futures)
+                    continue
+                hand_off_page(*pending.popleft())
+                pbar.update(1)
+
+        def _search(key: tuple, recipients: list):
+            qry_title, location, page = key
+            try:
+                rows, deferred_pages = mvp.fetch_linkedin_public(qry_title, location, pages=page + 1, skip_pages=frozenset(range(page)))
+                if deferred_pages:
+                    deferred.append((key, recipients))
+                else:
+                    futures = mvp.submit_detail_fetches(executor, rows, known_fn=_known_in_all(recipients)) if mvp.FETCH_DETAIL else []
+                    pending.append((qry_title, location, page, rows, futures, recipients))
+            except Exception as e:
+                print(f"\n⚠️ Error en búsqueda '{qry_title}' en '{location}' (página {page}): {e}. Saltando...")
+                _mark(recipients, qry_title, location, page, "failed", f"{type(e).__name__}: {e}")
+                pbar.update(1)
+
+            _drain(keep=mvp.MAX_PENDING_BATCHES)
+
+        for key, recipients in plan.items():
+            qry_title, location, page = key
+            print(f"\n🚀 [SCHED] '{qry_title}' en '{location}' p{page} -> {', '.join(p.name for p in recipients)}", flush=True)
+            # Queda 'pending' si el contenedor muere antes de escribir la página
+            _mark(recipients, qry_title, location, page, "pending")
+            _search(key, recipients)
+
+        defer_deadline = time.monotonic() + mvp.DEFER_MAX_S
+        while deferred:
+            wait_s = mvp.BREAKERS.get(mvp.SEARCH_HOST).retry_in()
+            if wait_s > 0:
+                if time.monotonic() + wait_s > defer_deadline:
+                    break
+                _drain(keep=0)
+                time.sleep(min(wait_s, 5))
+                continue
+            key, recipients = deferred.popleft()
+            print(f"\n🔁 [SCHED] Retomando '{key[0]}' en '{key[1]}' p{key[2]}...", flush=True)
+            _search(key, recipients)
+
+        for (qry_title, location, page), recipients in deferred:
+            print(f"\n⚠️ [SCHED] '{qry_title}' en '{location}' p{page} queda para la siguiente corrida (host en enfriamiento).")
+            _mark(recipients, qry_title, location, page, "failed", "circuit open")
+            pbar.update(1)
+
+        _drain(keep=0, final=True)
+
+    duration = int((datetime.now() - start).total_seconds())
+    total_inserted = 0
+    for prof in profiles:
+        stage_metrics = prof.pipeline.close()
+        total_inserted += prof.pipeline.inserted
+        print(f"[SCHED] {prof.name}: {prof.pipeline.inserted} nuevas. Pipeline: {stage_metrics}")
+        if mvp.WRITE_DB:
+            with use_db(prof.db_path):
+                log_scraper_run(start, prof.pipeline.inserted, duration, stage_metrics)
+        with open(f"/tmp/new_jobs_count_{prof.name}.txt", "w") as f:
+            f.write(str(prof.pipeline.inserted))
+
+    with open("/tmp/new_jobs_count.txt", "w") as f:
+        f.write(str(total_inserted))
+
+    if mvp.HTTP_CACHE is not None:
+        print(f"[SCHED] HTTP cache: {mvp.HTTP_CACHE.report()}")
+        mvp.HTTP_CACHE.close()
+    print(f"[SCHED] HTTP: {mvp.SESSIONS.report()}; breakers: {mvp.BREAKERS.report()}")
+    mvp.SESSIONS.close()
+
+    close_db()
+
+    print(f"\n[SCHED] Finished. Duration: {duration}s. New jobs: {total_inserted} "
+          f"({fanned_out - len(plan)} páginas ahorradas por perfiles compartidos)")
+
+
+if __name__ == "__main__":
+    main()
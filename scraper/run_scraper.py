@@ -1,142 +1,119 @@
-from jobspy import scrape_jobs
-import time, random, os, multiprocessing as mp
-import pandas as pd
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-from datetime import datetime, date
-from db_vacantes import insert_vacantes, calculate_hash, finalize_scrape_run, init_db, set_db_path,log_scraper_run
+import time, random, os, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from datetime import datetime
+from scrape_pool import ScrapePool
+from pipeline import ScrapePipeline
+from text_normalize import NO_DESCRIPTION, clean_texts
+from db_vacantes import close_db, upsert_vacante_rows, vacante_rows, link_hashes, finalize_scrape_run, init_db, set_db_path,log_scraper_run, get_done_checkpoints, mark_checkpoint
 import zoneinfo
-from pathlib import Path
-import yaml
+from run_config import find_data_dir, load_config, parse_args, resolve_paths
 
-import argparse
-# --- Configuración ---
-
-# 1. Punto de partida: carpeta donde está este script
-BASE_DIR = Path(__file__).resolve().parent
-
-# 2. Busca una carpeta llamada "data" o "l_data" en niveles relevantes
-candidates = [
-    BASE_DIR / "data",           # caso Docker
-    BASE_DIR.parent / "data",    # caso local si hay carpeta "data" arriba
-]
-
-DATA_DIR = next((p for p in candidates if p.exists()), None)
-if DATA_DIR is None:
-    raise FileNotFoundError("No se encontró carpeta data en ninguna ruta candidata.")
+# jobspy, pandas, tqdm y yaml se importan donde se usan. Los workers del pool
+# (forkserver/spawn) vuelven a importar este módulo para encontrar _scrape_site:
+# aquí arriba no debe haber nada pesado ni efectos (args, YAML, prints); eso vive en main().
 
-# Configuración de argumentos
-parser = argparse.ArgumentParser(description="Run the job scraper.")
-parser.add_argument("--profile", type=str, help="Profile name (e.g. 'bil'). If provided, automatically sets config and db paths.")
-parser.add_argument("--config", type=Path, help="Path to the configuration YAML file.")
-parser.add_argument("--db", type=Path, help="Path to the SQLite database file.")
-args = parser.parse_args()
-
-if args.profile:
-    CONFIG_PATH = DATA_DIR / f"config_{args.profile}.yaml"
-    DB_PATH = DATA_DIR / f"vacantes_{args.profile}.db"
-else:
-    CONFIG_PATH = args.config if args.config else DATA_DIR / "config_scraper.yaml"
-    DB_PATH = args.db if args.db else DATA_DIR / "vacantes.db"
-
-# 3. Rutas absolutas que siempre serán BASE/DATA/...
-# (Removed previous assignment to use the logic above)
+# --- Configuración ---
 
 MX = zoneinfo.ZoneInfo("America/Monterrey")
 
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
-
-print(f"[SCRAPER] DATA_DIR={DATA_DIR}")
-print(f"[SCRAPER] DB_PATH={DB_PATH}")
-print(f"[SCRAPER] CONFIG_PATH={CONFIG_PATH}")
-
-set_db_path(DB_PATH)
-
-roles = config["roles"]
-functions = config["functions"]
-locations = config["locations"]
-
-SCRAPE_TIMEOUT_S = int(os.getenv("SCRAPE_TIMEOUT_S", config.get("scrape_timeout_s", 900)))
-MAX_RUN_SECONDS = int(os.getenv("MAX_RUN_SECONDS", config.get("max_run_seconds", 6 * 3600)))
-LOOP_SLEEP_MIN_S = int(os.getenv("LOOP_SLEEP_MIN_S", config.get("loop_sleep_min_s", 1)))
-LOOP_SLEEP_MAX_S = int(os.getenv("LOOP_SLEEP_MAX_S", config.get("loop_sleep_max_s", 2)))
-
-def _scrape_worker(result_q, job_title, job_location, job_country, sites, linkedin_fetch_description):
-    try:
-        jobs = scrape_jobs(
-            site_name=sites,
-            search_term=job_title,
-            google_search_term=f"{job_title} jobs in {job_location}",
-            location=job_location,
-            results_wanted=30,
-            country_indeed=job_country,
-            verbose=0,
-            linkedin_fetch_description=linkedin_fetch_description,
-            # proxies=["208.195.175.46:65095", "208.195.175.45:65095", "localhost"],
-        )
-        result_q.put(("ok", jobs))
-    except Exception as e:
-        result_q.put(("err", f"{type(e).__name__}: {e}"))
-
-def _scrape_site_worker(result_q, job_title, job_location, job_country, site, linkedin_fetch_description):
-    try:
-        jobs = scrape_jobs(
-            site_name=[site],
-            search_term=job_title,
-            google_search_term=f"{job_title} jobs in {job_location}",
-            location=job_location,
-            results_wanted=0,
-            country_indeed=job_country,
-            verbose=0,
-            linkedin_fetch_description=linkedin_fetch_description,
-        )
-        result_q.put(("ok", jobs))
-    except Exception as e:
-        result_q.put(("err", f"{type(e).__name__}: {e}"))
-
-def _run_with_timeout(target, args, timeout_s, label):
-    result_q = mp.Queue()
-    proc = mp.Process(target=target, args=(result_q, *args))
-    proc.start()
-    proc.join(timeout_s)
-
-    if proc.is_alive():
-        proc.terminate()
-        proc.join(10)
-        print(f"⚠️ Timeout en {label} after {timeout_s}s", flush=True)
-        return None, f"timeout after {timeout_s}s"
-
-    if not result_q.empty():
-        status, payload = result_q.get()
-        if status == "ok":
-            return payload, None
-        return None, payload
-
-    return None, "no result from worker"
-
-def SCRAPYSCRAPY(job_title, job_location, job_country):
-    sites = [ "linkedin", "google"]  # , "bdjobs", "naukri", "bayt" ,"zip_recruiter", "glassdoor","indeed"
-    scrape_start = time.monotonic()
-    frames = []
-
-    for site in sites:
-        label = f"scrape_jobs[{site}]({job_title} | {job_location})"
+SITES = ["linkedin", "google"]  # , "bdjobs", "naukri", "bayt" ,"zip_recruiter", "glassdoor","indeed"
+
+
+def configure(config: dict):
+    """Ajustes de la corrida (entorno > YAML > default) como globals del módulo; se llama desde main()."""
+    global SCRAPE_TIMEOUT_S, MAX_RUN_SECONDS, LOOP_SLEEP_MIN_S, LOOP_SLEEP_MAX_S, SITE_CONCURRENCY
+    global QUERY_CONCURRENCY, SCRAPE_WORKERS, SCRAPE_WORKER_MAX_TASKS, PIPELINE_QUEUE_SIZE
+    global PIPELINE_PARSE_WORKERS, PIPELINE_WRITE_BATCH_ROWS, PIPELINE_WRITE_FLUSH_S
+    global CHECKPOINT_FRESH_HOURS, _SITE_SLOTS
+
+    SCRAPE_TIMEOUT_S = int(os.getenv("SCRAPE_TIMEOUT_S", config.get("scrape_timeout_s", 900)))
+    MAX_RUN_SECONDS = int(os.getenv("MAX_RUN_SECONDS", config.get("max_run_seconds", 6 * 3600)))
+    LOOP_SLEEP_MIN_S = int(os.getenv("LOOP_SLEEP_MIN_S", config.get("loop_sleep_min_s", 1)))
+    LOOP_SLEEP_MAX_S = int(os.getenv("LOOP_SLEEP_MAX_S", config.get("loop_sleep_max_s", 2)))
+    # Máximo de scrapes simultáneos por sitio (cortesía hacia cada sitio), p.ej. site_concurrency: {linkedin: 1}
+    SITE_CONCURRENCY = {site: int(config.get("site_concurrency", {}).get(site, 1)) for site in SITES}
+    # Combos (query × location) en vuelo a la vez; con 1 se recorre la malla en orden como antes
+    QUERY_CONCURRENCY = int(os.getenv("SCRAPE_QUERY_CONCURRENCY", config.get("query_concurrency", 1)))
+    # Workers de scraping persistentes (cada uno importa jobspy una sola vez)
+    SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", config.get("scrape_workers", sum(SITE_CONCURRENCY.values()))))
+    SCRAPE_WORKER_MAX_TASKS = int(os.getenv("SCRAPE_WORKER_MAX_TASKS", config.get("scrape_worker_max_tasks", 50)))
+    # Pipeline parse/normalize -> writer (backpressure y tamaño de transacción)
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", config.get("pipeline_queue_size", 8)))
+    PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", config.get("pipeline_parse_workers", 1)))
+    PIPELINE_WRITE_BATCH_ROWS = int(os.getenv("PIPELINE_WRITE_BATCH_ROWS", config.get("pipeline_write_batch_rows", 500)))
+    PIPELINE_WRITE_FLUSH_S = float(os.getenv("PIPELINE_WRITE_FLUSH_S", config.get("pipeline_write_flush_s", 5)))
+    # Combos completados hace menos de estas horas se saltan al reanudar (0 = desactivado)
+    CHECKPOINT_FRESH_HOURS = float(os.getenv("CHECKPOINT_FRESH_HOURS", config.get("checkpoint_fresh_hours", 20)))
+    _SITE_SLOTS = {site: threading.BoundedSemaphore(max(1, n)) for site, n in SITE_CONCURRENCY.items()}
+
+def _scrape_site(job_title, job_location, job_country, site, linkedin_fetch_description):
+    """Corre dentro de un worker del pool; devuelve (columnas, filas) en vez de un DataFrame pickleado."""
+    from jobspy import scrape_jobs  # ya precargado por el forkserver
+
+    jobs = scrape_jobs(
+        site_name=[site],
+        search_term=job_title,
+        google_search_term=f"{job_title} jobs in {job_location}",
+        location=job_location,
+        results_wanted=0,
+        country_indeed=job_country,
+        verbose=0,
+        linkedin_fetch_description=linkedin_fetch_description,
+    )
+    if jobs is None or jobs.empty:
+        return [], []
+    return list(jobs.columns), list(jobs.itertuples(index=False, name=None))
+
+_POOL = None
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = ScrapePool(_scrape_site, size=SCRAPE_WORKERS, max_tasks_per_worker=SCRAPE_WORKER_MAX_TASKS,
+                           preload=("jobspy", "pandas"))
+    return _POOL
+
+def _run_with_timeout(args, timeout_s, label):
+    import pandas as pd
+
+    payload, err = _get_pool().run(args, timeout_s, label)
+    if err:
+        return None, err
+    columns, rows = payload
+    return pd.DataFrame.from_records(rows, columns=columns), None
+
+def _scrape_one_site(job_title, job_location, job_country, site):
+    label = f"scrape_jobs[{site}]({job_title} | {job_location})"
+    with _SITE_SLOTS[site]:
         print(f"[SCRAPER] start {label}", flush=True)
         df, err = _run_with_timeout(
-            _scrape_site_worker,
             (job_title, job_location, job_country, site, True),
             SCRAPE_TIMEOUT_S,
             label,
         )
-        if err:
-            print(f"⚠️ Error en {job_location}/{job_country} [{site}]: {err}", flush=True)
-            continue
-        if df is not None and not df.empty:
-            frames.append(df)
-            print(f"[SCRAPER] {label} -> {len(df)} rows", flush=True)
-        else:
-            print(f"[SCRAPER] {label} -> 0 rows", flush=True)
+    return site, label, df, err
+
+def SCRAPYSCRAPY(job_title, job_location, job_country):
+    """Scrapea todos los sitios de una query en paralelo; la latencia es la del sitio más lento."""
+    import pandas as pd
+
+    scrape_start = time.monotonic()
+    frames = []
+    failed_sites = []
+
+    with ThreadPoolExecutor(max_workers=len(SITES), thread_name_prefix="site") as executor:
+        futures = [executor.submit(_scrape_one_site, job_title, job_location, job_country, site) for site in SITES]
+        for fut in as_completed(futures):
+            site, label, df, err = fut.result()
+            if err:
+                print(f"⚠️ Error en {job_location}/{job_country} [{site}]: {err}", flush=True)
+                failed_sites.append(f"{site}: {err}")
+                continue
+            if df is not None and not df.empty:
+                frames.append(df)
+                print(f"[SCRAPER] {label} -> {len(df)} rows", flush=True)
+            else:
+                print(f"[SCRAPER] {label} -> 0 rows", flush=True)
 
     if frames:
         jobs = pd.concat(frames, ignore_index=True)
@@ -145,47 +122,109 @@ def SCRAPYSCRAPY(job_title, job_location, job_country):
 
     scrape_elapsed = time.monotonic() - scrape_start
     print(f"[SCRAPER] scrape_jobs({job_title} | {job_location}) total -> {len(jobs)} rows in {scrape_elapsed:.2f}s", flush=True)
-    return jobs
+    return jobs, failed_sites
     
 # --- Helper: mapear output JobSpy → formato DB ---
-def map_jobspy_row(row, qry_title, qry_loc):
-    now_local = datetime.now(MX)
-    desc = row.get("description")
-    return {
-        "job_hash": calculate_hash(row["job_url"]),
-        "site_name": row["site"],
-        "qry_title": qry_title,
-        "qry_loc": qry_loc,
-        "qry_date": now_local.date().isoformat(),
-        "title": row.get("title"),
-        "company": row.get("company"),
-        "location": row.get("location"),
-        "link": row.get("job_url"),
-        "job_description": desc if isinstance(desc, str) else "[[NO DESCRIPTION RETURNED]]",
-        "scraped_at": now_local.isoformat(),
-        "last_seen_on": now_local.date().isoformat(),
-        "date": row["date_posted"].isoformat() if isinstance(row.get("date_posted"), date) else None,
-        "full_text" : clean_text(desc) if isinstance(desc, str) else "[[NO DESCRIPTION RETURNED]]",
-        "modalidad_trabajo": "remote" if(row.get("is_remote") is True or row.get("work_from_home_type") is True) else "not remote",
-        "tipo_contrato": row.get("job_type"),
-        "salario_estimado": f"{row.get('min_amount') or ''} to {row.get('max_amount') or ''} {row.get('currency') or ''} {row.get('interval') or ''}",
-        }
-
-def clean_text(text):
-    if not text:
+def _column(jobs, name):
+    """Columna del DataFrame como lista de Python; NaN/None/NaT -> None."""
+    if name not in jobs.columns:
+        return [None] * len(jobs)
+    col = jobs[name]
+    return col.astype(object).where(col.notna(), None).tolist()
+
+def _salary_part(jobs, name):
+    """Columna como texto para salario_estimado; faltantes y vacíos -> ''."""
+    if name not in jobs.columns:
         return ""
-    soup = BeautifulSoup(text, "html.parser")
-    return " ".join(soup.get_text().split())
+    col = jobs[name].astype(object)
+    col = col.where(col.notna(), "")
+    return col.astype(str).where(col.astype(bool), "")
+
+def _is_true(jobs, name):
+    if name not in jobs.columns:
+        return False
+    return jobs[name].astype(object).eq(True)
+
+def map_jobspy_frame(jobs, qry_title, qry_loc):
+    """
+    DataFrame de jobspy -> tuplas listas para upsert_vacante_rows, columna por columna.
+
+    La fecha de la corrida, el link normalizado con su hash, la descripción
+    limpia, el salario y la modalidad se calculan una vez por lote en vez de
+    armar una Series y un dict por fila.
+    """
+    import pandas as pd
+
+    today = datetime.now(MX).date().isoformat()
+    links, hashes = link_hashes(_column(jobs, "job_url"))
+    descs = _column(jobs, "description")
+    # Las descripciones repetidas en el lote se limpian una sola vez
+    full_texts = clean_texts(descs, missing=NO_DESCRIPTION)
+
+    if "date_posted" in jobs.columns:
+        posted = pd.to_datetime(jobs["date_posted"], errors="coerce")
+        posted = posted.dt.strftime("%Y-%m-%d").astype(object).where(posted.notna(), None).tolist()
+    else:
+        posted = None
 
+    remote = _is_true(jobs, "is_remote") | _is_true(jobs, "work_from_home_type")
+    if isinstance(remote, bool):
+        modalidad = "remote" if remote else "not remote"
+    else:
+        modalidad = remote.map({True: "remote", False: "not remote"}).tolist()
+
+    salario = (_salary_part(jobs, "min_amount") + " to " + _salary_part(jobs, "max_amount") + " "
+               + _salary_part(jobs, "currency") + " " + _salary_part(jobs, "interval"))
+    if not isinstance(salario, str):
+        salario = salario.tolist()
+
+    return vacante_rows({
+        "job_hash": hashes,
+        "site_name": _column(jobs, "site"),
+        "qry_title": qry_title,
+        "qry_loc": qry_loc,
+        "title": _column(jobs, "title"),
+        "company": _column(jobs, "company"),
+        "location": _column(jobs, "location"),
+        "link": links,
+        "job_description": [d if isinstance(d, str) else NO_DESCRIPTION for d in descs],
+        "scraped_at": today,
+        "last_seen_on": today,
+        "date": posted,
+        "full_text": full_texts,
+        "modalidad_trabajo": modalidad,
+        "tipo_contrato": _column(jobs, "job_type"),
+        "salario_estimado": salario,
+    }, len(jobs), today)
+
+def normalize_frame(key, jobs):
+    """Etapa parse/normalize del pipeline: DataFrame de jobspy -> tuplas de vacantes."""
+    qry_title, qry_loc = key
+    return map_jobspy_frame(jobs, qry_title, qry_loc)
+
+def main(argv=None):
+    from tqdm import tqdm
+
+    args = parse_args("Run the job scraper.", argv)
+    data_dir = find_data_dir()
+    config_path, db_path = resolve_paths(args, data_dir)
+    config = load_config(config_path)
+    configure(config)
+
+    print(f"[SCRAPER] DATA_DIR={data_dir}")
+    print(f"[SCRAPER] DB_PATH={db_path}")
+    print(f"[SCRAPER] CONFIG_PATH={config_path}")
+
+    set_db_path(db_path)
+
+    roles = config["roles"]
+    functions = config["functions"]
+    locations = config["locations"]
 
-if __name__ == "__main__":
-    
     start = datetime.now()
     run_start_monotonic = time.monotonic()
     print(f"\n[SCRAPER] Started at {start.isoformat(sep=' ', timespec='seconds')}\n")
 
-    all_jobs=[]
-    
     total_loops=len(roles)*len(functions)*len(locations)
 
     # generar pares (location_completo, solo_pais)
@@ -201,64 +240,125 @@ if __name__ == "__main__":
 
 
     init_db()
-    total_new_jobs=0
-
-    stop_requested = False
-    with tqdm(total=total_loops, desc="Scraping jobs") as pbar:
-        for role in roles:
-            for function in functions:
-                for location,country in loc_country:
-                    loop_start = time.monotonic()
-                   
-                    qry_title=f'{role} {function}'
-                    qry_loc=f'{loc}'
-
-                    total_elapsed = time.monotonic() - run_start_monotonic
-                    if total_elapsed > MAX_RUN_SECONDS:
-                        print(f"[SCRAPER] Max runtime reached ({MAX_RUN_SECONDS}s). Stopping early.")
-                        stop_requested = True
-                        break
-
-                    jobs_found=SCRAPYSCRAPY(f'{role} {function}', location, country)
-
-                    if not jobs_found.empty:
-                        vacs = [map_jobspy_row(row, qry_title, qry_loc) for _, row in jobs_found.iterrows()]
-                        new_this_batch = insert_vacantes(vacs)
-                        total_new_jobs+=new_this_batch
-                        pbar.set_postfix({
-                            "role": role,
-                            "func": function,
-                            "loc": location,
-                            "jobs": new_this_batch
-                        })
-                    else:
-                        pbar.set_postfix({
-                            "role": role,
-                            "func": function,
-                            "loc": location,
-                            "jobs": 0
-                    })
 
-                    
-                    all_jobs.append(jobs_found)
-                    
-                    sleep_s = random.randint(LOOP_SLEEP_MIN_S, LOOP_SLEEP_MAX_S)
-                    time.sleep(sleep_s)
-                    loop_elapsed = time.monotonic() - loop_start
-                    print(f"[SCRAPER] loop {qry_title} | {location} finished in {loop_elapsed:.2f}s (sleep {sleep_s}s)")
+    done_checkpoints = get_done_checkpoints(CHECKPOINT_FRESH_HOURS)
+    if done_checkpoints:
+        print(f"[SCRAPER] Resuming: {len(done_checkpoints)} combos completed in the last {CHECKPOINT_FRESH_HOURS}h will be skipped.")
+
+    pipeline = ScrapePipeline(
+        normalize_frame,
+        upsert_vacante_rows,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        parse_workers=PIPELINE_PARSE_WORKERS,
+        write_batch_rows=PIPELINE_WRITE_BATCH_ROWS,
+        write_flush_s=PIPELINE_WRITE_FLUSH_S,
+    )
+
+    # Pares (qry_title, qry_loc) escritos completos en esta corrida: solo esos se cierran
+    covered_queries = set()
+
+    def process_combo(qry_title, location, country):
+        loop_start = time.monotonic()
+
+        # Queda 'pending' si el contenedor muere a media búsqueda
+        mark_checkpoint(qry_title, location, 0, "pending")
+        jobs_found, failed_sites = SCRAPYSCRAPY(qry_title, location, country)
+
+        # Si algún sitio falló o hizo timeout, el combo queda para la siguiente corrida
+        def on_done(ok, error):
+            if failed_sites or not ok:
+                mark_checkpoint(qry_title, location, 0, "failed", "; ".join(failed_sites + ([error] if error else [])))
+            else:
+                mark_checkpoint(qry_title, location, 0, "done")
+                covered_queries.add((qry_title, location))
+
+        if jobs_found.empty:
+            on_done(True, None)
+        else:
+            # El mapeo y el insert corren en el pipeline; aquí solo se encola (bloquea si está lleno)
+            pipeline.put((qry_title, location), jobs_found, on_done)
+
+        sleep_s = random.randint(LOOP_SLEEP_MIN_S, LOOP_SLEEP_MAX_S)
+        time.sleep(sleep_s)
+        loop_elapsed = time.monotonic() - loop_start
+        print(f"[SCRAPER] loop {qry_title} | {location} finished in {loop_elapsed:.2f}s (sleep {sleep_s}s)")
+        return len(jobs_found)
+
+    combos = [
+        (role, function, location, country)
+        for role in roles
+        for function in functions
+        for location, country in loc_country
+    ]
+
+    # Pase lo que pase, el pool se cierra y el escritor vacía sus lotes pendientes
+    try:
+        with tqdm(total=total_loops, desc="Scraping jobs") as pbar, \
+                ThreadPoolExecutor(max_workers=max(1, QUERY_CONCURRENCY), thread_name_prefix="combo") as executor:
+            in_flight = {}
+
+            def _collect(futures):
+                for fut in futures:
+                    role, function, location, qry_title = in_flight.pop(fut)
+                    try:
+                        rows_found = fut.result()
+                    except Exception as e:
+                        # Un combo que truena no tumba la corrida: queda failed para la siguiente
+                        print(f"\n⚠️ [SCRAPER] Error en {qry_title} | {location}: {type(e).__name__}: {e}")
+                        mark_checkpoint(qry_title, location, 0, "failed", f"{type(e).__name__}: {e}")
+                        rows_found = 0
+                    pbar.set_postfix({
+                        "role": role,
+                        "func": function,
+                        "loc": location,
+                        "jobs": rows_found
+                    })
                     pbar.update(1)
-                if stop_requested:
+
+            for role, function, location, country in combos:
+                qry_title=f'{role} {function}'
+
+                total_elapsed = time.monotonic() - run_start_monotonic
+                if total_elapsed > MAX_RUN_SECONDS:
+                    print(f"[SCRAPER] Max runtime reached ({MAX_RUN_SECONDS}s). Stopping early.")
                     break
-            if stop_requested:
-                break
 
-    finalize_scrape_run()
+                if (qry_title, location, 0) in done_checkpoints:
+                    print(f"[SCRAPER] skip {qry_title} | {location} (checkpoint fresco)")
+                    pbar.update(1)
+                    continue
+
+                while len(in_flight) >= max(1, QUERY_CONCURRENCY):
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    _collect(done)
+
+                fut = executor.submit(process_combo, qry_title, location, country)
+                in_flight[fut] = (role, function, location, qry_title)
+
+            _collect(list(as_completed(list(in_flight))))
+    finally:
+        if _POOL is not None:
+            _POOL.close()
+        stage_metrics = pipeline.close()
+    total_new_jobs = pipeline.inserted
+    print(f"[SCRAPER] Pipeline: {stage_metrics}")
+
+    closed_by_query = finalize_scrape_run(covered_queries)
+    print(f"[SCRAPER] Closed {sum(closed_by_query.values())} stale jobs across {len(covered_queries)} queries")
+    for (qry_title, qry_loc), n in closed_by_query.items():
+        print(f"[SCRAPER]   closed {n:>4} | {qry_title} | {qry_loc}")
 
     end = datetime.now()
     duration = int((end - start).total_seconds())
 
-    log_scraper_run(start, total_new_jobs, duration)
+    log_scraper_run(start, total_new_jobs, duration, stage_metrics)
+
+    close_db()
 
     print(f"\n[SCRAPER] Finished at {end.isoformat(sep=' ', timespec='seconds')}")
     print(f"[SCRAPER] Duration: {duration}s")
     print(f"[SCRAPER] New jobs this run: {total_new_jobs}\n")
+
+
+if __name__ == "__main__":
+    main()
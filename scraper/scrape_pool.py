@@ -0,0 +1,115 @@
+import multiprocessing as mp
+import queue
+
+
+def _worker_loop(conn, target):
+    """Loop de un worker: recibe args por el pipe, ejecuta target y devuelve (status, payload)."""
+    while True:
+        try:
+            args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if args is None:
+            break
+        try:
+            conn.send(("ok", target(*args)))
+        except Exception as e:
+            conn.send(("err", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx, target):
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_loop, args=(child_conn, target), daemon=True)
+        self.proc.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def kill(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(10)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join(5)
+
+
+class ScrapePool:
+    """
+    Pool de procesos de scraping de larga vida.
+
+    Cada worker importa jobspy/pandas una sola vez y atiende muchas llamadas.
+    Se conserva la semántica de `_run_with_timeout`: si una llamada excede su
+    timeout el worker se mata y se reemplaza por uno nuevo. `run` es thread-safe;
+    si todos los workers están ocupados, espera a que se libere uno.
+
+    Los workers se crean desde un forkserver (con `preload` ya importado) y no
+    con fork directo: el proceso padre tiene hilos y un fork a media corrida
+    puede heredar locks tomados y colgar al worker.
+    """
+
+    def __init__(self, target, size: int = 1, max_tasks_per_worker: int = 0, start_method=None, preload=()):
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        self._ctx = mp.get_context(start_method)
+        if start_method == "forkserver" and preload:
+            self._ctx.set_forkserver_preload(list(preload))
+        self._target = target
+        self._max_tasks = max_tasks_per_worker
+        self._idle: queue.Queue = queue.Queue()
+        self._workers: list[_Worker] = []
+        for _ in range(max(1, size)):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self._target)
+        self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self._workers.remove(worker)
+        return self._spawn()
+
+    def run(self, args, timeout_s, label):
+        """Ejecuta target(*args) en un worker. Devuelve (payload, None) o (None, error)."""
+        worker = self._idle.get()
+        try:
+            worker.conn.send(tuple(args))
+            if not worker.conn.poll(timeout_s):
+                print(f"⚠️ Timeout en {label} after {timeout_s}s", flush=True)
+                worker = self._replace(worker)
+                return None, f"timeout after {timeout_s}s"
+
+            status, payload = worker.conn.recv()
+            worker.tasks += 1
+            if self._max_tasks and worker.tasks >= self._max_tasks:
+                worker = self._replace(worker)
+            if status == "ok":
+                return payload, None
+            return None, payload
+        except (EOFError, BrokenPipeError, OSError) as e:
+            worker = self._replace(worker)
+            return None, f"worker died: {type(e).__name__}: {e}"
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        for worker in list(self._workers):
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.proc.join(5)
+            worker.kill()
+        self._workers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
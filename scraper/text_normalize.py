@@ -0,0 +1,89 @@
+"""
+Normalización de descripciones: HTML -> texto plano, entidades decodificadas y
+espacios colapsados. Sustituye a `BeautifulSoup(text, "html.parser").get_text()`
+por fila: aquí no se arma árbol, solo se escuchan los eventos de html.parser, y
+el texto sin marcado (lo más común: jobspy ya entrega markdown) ni pasa por él.
+"""
+import threading
+from html.parser import HTMLParser
+
+NO_DESCRIPTION = "[[NO DESCRIPTION RETURNED]]"
+
+# Igual que get_text() de bs4: el contenido de estos tags no es texto visible
+_SKIP_TAGS = frozenset({"script", "style", "template"})
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+    def reset(self):
+        super().reset()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA[") and not self._skip:
+            self.parts.append(data[6:])
+
+
+_local = threading.local()
+
+
+def _extractor() -> _TextExtractor:
+    # Un parser por hilo (el pipeline puede tener varios hilos de parseo)
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = _TextExtractor()
+    return parser
+
+
+def strip_html(text: str) -> str:
+    """Texto visible de `text` con los espacios colapsados a uno."""
+    if "<" not in text and "&" not in text:
+        return " ".join(text.split())
+    parser = _extractor()
+    parser.reset()
+    parser.feed(text)
+    parser.close()
+    return " ".join("".join(parser.parts).split())
+
+
+def clean_text(text) -> str:
+    if not text:
+        return ""
+    return strip_html(text)
+
+
+def clean_texts(values, missing: str = "") -> list[str]:
+    """
+    Versión por lote de clean_text para una lista o columna completa.
+
+    Los valores que no son str (None, NaN de pandas) salen como `missing`.
+    Las descripciones repetidas en el lote (la misma vacante en varias
+    búsquedas) se procesan una sola vez.
+    """
+    seen: dict[str, str] = {}
+    out = []
+    append = out.append
+    for value in values:
+        if not isinstance(value, str):
+            append(missing)
+            continue
+        cleaned = seen.get(value)
+        if cleaned is None:
+            cleaned = seen[value] = strip_html(value) if value else ""
+        append(cleaned)
+    return out